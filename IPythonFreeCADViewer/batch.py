@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""
+Converts folders of FreeCAD documents into geometry caches and glTF files in a pool of
+headless FreeCAD processes, see `process_files`. It only uses `freecadgeometry`, so the
+workers don't import pythreejs or ipywidgets. From the command line:
+
+    python3 IPythonFreeCADViewer/batch.py models/ --processes 8 --glb
+"""
+
+#***************************************************************************
+#*   (c) Marcus Ding 2020                                                  *   
+#*                                                                         *
+#*   This file is part of the FreeCAD CAx development system.              *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   FreeCAD is distributed in the hope that it will be useful,            *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        * 
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        * 
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#*   Marcus Ding 2020                                                      *
+#***************************************************************************/
+
+from __future__ import annotations
+
+try:
+    import FreeCADGui
+except ImportError:
+    # without FreeCAD only documents with an up to date geometry cache can be processed
+    FreeCADGui = None
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Union, List, Tuple, NamedTuple
+
+from freecadgeometry import GeometryBuffers, disk_cache_path, read_geometry_cache, file_to_buffers, write_glb
+
+
+class BatchResult(NamedTuple):
+    """
+    Result of converting one .FCStd file in `process_files`. The geometry stays in the cache file
+    at `cache_path`, see `BatchResult.buffers`. `error` is `None` unless the file failed.
+    """
+    path: str
+    cache_path: Union[str, None]
+    glb_path: Union[str, None]
+    objects: int
+    triangles: int
+    edges: int
+    vertices: int
+    seconds: float
+    error: Union[str, None]
+
+    def buffers(self) -> Tuple[List[GeometryBuffers], List[str]]:
+        """
+        Returns the geometry buffers and object names of the file, memory mapped from the
+        cache the worker wrote, so they are shared with the page cache instead of copied.
+        """
+        if self.error is not None:
+            raise Exception("Converting `{}` failed: {}".format(self.path, self.error))
+        buffers, names, _ = read_geometry_cache(self.cache_path)
+        return buffers, names
+
+def batch_paths(paths: List[str]) -> List[str]:
+    """Returns the given .FCStd files and the ones found in the given folders and their subfolders."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in sorted(os.walk(path)):
+                files.extend(os.path.join(folder, name) for name in sorted(names)
+                             if name.lower().endswith(".fcstd"))
+        else:
+            files.append(path)
+    return files
+
+def init_batch_worker() -> None:
+    """Sets up the GUI module of FreeCAD without a window in a worker process of `process_files`."""
+    if FreeCADGui is not None and hasattr(FreeCADGui, "setupWithoutGUI"):
+        try:
+            FreeCADGui.setupWithoutGUI()
+        except Exception: # pylint: disable=broad-except
+            # already set up
+            pass
+
+def process_file(path: str, export_glb: bool=False) -> BatchResult:
+    """
+    Converts the .FCStd file at `path` into its geometry cache (see `file_to_buffers`) and
+    optionally a .glb file next to it. Returns the `BatchResult`, failures are caught and
+    returned in its `error`.
+    """
+    start = time.perf_counter()
+    try:
+        if not os.path.isfile(path):
+            raise Exception("No such file: `{}`".format(path))
+        buffers, names = file_to_buffers(path)
+        glb_path = None
+        if export_glb:
+            glb_path = os.path.splitext(path)[0] + ".glb"
+            write_glb(glb_path, buffers, names)
+        return BatchResult(path, disk_cache_path(path), glb_path, len(names),
+                           sum(len(obj_buffers.faces) for obj_buffers in buffers),
+                           sum(max(len(obj_buffers.edge_offsets) - 1, 0) for obj_buffers in buffers),
+                           sum(len(obj_buffers.vertices) for obj_buffers in buffers),
+                           time.perf_counter() - start, None)
+    except Exception as error: # pylint: disable=broad-except
+        return BatchResult(path, None, None, 0, 0, 0, 0, time.perf_counter() - start,
+                           "{}: {}".format(type(error).__name__, error))
+
+def process_files(paths: List[str], processes: Union[int, None]=None, export_glb: bool=False,
+                  progress=None) -> List[BatchResult]:
+    """
+    Converts the .FCStd files (folders are searched, see `batch_paths`) in a pool of `processes`
+    worker processes, one per core by default, and returns their `BatchResult` in order.
+
+    Every worker runs its own headless FreeCAD and sends back only the small `BatchResult`, the
+    geometry goes through the cache files it writes next to the documents, which the caller maps
+    into memory (`BatchResult.buffers`). Files with an up to date cache are not converted again.
+    The workers have no view providers, the colors are the ones saved in the files (see
+    `file_to_buffers`), changes of single face colors are lost.
+    Failures, including crashed workers, are collected as results with an `error`.
+    `progress(result)` is called whenever a file is done.
+    """
+    paths = batch_paths(paths)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if not (isinstance(processes, int) and processes > 0):
+        raise TypeError("Must be int and > 0.")
+    results = [None] * len(paths)
+    # FreeCAD doesn't survive a fork, the workers start fresh interpreters
+    with ProcessPoolExecutor(max_workers=min(processes, max(len(paths), 1)), initializer=init_batch_worker,
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(process_file, path, export_glb): position for position, path in enumerate(paths)}
+        for future in as_completed(futures):
+            position = futures[future]
+            try:
+                results[position] = future.result()
+            except Exception as error: # pylint: disable=broad-except
+                results[position] = BatchResult(paths[position], None, None, 0, 0, 0, 0, 0.0,
+                                                "{}: {}".format(type(error).__name__, error))
+            if progress is not None:
+                progress(results[position])
+    return results
+
+def main(argv: Union[List[str], None]=None) -> int:
+    """
+    Command line entry point converting folders of .FCStd files in parallel, see `process_files`:
+
+        python3 batch.py models/ --processes 8 --glb
+
+    Prints one line per file and returns 1 if any file failed.
+    """
+    import argparse # pylint: disable=import-outside-toplevel
+    parser = argparse.ArgumentParser(description="Convert FreeCAD documents into geometry caches and glTF files.")
+    parser.add_argument("paths", nargs="+", help=".FCStd files or folders containing them")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, one per core by default")
+    parser.add_argument("--glb", action="store_true", help="also write a .glb file next to every document")
+    args = parser.parse_args(argv)
+
+    def report(result):
+        if result.error is None:
+            print("{}: {} objects, {} triangles, {} edges, {} vertices in {:.2f} s"
+                  .format(result.path, result.objects, result.triangles, result.edges, result.vertices,
+                          result.seconds))
+        else:
+            print("{}: FAILED {}".format(result.path, result.error))
+    start = time.perf_counter()
+    results = process_files(args.paths, args.processes, args.glb, progress=report)
+    failed = [result for result in results if result.error is not None]
+    print("{} files, {} failed, {:.2f} s".format(len(results), len(failed), time.perf_counter() - start))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,1180 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module contains the widget independent part of `freecadviewer`: reading the Coin3D scene
+graphs of FreeCAD document objects into `GeometryBuffers`, caching them in memory and on disk
+and exporting them as glTF. It imports neither pythreejs nor ipywidgets, so headless processes
+like the workers of `batch` can use it.
+"""
+
+#***************************************************************************
+#*   (c) Marcus Ding 2020                                                  *   
+#*                                                                         *
+#*   This file is part of the FreeCAD CAx development system.              *
+#*                                                                         *
+#*   This program is free software; you can redistribute it and/or modify  *
+#*   it under the terms of the GNU Lesser General Public License (LGPL)    *
+#*   as published by the Free Software Foundation; either version 2 of     *
+#*   the License, or (at your option) any later version.                   *
+#*   for detail see the LICENCE text file.                                 *
+#*                                                                         *
+#*   FreeCAD is distributed in the hope that it will be useful,            *
+#*   but WITHOUT ANY WARRANTY; without even the implied warranty of        * 
+#*   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+#*   GNU Lesser General Public License for more details.                   *
+#*                                                                         *
+#*   You should have received a copy of the GNU Library General Public     *
+#*   License along with FreeCAD; if not, write to the Free Software        * 
+#*   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+#*   USA                                                                   *
+#*                                                                         *
+#*   Marcus Ding 2020                                                      *
+#***************************************************************************/
+
+from __future__ import annotations
+
+import numpy as np
+
+try:
+    import FreeCAD
+    import FreeCADGui
+except ImportError:
+    # without FreeCAD only geometry from disk caches can be read, see `file_to_buffers`
+    FreeCAD = FreeCADGui = None
+try:
+    from pivy import coin
+except ImportError:
+    coin = None
+
+import itertools
+import json
+import os
+import struct
+import time
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, List, Tuple, NamedTuple, Any, Iterator
+from xml.etree import ElementTree
+
+NORMAL_WEIGHTINGS = ["area", "angle"]
+FIELD_SEPARATORS = str.maketrans("[],", "   ")
+# WebGL2 treats the largest 16-bit index as primitive restart, so it can't address a vertex
+MAX_UINT8_VERTICES = 255
+MAX_UINT16_VERTICES = 65535
+GEOMETRY_CACHE_BYTES = 512 * 2**20
+# view properties that change the scene graph of an object
+VIEW_STAMP_PROPERTIES = ["Visibility", "DisplayMode", "ShapeColor", "LineColor", "Transparency",
+                         "DiffuseColor", "Deviation", "AngularDeflection"]
+DISK_CACHE_SUFFIX = ".geom"
+DISK_CACHE_MAGIC = b"FCVGEOM\0"
+DISK_CACHE_VERSION = 1
+DISK_CACHE_ALIGNMENT = 64
+GEOMETRY_ARRAY_FIELDS = ["vertices", "faces", "normals", "part_index", "edge_ids", "edge_offsets"]
+GLB_MAGIC = 0x46546C67
+GLB_JSON_CHUNK = 0x4E4F534A
+GLB_BIN_CHUNK = 0x004E4942
+GLTF_COMPONENT_TYPES = {"float32": 5126, "uint16": 5123, "uint32": 5125}
+GLTF_ARRAY_BUFFER = 34962
+GLTF_ELEMENT_ARRAY_BUFFER = 34963
+GLTF_MODE_LINES = 1
+GLTF_MODE_TRIANGLES = 4
+COIN_NODE_KINDS = {} # node class -> kind, see `coin_node_kind`
+# bin edges of the picker latency histogram in milliseconds
+PICKER_LATENCY_BINS = [0, 1, 2, 5, 10, 20, 50, 100, 200, 500, float("inf")]
+
+# types:
+
+SoVectorType = Tuple[float, float, float]
+SoQuaternionType = Tuple[float, float, float, float]
+SoCoinTupleType = Tuple["coin.SoIndexedFaceSet", "coin.SoCoordinate3", "coin.SoMaterial", int, "coin.SoTransform"]
+SoCoordValsListType = List[SoVectorType]
+SoIndicesListType = List[List[int]]
+SoCoordValsArrayType = np.ndarray
+SoIndicesArrayType = Union[np.ndarray, List[np.ndarray]]
+
+class GeometryBuffers(NamedTuple):
+    """
+    Widget independent geometry of a single Coin3D face or line set, see `geometry_buffers`.
+    For face sets `vertices`, `faces`, `normals` and `part_index` are filled, for line sets
+    `vertices` holds the vertex pairs of the line segments together with `edge_ids` and
+    `edge_offsets` (see `generate_line_segments`). The other arrays are empty.
+    """
+    vertices: np.ndarray
+    faces: np.ndarray
+    normals: np.ndarray
+    part_index: np.ndarray
+    edge_ids: np.ndarray
+    edge_offsets: np.ndarray
+    color: SoVectorType
+    transparency: float
+    translation: SoVectorType
+    quaternion: SoQuaternionType
+    is_line: bool
+    object_index: int
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the memory used by the arrays of the buffers in bytes."""
+        return sum(getattr(self, field).nbytes for field in GEOMETRY_ARRAY_FIELDS)
+
+class CoinSnapshot(NamedTuple):
+    """
+    Copy of the Coin3D values of a single face or line set, see `snapshot_values`.
+    It holds no references to Coin nodes, so it can be processed in other threads.
+    """
+    coord_vals: np.ndarray
+    coord_index: np.ndarray
+    part_index: np.ndarray
+    color: SoVectorType
+    transparency: float
+    translation: SoVectorType
+    quaternion: SoQuaternionType
+    is_line: bool
+    object_index: int
+
+class RenderStats():
+    """
+    Collects where the time of a render goes and how much it sends to the browser, see
+    `get_objects_renderer` and `get_document_renderer` with `return_stats=True`.
+
+    - `stages`: wall time in seconds per stage, in the order they ran: `subgraph` (FreeCAD
+      creating the scene graphs), `traversal`, `extraction` (reading Coin fields), `conversion`
+      (normals and line segments), `widgets` (creating the pythreejs objects) and `renderer`
+    - `objects`: triangle, edge and vertex counts per FreeCAD object
+    - `widgets` and `buffer_bytes`: number of widgets and bytes of array data handed to pythreejs,
+      all of it is sent over the kernel comm when the renderer is displayed
+    - `removed_vertices`: vertices removed by welding, see `RendererConfig.weld_tolerance`
+    - `picker_latencies`: duration of every picker callback in seconds
+    - `picker_event_times`: arrival time (`time.perf_counter`) of every picker event, see
+      `picker_event_rate`, and the events `picker_skipped` as unchanged or `picker_coalesced` into
+      a later one (see `generate_picker`)
+    - `picker_delays`: seconds from the arrival of an event until the selection shows it, waiting
+      for throttling or debouncing included
+    """
+    def __init__(self):
+        self.stages = OrderedDict()
+        self.objects = OrderedDict()
+        self.widgets = 0
+        self.buffer_bytes = 0
+        self.removed_vertices = 0
+        self.picker_latencies = []
+        self.picker_event_times = []
+        self.picker_skipped = 0
+        self.picker_coalesced = 0
+        self.picker_delays = []
+    @contextmanager
+    def stage(self, name: str):
+        """Adds the wall time of the `with` block to the stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+    @property
+    def total_time(self) -> float:
+        return sum(self.stages.values())
+    def count_buffers(self, buffers: List[GeometryBuffers], names: Union[List[str], None]=None) -> None:
+        """Adds the triangles, edges and vertices of the geometry buffers to their objects."""
+        for obj_buffers in buffers:
+            name = str(obj_buffers.object_index)
+            if names and obj_buffers.object_index < len(names):
+                name = names[obj_buffers.object_index]
+            counts = self.objects.setdefault(name, dict(triangles=0, edges=0, vertices=0))
+            counts["triangles"] += len(obj_buffers.faces)
+            counts["edges"] += max(len(obj_buffers.edge_offsets) - 1, 0)
+            counts["vertices"] += len(obj_buffers.vertices)
+    def count_widgets(self, root: Any) -> None:
+        """Sets `widgets` and `buffer_bytes` to what is reachable from the given widget."""
+        # imported here, this module is used in processes without widgets
+        from ipywidgets import Widget # pylint: disable=import-outside-toplevel
+        self.widgets = 0
+        self.buffer_bytes = 0
+        seen = set()
+        pending = [root]
+        while pending:
+            value = pending.pop()
+            if isinstance(value, (list, tuple)):
+                pending.extend(value)
+            elif isinstance(value, dict):
+                pending.extend(value.values())
+            elif isinstance(value, np.ndarray):
+                self.buffer_bytes += value.nbytes
+            elif isinstance(value, Widget) and id(value) not in seen:
+                seen.add(id(value))
+                self.widgets += 1
+                pending.extend(getattr(value, key) for key in value.keys)
+    @property
+    def picker_event_rate(self) -> float:
+        """Picker events per second between the first and the last one."""
+        if len(self.picker_event_times) < 2:
+            return 0.0
+        return (len(self.picker_event_times) - 1) / max(self.picker_event_times[-1] - self.picker_event_times[0],
+                                                        np.finfo('float64').tiny)
+    def picker_histogram(self, bins: List[float]=PICKER_LATENCY_BINS,
+                         delays: bool=False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the number of picker callbacks per latency bin and the bin edges in milliseconds,
+        of `picker_delays` instead with `delays`.
+        """
+        return np.histogram(np.multiply(self.picker_delays if delays else self.picker_latencies, 1000), bins=bins)
+    def summary(self) -> str:
+        """Returns a human readable report of the collected values."""
+        lines = ["{:12s} {:9.4f} s".format(name, seconds) for name, seconds in self.stages.items()]
+        lines.append("{:12s} {:9.4f} s".format("total", self.total_time))
+        lines.append("{} widgets, {:.1f} kB of buffers".format(self.widgets, self.buffer_bytes / 1024))
+        if self.removed_vertices:
+            lines.append("{} vertices removed by welding".format(self.removed_vertices))
+        for name, counts in self.objects.items():
+            lines.append("{}: {triangles} triangles, {edges} edges, {vertices} vertices".format(name, **counts))
+        if self.picker_latencies:
+            counts, edges = self.picker_histogram()
+            lines.append("picker callbacks: {}".format(len(self.picker_latencies)))
+            lines.extend("  {:5g} - {:5g} ms: {}".format(low, high, count)
+                         for low, high, count in zip(edges[:-1], edges[1:], counts) if count)
+        if self.picker_event_times:
+            lines.append("picker events: {} at {:.1f}/s, {} skipped as unchanged, {} coalesced"
+                         .format(len(self.picker_event_times), self.picker_event_rate, self.picker_skipped,
+                                 self.picker_coalesced))
+        if self.picker_delays:
+            counts, edges = self.picker_histogram(delays=True)
+            lines.append("picker delays:")
+            lines.extend("  {:5g} - {:5g} ms: {}".format(low, high, count)
+                         for low, high, count in zip(edges[:-1], edges[1:], counts) if count)
+        return "\n".join(lines)
+    def __repr__(self):
+        return self.summary()
+
+@contextmanager
+def timed_stage(stats: Union[RenderStats, None], name: str):
+    """Like `RenderStats.stage`, but does nothing if `stats` is `None`."""
+    if stats is None:
+        yield
+    else:
+        with stats.stage(name):
+            yield
+
+def timed_iter(stats: Union[RenderStats, None], name: str, iterable: Iterator) -> Iterator:
+    """Yields the items of `iterable` and adds the time spent producing them to the stage `name`."""
+    if stats is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with stats.stage(name):
+            item = next(iterator, StopIteration)
+        if item is StopIteration:
+            return
+        yield item
+
+def so_field_to_array(so_field: Union[coin.SoMFVec3f, coin.SoMFInt32], dtype: str, width: int=1) -> np.ndarray:
+    """
+    Returns the values of a Coin multiple value field, e.g. `SoCoordinate3.point` or
+    `SoIndexedFaceSet.coordIndex`, as contiguous numpy array of shape (N, `width`)
+    or (N,) if `width` is 1.
+
+    Integer fields are read in one bulk call through their string representation which
+    is then parsed by numpy, so there is no Python object created per element. Floats are
+    read value by value into the array instead, because the string of `SoField::get` only
+    keeps 6 significant digits (`%g`), which would move coordinates of 1e5 and above.
+    >>>so_field_to_array(so_coord.point, 'float32', 3)
+    array([[0., 0., 0.], [1., 0., 0.], ...], dtype=float32)
+    """
+    if np.dtype(dtype).kind == 'f':
+        values = iter(so_field) if width == 1 else itertools.chain.from_iterable(so_field)
+        values = np.fromiter(values, dtype=dtype, count=so_field.getNum() * width)
+        return values if width == 1 else values.reshape(-1, width)
+    text = so_field.get().translate(FIELD_SEPARATORS)
+    if not text.strip():
+        # numpy parses a whitespace only string as a single -1
+        values = np.empty(0, dtype=dtype)
+    else:
+        values = np.fromstring(text, dtype=dtype, sep=" ")
+    if width == 1:
+        return values
+    return values.reshape(-1, width)
+
+def split_indices(coord_index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits a `coordIndex` array at every -1 without looping in Python.
+    Returns the indices without the -1 separators and an offset array of length
+    `number of lines/faces + 1`, so line or face i is `indices[offsets[i]:offsets[i+1]]`.
+    Values after the last -1 are dropped.
+    >>>split_indices(np.array([0, 1, 2, -1, 2, 3, -1]))
+    (array([0, 1, 2, 2, 3]), array([0, 3, 5]))
+    """
+    coord_index = np.asarray(coord_index)
+    separators = np.flatnonzero(coord_index == -1)
+    # every separator shifts the following positions in the flat array by one
+    ends = separators - np.arange(len(separators))
+    offsets = np.concatenate([[0], ends]).astype(np.intp)
+    indices = coord_index[coord_index != -1][:offsets[-1]]
+    return indices, offsets
+
+def transform_indices(so_node: Union[coin.SoIndexedFaceSet, coin.SoIndexedLineSet]) ->  SoIndicesListType:
+    """
+    Returns list of lists that represent indices from pivy.coin
+    scene objects 'SoIndexedLineSet' and 'SoIndexedFaceSet'.
+    When ever a -1 is encountered in `so_node.coordIndex` a separate new Line or Face
+    is created
+    """
+    indices, offsets = split_indices(so_field_to_array(so_node.coordIndex, 'int32'))
+    return [indices[start:end].tolist() for start, end in zip(offsets[:-1], offsets[1:])]
+
+def generate_line_segments(indices: SoIndicesArrayType, coord_vals: SoCoordValsArrayType)\
+    -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Replaces the polylines given by lists of indices with the vertex pairs of their
+    line segments, so all of them can be drawn by a single `LineSegments` object.
+
+    Returns the (2*S, 3) float32 segment vertices, the FreeCAD edge index (1-based)
+    of each vertex and the vertex offsets of the edges, so the vertices of edge i
+    are `vertices[offsets[i-1]:offsets[i]]`.
+    """
+    lengths = np.array([len(line) for line in indices], dtype=np.intp)
+    num_segments = np.maximum(lengths - 1, 0)
+    edge_offsets = np.concatenate([[0], np.cumsum(2 * num_segments)]).astype(np.intp)
+    if not num_segments.sum():
+        return np.zeros((0, 3), dtype='float32'), np.zeros(0, dtype='float32'), edge_offsets
+    flat_indices = np.concatenate(indices).astype(np.intp)
+    # a segment starts at every index except the last one of each line
+    is_start = np.ones(len(flat_indices), dtype=bool)
+    is_start[np.cumsum(lengths) - 1] = False
+    starts = np.flatnonzero(is_start)
+    segment_indices = np.stack([flat_indices[starts], flat_indices[starts + 1]], axis=1).ravel()
+    vertices = np.asarray(coord_vals, dtype='float32')[segment_indices]
+    edge_ids = np.repeat(np.arange(1, len(indices) + 1, dtype='float32'), 2 * num_segments)
+    return vertices, edge_ids, edge_offsets
+
+def snapshot_values(res_tuple: SoCoinTupleType) -> CoinSnapshot:
+    """
+    Copies all values needed from the Coin3D scene graph object tuple. This is the only
+    step accessing Coin, which has to happen in a single thread.
+    """
+    so_face_line = res_tuple[0] 
+    so_coord = res_tuple[1]
+    so_shaded_material = res_tuple[2]
+    
+    so_shaded_color = so_shaded_material.diffuseColor.getValues()[0]
+    so_shaded_emissive_color = so_shaded_material.emissiveColor.getValues()[0]
+    color = (so_shaded_color[0], so_shaded_color[1], so_shaded_color[2])
+    emissive_color = (so_shaded_color[0], so_shaded_color[1], so_shaded_color[2])
+    transparency = so_shaded_material.transparency[0]
+    
+    coord_vals = so_field_to_array(so_coord.point, 'float32', 3)
+    coord_index = so_field_to_array(so_face_line.coordIndex, 'int32')
+ 
+    is_line = False
+    if isinstance(so_face_line, coin.SoIndexedLineSet):
+        is_line = True
+        part_index = np.zeros(0, dtype='int32')
+    else:
+        if not isinstance(so_face_line, coin.SoIndexedFaceSet):
+            raise Exception("Unsupported type of given node: {}".format(type(so_face_line)))
+        part_index = so_field_to_array(so_face_line.partIndex, 'int32')
+    
+    so_transform = res_tuple[4]
+    translation = tuple(so_transform.translation.getValue())
+    quaternions = tuple(so_transform.rotation.getValue().getValue())
+
+    return CoinSnapshot(coord_vals, coord_index, part_index, color, transparency,
+                        translation, quaternions, is_line, res_tuple[3])
+
+def snapshot_indices(snapshot: CoinSnapshot) -> SoIndicesArrayType:
+    """
+    Returns the indices of a snapshot, for face sets an array of shape (N, 3) holding
+    the triangles, for line sets a list with one index array per line.
+    """
+    flat_indices, offsets = split_indices(snapshot.coord_index)
+    if snapshot.is_line:
+        return np.split(flat_indices, offsets[1:-1]) if len(offsets) > 1 else []
+    if np.any(np.diff(offsets) != 3):
+        raise Exception("Only triangulated face sets are supported.")
+    return flat_indices.reshape(-1, 3)
+
+def extract_values(res_tuple: SoCoinTupleType)\
+    -> Tuple[SoCoordValsArrayType, SoIndicesArrayType, SoQuaternionType, SoVectorType, SoVectorType, int, bool]:
+    """
+    Given the Coin3D scene graph object tuple the function will return the information
+    (coordinates, indices etc.) in an more basic python type as in the typing specification.
+
+    Coordinates are returned as float32 array of shape (M, 3). For face sets the indices
+    are an array of shape (N, 3) holding the triangles, for line sets a list with one
+    index array per line.
+    """
+    snapshot = snapshot_values(res_tuple)
+    return (snapshot.coord_vals, snapshot_indices(snapshot), snapshot.quaternion, snapshot.translation,
+            snapshot.color, snapshot.transparency, snapshot.is_line)
+
+def compute_normals(faces: List[Tuple[int, int, int]], vertices: List[SoVectorType],
+                    normalize: bool=False, weighting: str="area") -> np.array:
+    """
+    Returns a list of normals for
+    each vertex.
+    
+    Input for N faces
+    should be numpy array of shape (N, 3)
+    and for M vertices shape (M, 3) respectively
+
+    The face normals of all faces sharing a vertex are accumulated into it. With
+    `weighting="area"` every face contributes its unnormalized cross product (which
+    is proportional to its area), with `weighting="angle"` every face contributes
+    its unit normal scaled by the angle of the face at that vertex. Set `normalize`
+    to get unit length vertex normals.
+    """
+    if weighting not in NORMAL_WEIGHTINGS:
+        raise Exception("Given `weighting` parameter has to be one of {}, but was `{}`"
+                        .format(NORMAL_WEIGHTINGS, weighting))
+    vertices = np.asarray(vertices, dtype='float32').reshape(-1, 3)
+    faces = np.asarray(faces, dtype=np.intp).reshape(-1, 3)
+    normals = np.zeros((len(vertices), 3), dtype='float32')
+    if len(faces) == 0:
+        return normals
+
+    corners = vertices[faces] # shape (N, 3, 3): the three corner positions of each face
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    if weighting == "angle":
+        to_next = np.roll(corners, -1, axis=1) - corners
+        to_prev = np.roll(corners, 1, axis=1) - corners
+        angles = np.arctan2(np.linalg.norm(np.cross(to_next, to_prev), axis=2),
+                            np.einsum('ijk,ijk->ij', to_next, to_prev))
+        lengths = np.linalg.norm(face_normals, axis=1, keepdims=True)
+        unit_normals = np.divide(face_normals, lengths,
+                                 out=np.zeros_like(face_normals), where=lengths > 0)
+        contributions = unit_normals[:, np.newaxis, :] * angles[:, :, np.newaxis]
+    else:
+        contributions = np.broadcast_to(face_normals[:, np.newaxis, :], corners.shape)
+
+    # scatter the per corner contributions into their vertices
+    vertex_ids = faces.ravel()
+    contributions = contributions.reshape(-1, 3)
+    for axis in range(3):
+        normals[:, axis] = np.bincount(vertex_ids, weights=contributions[:, axis],
+                                       minlength=len(vertices))
+    if normalize:
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        np.divide(normals, lengths, out=normals, where=lengths > 0)
+    return normals
+
+def geometry_buffers(res_tuple: SoCoinTupleType) -> GeometryBuffers:
+    """
+    Returns the widget independent geometry of the given Coin3D object tuple, i.e. the
+    extracted values with normals or line segments already computed.
+    """
+    return snapshot_buffers(snapshot_values(res_tuple))
+
+def snapshot_buffers(snapshot: CoinSnapshot) -> GeometryBuffers:
+    """
+    Returns the geometry buffers of a snapshot taken by `snapshot_values`. This only
+    does numpy work and is safe to run in parallel threads.
+    """
+    indices = snapshot_indices(snapshot)
+    no_vertices = np.zeros((0, 3), dtype='float32')
+    no_faces = np.zeros((0, 3), dtype='int32')
+    no_values = np.zeros(0, dtype='int32')
+    if snapshot.is_line:
+        vertices, edge_ids, edge_offsets = generate_line_segments(indices, snapshot.coord_vals)
+        return GeometryBuffers(vertices, no_faces, no_vertices, no_values, edge_ids, edge_offsets,
+                               snapshot.color, snapshot.transparency, snapshot.translation,
+                               snapshot.quaternion, snapshot.is_line, snapshot.object_index)
+    normals = compute_normals(indices, snapshot.coord_vals)
+    return GeometryBuffers(snapshot.coord_vals, indices, normals, snapshot.part_index, no_values, no_values,
+                           snapshot.color, snapshot.transparency, snapshot.translation,
+                           snapshot.quaternion, snapshot.is_line, snapshot.object_index)
+
+def scene_snapshots(root_node: coin.SoSeparator, stats: Union[RenderStats, None]=None) -> List[CoinSnapshot]:
+    """
+    Returns the snapshots of all face and line sets that are rendered from the given
+    root node of a scene graph.
+    """
+    snapshots = []
+    render_face_set = True
+    for res in timed_iter(stats, "traversal", bfs_traversal(root_node, print_tree=False)):
+        # every face set appears twice in the scene graph, only every second one is rendered
+        if isinstance(res[0], coin.SoIndexedFaceSet) and render_face_set:
+            render_face_set = False
+            continue
+        if isinstance(res[0], coin.SoIndexedFaceSet):
+            render_face_set = True
+        elif not isinstance(res[0], coin.SoIndexedLineSet):
+            continue
+        with timed_stage(stats, "extraction"):
+            snapshots.append(snapshot_values(res))
+    return snapshots
+
+def convert_snapshots(snapshots: List[CoinSnapshot], workers: int=1,
+                      stats: Union[RenderStats, None]=None) -> List[GeometryBuffers]:
+    """
+    Returns the geometry buffers of all snapshots in the same order. With more than one
+    worker the conversion runs in a thread pool, numpy releases the GIL for most of it.
+    """
+    with timed_stage(stats, "conversion"):
+        if workers > 1 and len(snapshots) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(snapshot_buffers, snapshots))
+        return [snapshot_buffers(snapshot) for snapshot in snapshots]
+
+def scene_buffers(root_node: coin.SoSeparator, workers: int=1,
+                  stats: Union[RenderStats, None]=None) -> List[GeometryBuffers]:
+    """
+    Returns the geometry buffers of all face and line sets that are rendered from the given
+    root node of a scene graph. The scene graph is read in this thread, the buffers are
+    computed by `workers` threads.
+    """
+    return convert_snapshots(scene_snapshots(root_node, stats), workers, stats)
+
+def index_dtype(num_vertices: int, compact: bool=False) -> str:
+    """
+    Returns the smallest index type able to address `num_vertices` vertices.
+    8-bit indices are only used if `compact` is set.
+    """
+    if compact and num_vertices <= MAX_UINT8_VERTICES:
+        return 'uint8'
+    if num_vertices <= MAX_UINT16_VERTICES:
+        return 'uint16'
+    return 'uint32'
+
+def coin_node_kind(node: coin.SoNode) -> Union[str, None]:
+    """
+    Returns what `bfs_traversal` does with the node: `"group"` for separators and switches,
+    `"coordinates"`, `"transform"`, `"material"`, `"set"` for indexed face and line sets
+    or `None`. The kind is looked up once per node class.
+    """
+    node_class = type(node)
+    if node_class not in COIN_NODE_KINDS:
+        kind = None
+        if isinstance(node, (coin.SoSwitch, coin.SoSeparator)):
+            kind = "group"
+        elif isinstance(node, coin.SoCoordinate3):
+            kind = "coordinates"
+        elif isinstance(node, coin.SoTransform):
+            kind = "transform"
+        elif isinstance(node, coin.SoMaterial):
+            kind = "material"
+        elif isinstance(node, (coin.SoIndexedLineSet, coin.SoIndexedFaceSet)):
+            kind = "set"
+        COIN_NODE_KINDS[node_class] = kind
+    return COIN_NODE_KINDS[node_class]
+
+def bfs_traversal(node: coin.SoNode,
+                  coordinates: Union[coin.SoCoordinate3, None]=None,
+                  material: Union[coin.SoMaterial, None]=None,
+                  transform: Union[coin.SoTransform, None]=None, 
+                  index: int=0,
+                  print_tree: bool=False,
+                  depth_counter: int=0,
+                  object_index: int=0) -> Iterator[SoCoinTupleType]:
+    """
+    Yields all (SoIndexed(Line/Face)Set, SoCoordinate3, SoMaterial, object index, SoTransform)
+    tuples inside the scene graph in depth first order.
+    
+    The last set, coordinates, material and transform among the children of a separator or
+    switch form its tuple, coordinates and transform are inherited from the parent if there
+    aren't any on the same level. The object index is the position of the top level child.
+    The walk uses an explicit stack, so deep assemblies don't hit the recursion limit.
+    """
+    # (node, coordinates, material, transform, print indentation, depth, object index)
+    stack = [(node, coordinates, material, transform, index, depth_counter, object_index)]
+    while stack:
+        node, coords, mat, trans, index, depth, object_index = stack.pop()
+        if print_tree:
+            print(str("   " * index) + str(type(node)))
+        if coin_node_kind(node) != "group":
+            continue
+        edge_face_set = None
+        children = []
+        position = -1
+        for position, child in enumerate(node):
+            try:
+                kind = COIN_NODE_KINDS[type(child)]
+            except KeyError:
+                kind = coin_node_kind(child)
+            if kind == "coordinates":
+                coords = child
+            elif kind == "transform":
+                trans = child
+            elif kind == "material":
+                mat = child
+            elif kind == "set":
+                edge_face_set = child
+            if kind == "group" or print_tree:
+                # the children of the root node are the objects
+                children.append((child, position if depth == 0 else object_index))
+        if edge_face_set is not None:
+            this_object_index = position if depth == 0 else object_index
+            yield (edge_face_set, coords, mat, this_object_index, trans)
+        # the material isn't inherited
+        stack.extend((child, coords, None, trans, index + 1, depth + 1, child_object_index)
+                     for child, child_object_index in reversed(children))
+
+class GeometryCache():
+    """
+    Least recently used cache of the geometry buffers of FreeCAD document objects.
+    
+    Entries are keyed by document and object name and are only valid for the stamp they
+    were stored with (see `object_stamp`), so a changed object replaces its old entry.
+    The least recently used entries are dropped as soon as all buffers together
+    take more than `max_bytes`.
+    """
+    def __init__(self, max_bytes: int=GEOMETRY_CACHE_BYTES):
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.max_bytes = max_bytes
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+    @max_bytes.setter
+    def max_bytes(self, value):
+        if isinstance(value, int) and value >= 0:
+            self._max_bytes = value
+            self._evict()
+        else:
+            raise TypeError("Must be int and >= 0.")
+    def get(self, key: Tuple[str, str], stamp: Any) -> Union[List[GeometryBuffers], None]:
+        """Returns the buffers stored for `key` if they were stored with `stamp`, otherwise `None`."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != stamp:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    def put(self, key: Tuple[str, str], stamp: Any, buffers: List[GeometryBuffers]) -> None:
+        """Stores the buffers for `key`, replacing what was stored before."""
+        self.discard(key)
+        nbytes = sum(obj_buffers.nbytes for obj_buffers in buffers)
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = (stamp, buffers, nbytes)
+        self.nbytes += nbytes
+        self._evict()
+    def discard(self, key: Tuple[str, str]) -> None:
+        """Removes the entry for `key` if there is one."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
+    def clear(self) -> None:
+        """Removes all entries and resets the statistics."""
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+    def keys(self) -> List[Tuple[str, str]]:
+        """Returns the keys of all entries from least to most recently used."""
+        return list(self._entries.keys())
+    def info(self) -> dict:
+        """Returns the number of entries, their size in bytes, the budget and the hit statistics."""
+        return dict(entries=len(self._entries), nbytes=self.nbytes, max_bytes=self.max_bytes,
+                    hits=self.hits, misses=self.misses)
+    def _evict(self):
+        while self.nbytes > self.max_bytes:
+            _, (_, _, nbytes) = self._entries.popitem(last=False)
+            self.nbytes -= nbytes
+    def __len__(self):
+        return len(self._entries)
+    def __contains__(self, key):
+        return key in self._entries
+
+GEOMETRY_CACHE = GeometryCache()
+
+class ChangeTracker():
+    """
+    Document observer numbering the changes of document objects, see `object_stamp`.
+
+    FreeCAD calls its slots for every created document and object and every changed property,
+    including the shape set by a recompute, and every call takes the next number of a counter.
+    Unlike the hash code of a shape, which is the address of its data and is reused by shapes
+    allocated later, a revision is never given twice. The revision of an object is at least
+    the one of its document, so documents opened again never match what was stored before.
+    `CHANGE_TRACKER` is registered when FreeCAD is available.
+    """
+    def __init__(self):
+        self.registered = False
+        self._counter = itertools.count(1)
+        self._documents = {} # document name -> revision of its creation
+        self._objects = {} # (document name, object name) -> revision of the last change
+    def register(self, app) -> None:
+        """Starts observing the documents of `app`, the FreeCAD module."""
+        app.addDocumentObserver(self)
+        self.registered = True
+    def revision(self, obj) -> int:
+        """Returns the revision of the last change of the document object, 0 before any was seen."""
+        document_name = obj.Document.Name
+        return max(self._documents.get(document_name, 0), self._objects.get((document_name, obj.Name), 0))
+    def touch(self, obj) -> None:
+        """Gives the document object a new revision."""
+        self._objects[(obj.Document.Name, obj.Name)] = next(self._counter)
+    def slotCreatedDocument(self, doc): # pylint: disable=invalid-name
+        self._documents[doc.Name] = next(self._counter)
+    def slotDeletedDocument(self, doc): # pylint: disable=invalid-name
+        self._objects = {key: revision for key, revision in self._objects.items() if key[0] != doc.Name}
+        self._documents[doc.Name] = next(self._counter)
+    def slotCreatedObject(self, obj): # pylint: disable=invalid-name
+        self.touch(obj)
+    def slotDeletedObject(self, obj): # pylint: disable=invalid-name
+        self.touch(obj)
+    def slotChangedObject(self, obj, prop): # pylint: disable=invalid-name,unused-argument
+        self.touch(obj)
+
+CHANGE_TRACKER = ChangeTracker()
+if FreeCAD is not None:
+    CHANGE_TRACKER.register(FreeCAD)
+
+# TODO : Add typing after finding out how to reference the document class
+def object_stamp(obj, tracker: ChangeTracker=CHANGE_TRACKER) -> Union[Tuple, None]:
+    """
+    Returns a value that changes whenever the scene graph of the document object changes: the
+    latest revision (see `ChangeTracker`) of the object and of the objects it depends on, like
+    the target of a link, and the view properties in `VIEW_STAMP_PROPERTIES`. Objects without
+    a shape, like meshes, links and the planes of an origin, are stamped the same way.
+    Returns `None` if the tracker isn't registered, then objects can't be cached.
+    """
+    if not tracker.registered:
+        return None
+    dependencies = getattr(obj, "OutListRecursive", [])
+    revision = max([tracker.revision(obj)] + [tracker.revision(dependency) for dependency in dependencies])
+    view_object = getattr(obj, "ViewObject", None)
+    view_state = tuple(repr(getattr(view_object, name, None)) for name in VIEW_STAMP_PROPERTIES)
+    return revision, view_state
+
+# TODO : Add typing after finding out how to reference the document class
+def objects_to_buffers(objects: List[Any], cache: Union[GeometryCache, None]=None,
+                       workers: int=1, stats: Union[RenderStats, None]=None) -> List[List[GeometryBuffers]]:
+    """
+    Returns the geometry buffers of each of the given document objects. They are taken from
+    `cache` if the object didn't change since they were stored, otherwise they are converted
+    from the object's scene graph and stored in `cache`. Scene graphs are read in this thread,
+    the buffers are computed by `workers` threads.
+    """
+    results = []
+    pending = [] # (position in results, cache key, stamp, snapshots) of objects to convert
+    for obj in objects:
+        stamp = object_stamp(obj) if cache is not None else None
+        key = (obj.Document.Name, obj.Name)
+        buffers = cache.get(key, stamp) if stamp is not None else None
+        if buffers is None:
+            root = coin.SoSeparator()
+            with timed_stage(stats, "subgraph"):
+                root.addChild(FreeCADGui.subgraphFromObject(obj))
+            pending.append((len(results), key, stamp, scene_snapshots(root, stats)))
+        results.append(buffers)
+
+    converted = convert_snapshots([snapshot for *_, snapshots in pending for snapshot in snapshots], workers,
+                                  stats)
+    start = 0
+    for position, key, stamp, snapshots in pending:
+        buffers = converted[start:start + len(snapshots)]
+        start += len(snapshots)
+        results[position] = buffers
+        if stamp is not None:
+            cache.put(key, stamp, buffers)
+    return results
+
+# TODO : Add typing after finding out how to reference the document class
+def object_buffers(obj, cache: Union[GeometryCache, None]=None) -> List[GeometryBuffers]:
+    """
+    Returns the geometry buffers of a single document object, see `objects_to_buffers`.
+    """
+    return objects_to_buffers([obj], cache)[0]
+
+# TODO : Add typing after finding out how to reference the document class
+def document_to_buffers(doc, cache: Union[GeometryCache, None]=GEOMETRY_CACHE, workers: int=1,
+                        stats: Union[RenderStats, None]=None) -> Tuple[List[GeometryBuffers], List[str]]:
+    """
+    Convert a FreeCAD document to geometry buffers and retain a list of object names.
+    Objects that didn't change since they were last converted are taken from `cache`,
+    pass `None` to convert all of them. See `objects_to_buffers` for `workers`.
+    """
+    objects = list(doc.Objects)
+    buffers = []
+    for object_index, obj_buffers in enumerate(objects_to_buffers(objects, cache, workers, stats)):
+        buffers.extend(geometry._replace(object_index=object_index) for geometry in obj_buffers)
+    return buffers, [obj.Name for obj in objects]
+
+def disk_cache_path(path: str) -> str:
+    """Returns the path of the geometry cache next to the .FCStd file at `path`."""
+    return path + DISK_CACHE_SUFFIX
+
+def file_stamp(path: str) -> dict:
+    """Returns size and modification time of the file, they change whenever it is saved."""
+    stat = os.stat(path)
+    return dict(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+def _align(offset: int) -> int:
+    return -(-offset // DISK_CACHE_ALIGNMENT) * DISK_CACHE_ALIGNMENT
+
+def write_geometry_cache(path: str, buffers: List[GeometryBuffers], names: List[str], document_stamp: dict) -> None:
+    """
+    Writes the geometry buffers and object names into a binary file at `path` that
+    `read_geometry_cache` maps into memory without copying.
+    
+    The file starts with `DISK_CACHE_MAGIC`, the length of a JSON header as little endian
+    uint64 and the header itself, describing the document stamp, names, the scalar values of
+    the buffers and offset, dtype and shape of their arrays. The arrays follow, each aligned
+    to `DISK_CACHE_ALIGNMENT` bytes.
+    """
+    objects = []
+    arrays = []
+    offset = 0
+    for obj_buffers in buffers:
+        entry = dict(color=[float(x) for x in obj_buffers.color],
+                     transparency=float(obj_buffers.transparency),
+                     translation=[float(x) for x in obj_buffers.translation] if obj_buffers.translation else None,
+                     quaternion=[float(x) for x in obj_buffers.quaternion] if obj_buffers.quaternion else None,
+                     is_line=bool(obj_buffers.is_line),
+                     object_index=int(obj_buffers.object_index),
+                     arrays={})
+        for field in GEOMETRY_ARRAY_FIELDS:
+            array = np.ascontiguousarray(getattr(obj_buffers, field))
+            entry["arrays"][field] = [offset, array.dtype.str, list(array.shape)]
+            arrays.append((offset, array))
+            offset = _align(offset + array.nbytes)
+        objects.append(entry)
+    header = json.dumps(dict(version=DISK_CACHE_VERSION, document=document_stamp,
+                             names=list(names), objects=objects)).encode("utf-8")
+    data_start = _align(len(DISK_CACHE_MAGIC) + 8 + len(header))
+
+    # write to a temporary file first, so readers never see a partially written cache
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as cache_file:
+        cache_file.write(DISK_CACHE_MAGIC)
+        cache_file.write(struct.pack("<Q", len(header)))
+        cache_file.write(header)
+        for array_offset, array in arrays:
+            cache_file.seek(data_start + array_offset)
+            array.tofile(cache_file)
+        cache_file.truncate(data_start + offset)
+    os.replace(temp_path, path)
+
+def read_geometry_cache(path: str) -> Tuple[List[GeometryBuffers], List[str], dict]:
+    """
+    Returns the geometry buffers, object names and header written by `write_geometry_cache`.
+    The arrays of the buffers are read only views into the memory mapped file.
+    """
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    magic_length = len(DISK_CACHE_MAGIC)
+    if bytes(raw[:magic_length]) != DISK_CACHE_MAGIC:
+        raise Exception("Not a geometry cache file: {}".format(path))
+    header_length = struct.unpack("<Q", bytes(raw[magic_length:magic_length + 8]))[0]
+    header = json.loads(bytes(raw[magic_length + 8:magic_length + 8 + header_length]).decode("utf-8"))
+    data_start = _align(magic_length + 8 + header_length)
+
+    buffers = []
+    for entry in header["objects"]:
+        arrays = {}
+        for field, (offset, dtype, shape) in entry["arrays"].items():
+            # plain ndarrays on the mapped memory, pythreejs traits don't accept np.memmap instances
+            count = int(np.prod(shape, dtype=np.int64))
+            arrays[field] = np.frombuffer(raw, dtype, count, data_start + offset).reshape(shape)
+        translation = tuple(entry["translation"]) if entry["translation"] is not None else None
+        quaternion = tuple(entry["quaternion"]) if entry["quaternion"] is not None else None
+        buffers.append(GeometryBuffers(color=tuple(entry["color"]), transparency=entry["transparency"],
+                                       translation=translation, quaternion=quaternion,
+                                       is_line=entry["is_line"], object_index=entry["object_index"], **arrays))
+    return buffers, header["names"], header
+
+def load_document_cache(path: str) -> Union[Tuple[List[GeometryBuffers], List[str]], None]:
+    """
+    Returns the geometry buffers and object names cached next to the .FCStd file at `path`,
+    or `None` if there is no cache or the file was saved since it was written.
+    """
+    cache_file = disk_cache_path(path)
+    if not os.path.isfile(cache_file):
+        return None
+    try:
+        buffers, names, header = read_geometry_cache(cache_file)
+    except Exception: # pylint: disable=broad-except
+        return None
+    if header.get("version") != DISK_CACHE_VERSION or header.get("document") != file_stamp(path):
+        return None
+    return buffers, names
+
+# TODO : Add typing after finding out how to reference the document class
+def document_modified(doc) -> bool:
+    """
+    Returns whether the FreeCAD document has changes that aren't in its file: objects touched
+    since the last recompute or, with a GUI, modifications since the last save.
+    """
+    if doc.isTouched():
+        return True
+    get_document = getattr(FreeCADGui, "getDocument", None)
+    gui_document = get_document(doc.Name) if get_document is not None else None
+    return bool(getattr(gui_document, "Modified", False))
+
+# TODO : Add typing after finding out how to reference the document class
+def save_document_cache(doc, cache: Union[GeometryCache, None]=GEOMETRY_CACHE, workers: int=1) -> str:
+    """
+    Writes the geometry of the saved FreeCAD document next to its .FCStd file and returns
+    the path of the cache. The cache is stamped with the file, so documents with unsaved changes
+    (see `document_modified`) are refused, their geometry doesn't match the file.
+    """
+    if not doc.FileName:
+        raise Exception("Document `{}` has to be saved before caching its geometry.".format(doc.Name))
+    if document_modified(doc):
+        raise Exception("Document `{}` has unsaved changes, save it before caching its geometry.".format(doc.Name))
+    buffers, names = document_to_buffers(doc, cache, workers)
+    path = disk_cache_path(doc.FileName)
+    write_geometry_cache(path, buffers, names, file_stamp(doc.FileName))
+    return path
+
+def saved_view_properties(path: str) -> dict:
+    """
+    Returns the `ShapeColor` and `LineColor` (rgb tuples) and `Transparency` (0 to 1) saved in
+    the GuiDocument.xml of the .FCStd file at `path` by object name. Files saved by FreeCAD
+    without a GUI have none. The colors of single faces (`DiffuseColor`) aren't read.
+    """
+    with zipfile.ZipFile(path) as archive:
+        if "GuiDocument.xml" not in archive.namelist():
+            return {}
+        root = ElementTree.fromstring(archive.read("GuiDocument.xml"))
+    properties = {}
+    for view_provider in root.iter("ViewProvider"):
+        values = {}
+        for prop in view_provider.iter("Property"):
+            name = prop.get("name")
+            color = prop.find("PropertyColor")
+            percent = prop.find("Integer")
+            if name in ("ShapeColor", "LineColor") and color is not None:
+                # packed as 0xRRGGBBAA
+                packed = int(color.get("value"))
+                values[name] = tuple(((packed >> shift) & 0xFF) / 255 for shift in (24, 16, 8))
+            elif name == "Transparency" and percent is not None:
+                values[name] = int(percent.get("value")) / 100
+        properties[view_provider.get("name")] = values
+    return properties
+
+def apply_view_properties(buffers: List[GeometryBuffers], names: List[str],
+                          properties: dict) -> List[GeometryBuffers]:
+    """
+    Returns the geometry buffers with the values of `saved_view_properties`: face sets get the
+    `ShapeColor` and `Transparency` of their object, line sets its `LineColor`.
+    """
+    result = []
+    for obj_buffers in buffers:
+        values = properties.get(names[obj_buffers.object_index], {})
+        if obj_buffers.is_line:
+            fields = dict(color="LineColor")
+        else:
+            fields = dict(color="ShapeColor", transparency="Transparency")
+        result.append(obj_buffers._replace(**{field: values[name] for field, name in fields.items()
+                                              if name in values}))
+    return result
+
+def file_to_buffers(path: str, workers: int=1) -> Tuple[List[GeometryBuffers], List[str]]:
+    """
+    Returns the geometry buffers and object names of the .FCStd file at `path`. They are read
+    from the cache next to the file if it is up to date, which works without FreeCAD.
+    Otherwise the document is converted with FreeCAD and the cache is written.
+
+    `FreeCADGui.subgraphFromObject` builds the scene graphs with new view providers, which
+    have the default colors, and headless processes have no view providers of the document
+    either. So the colors saved in the file are applied, see `apply_view_properties`.
+    """
+    cached = load_document_cache(path)
+    if cached is not None:
+        return cached
+    if FreeCADGui is None:
+        raise Exception("FreeCAD is needed to convert `{}`, its geometry cache is missing or outdated."
+                        .format(path))
+    open_docs = [doc for doc in FreeCAD.listDocuments().values()
+                 if os.path.abspath(doc.FileName) == os.path.abspath(path)]
+    doc = open_docs[0] if open_docs else FreeCAD.openDocument(path)
+    try:
+        buffers, names = document_to_buffers(doc, None, workers)
+    finally:
+        if not open_docs:
+            FreeCAD.closeDocument(doc.Name)
+    buffers = apply_view_properties(buffers, names, saved_view_properties(path))
+    write_geometry_cache(disk_cache_path(path), buffers, names, file_stamp(path))
+    return buffers, names
+
+class GLTFBuilder():
+    """
+    Collects the JSON description and the binary buffer of a glTF 2.0 asset, see `buffers_to_gltf`.
+    """
+    def __init__(self):
+        self.gltf = dict(asset=dict(version="2.0", generator="IPythonFreeCADViewer"),
+                         scene=0, scenes=[dict(nodes=[])], nodes=[], meshes=[], materials=[],
+                         accessors=[], bufferViews=[], buffers=[])
+        self.chunks = []
+        self.byte_length = 0
+        self._materials = {}
+
+    def add_buffer_view(self, array: np.ndarray, target: int) -> int:
+        """
+        Appends the array to the binary buffer and returns the index of its buffer view.
+        Vertex attribute views get the row size as `byteStride`, which glTF requires
+        when several accessors share the view.
+        """
+        data = np.ascontiguousarray(array).tobytes()
+        # every buffer view starts 4 byte aligned, as needed by all accessor component types
+        padding = -self.byte_length % 4
+        self.chunks.append(b"\0" * padding + data)
+        self.byte_length += padding
+        buffer_view = dict(buffer=0, byteOffset=self.byte_length, byteLength=len(data), target=target)
+        if target == GLTF_ARRAY_BUFFER:
+            buffer_view["byteStride"] = array[:1].nbytes
+        self.gltf["bufferViews"].append(buffer_view)
+        self.byte_length += len(data)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def add_accessor(self, buffer_view: int, array: np.ndarray, start: int=0, stop: Union[int, None]=None,
+                     accessor_type: str="VEC3", bounds: bool=False) -> int:
+        """
+        Returns the index of a new accessor for the rows `start:stop` of the array
+        stored in the given buffer view. `bounds` adds min and max, as required for positions.
+        """
+        start, stop = int(start), len(array) if stop is None else int(stop)
+        row = array[:1]
+        components = 3 if accessor_type == "VEC3" else 1
+        accessor = dict(bufferView=buffer_view, byteOffset=start * row.nbytes,
+                        componentType=GLTF_COMPONENT_TYPES[str(array.dtype)],
+                        count=(stop - start) * row.size // components, type=accessor_type)
+        if bounds:
+            accessor["min"] = array[start:stop].min(axis=0).tolist()
+            accessor["max"] = array[start:stop].max(axis=0).tolist()
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def material(self, color: SoVectorType, transparency: float) -> int:
+        """Returns the index of the material with the given color, shared by all meshes using it."""
+        key = (tuple(float(x) for x in color), float(transparency))
+        if key not in self._materials:
+            material = dict(pbrMetallicRoughness=dict(baseColorFactor=list(key[0]) + [1 - key[1]],
+                                                      metallicFactor=0.0, roughnessFactor=0.8),
+                            doubleSided=True)
+            if key[1] > 0:
+                material["alphaMode"] = "BLEND"
+            self.gltf["materials"].append(material)
+            self._materials[key] = len(self.gltf["materials"]) - 1
+        return self._materials[key]
+
+    def to_glb(self) -> bytes:
+        """Returns the asset as binary glTF."""
+        binary = b"".join(self.chunks)
+        binary += b"\0" * (-len(binary) % 4)
+        gltf = dict(self.gltf, buffers=[dict(byteLength=len(binary))] if binary else [])
+        if not gltf["scenes"][0]["nodes"]:
+            gltf["scenes"] = [{}]
+        # glTF doesn't allow empty arrays
+        gltf = {key: value for key, value in gltf.items() if value != []}
+        json_chunk = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        json_chunk += b" " * (-len(json_chunk) % 4)
+        chunks = struct.pack("<II", len(json_chunk), GLB_JSON_CHUNK) + json_chunk
+        if binary:
+            chunks += struct.pack("<II", len(binary), GLB_BIN_CHUNK) + binary
+        return struct.pack("<III", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+def unit_normals(normals: np.ndarray, vertices: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """
+    Returns the vertex normals scaled to unit length, as glTF requires. Vertices without a normal
+    get the normal of the faces they belong to, vertices of degenerate faces only the z axis.
+    """
+    normals = np.asarray(normals, dtype='float64').reshape(-1, 3)
+    lengths = np.linalg.norm(normals, axis=1)
+    missing = lengths == 0
+    if missing.any():
+        corners = vertices[faces].astype('float64')
+        face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        fallback = np.zeros_like(normals)
+        for corner in range(3):
+            np.add.at(fallback, faces[:, corner], face_normals)
+        normals[missing] = fallback[missing]
+        lengths = np.linalg.norm(normals, axis=1)
+        missing = lengths == 0
+        normals[missing] = (0, 0, 1)
+        lengths[missing] = 1
+    return (normals / lengths[:, None]).astype('float32')
+
+def buffers_to_gltf(buffers: List[GeometryBuffers], names: List[str]) -> GLTFBuilder:
+    """
+    Returns a `GLTFBuilder` holding the given geometry buffers as glTF 2.0 asset, without
+    creating any widgets.
+
+    Every FreeCAD object becomes a node named after it, with one child node per face and
+    line set carrying its placement. The triangles of every shape face form a primitive
+    sharing the vertices of the face set, named `FaceN` in its `extras` (see `partIndex`),
+    the same goes for the line segments of every edge, named `EdgeN`. Triangles after the
+    last shape face form a last primitive without a name.
+    """
+    builder = GLTFBuilder()
+    object_nodes = {}
+    for obj_buffers in buffers:
+        if obj_buffers.object_index not in object_nodes:
+            builder.gltf["nodes"].append(dict(name=names[obj_buffers.object_index], children=[]))
+            object_nodes[obj_buffers.object_index] = len(builder.gltf["nodes"]) - 1
+            builder.gltf["scenes"][0]["nodes"].append(object_nodes[obj_buffers.object_index])
+        material = builder.material(obj_buffers.color, obj_buffers.transparency)
+        primitives = []
+        if obj_buffers.is_line and len(obj_buffers.vertices):
+            vertices = np.asarray(obj_buffers.vertices, dtype='float32').reshape(-1, 3)
+            positions = builder.add_buffer_view(vertices, GLTF_ARRAY_BUFFER)
+            offsets = obj_buffers.edge_offsets
+            for edge_index, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:]), 1):
+                if stop > start:
+                    position = builder.add_accessor(positions, vertices, start, stop, bounds=True)
+                    primitives.append(dict(attributes=dict(POSITION=position), material=material,
+                                           mode=GLTF_MODE_LINES, extras=dict(name="Edge{}".format(edge_index))))
+        elif not obj_buffers.is_line and len(obj_buffers.faces):
+            vertices = np.asarray(obj_buffers.vertices, dtype='float32')
+            faces = np.asarray(obj_buffers.faces).astype(index_dtype(len(vertices)))
+            position = builder.add_accessor(builder.add_buffer_view(vertices, GLTF_ARRAY_BUFFER),
+                                            vertices, bounds=True)
+            normals = unit_normals(obj_buffers.normals, vertices, faces)
+            normal = builder.add_accessor(builder.add_buffer_view(normals, GLTF_ARRAY_BUFFER), normals)
+            indices = builder.add_buffer_view(faces, GLTF_ELEMENT_ARRAY_BUFFER)
+            part_index = obj_buffers.part_index if len(obj_buffers.part_index) else [len(faces)]
+            # like `mesh_chunk_ranges`, a part index may cover fewer or more triangles than there are
+            triangle_ends = np.minimum(np.cumsum(part_index), len(faces))
+            ranges = list(zip(np.concatenate([[0], triangle_ends[:-1]]), triangle_ends))
+            ranges.append((triangle_ends[-1], len(faces)))
+            for face_index, (start, stop) in enumerate(ranges, 1):
+                if stop > start:
+                    index = builder.add_accessor(indices, faces, start, stop, accessor_type="SCALAR")
+                    primitive = dict(attributes=dict(POSITION=position, NORMAL=normal), indices=index,
+                                     material=material, mode=GLTF_MODE_TRIANGLES)
+                    if face_index <= len(part_index):
+                        primitive["extras"] = dict(name="Face{}".format(face_index))
+                    primitives.append(primitive)
+        if not primitives:
+            continue
+        builder.gltf["meshes"].append(dict(primitives=primitives))
+        node = dict(name="{} {}".format(names[obj_buffers.object_index], "edges" if obj_buffers.is_line else "faces"),
+                    mesh=len(builder.gltf["meshes"]) - 1)
+        if obj_buffers.translation:
+            node["translation"] = [float(x) for x in obj_buffers.translation]
+        if obj_buffers.quaternion:
+            node["rotation"] = [float(x) for x in obj_buffers.quaternion]
+        builder.gltf["nodes"].append(node)
+        builder.gltf["nodes"][object_nodes[obj_buffers.object_index]]["children"].append(len(builder.gltf["nodes"]) - 1)
+    for node in builder.gltf["nodes"]:
+        if "children" in node and not node["children"]:
+            del node["children"]
+    return builder
+
+def write_glb(path: str, buffers: List[GeometryBuffers], names: List[str]) -> None:
+    """Writes the geometry buffers as binary glTF file, see `buffers_to_gltf`."""
+    glb = buffers_to_gltf(buffers, names).to_glb()
+    with open(path, "wb") as glb_file:
+        glb_file.write(glb)
+
+# TODO : Add typing after finding out how to reference the document class
+def export_document_glb(doc, path: str, cache: Union[GeometryCache, None]=GEOMETRY_CACHE, workers: int=1) -> None:
+    """Writes the visible objects of the FreeCAD document as binary glTF file at `path`."""
+    buffers, names = document_to_buffers(doc, cache, workers)
+    write_glb(path, buffers, names)
+
+def export_file_glb(path: str, glb_path: Union[str, None]=None, workers: int=1) -> str:
+    """
+    Writes the .FCStd file at `path` as binary glTF file and returns its path, which defaults
+    to the .FCStd path with the extension replaced by .glb. Works without FreeCAD if the file
+    has an up to date geometry cache, see `file_to_buffers`.
+    """
+    if glb_path is None:
+        glb_path = os.path.splitext(path)[0] + ".glb"
+    buffers, names = file_to_buffers(path, workers)
+    write_glb(glb_path, buffers, names)
+    return glb_path
@@ -30,32 +30,65 @@ do this is `render_document`.
 #*   Marcus Ding 2020                                                      *
 #***************************************************************************/
 
-import FreeCADGui
+from __future__ import annotations
+
 from pythreejs import Mesh, Sphere, BufferGeometry, BufferAttribute, MeshPhongMaterial,\
                       LineBasicMaterial, Line, LineSegments, EdgesGeometry, Group, Scene,\
                       Picker, VertexNormalsHelper, PointLight, AmbientLight, PerspectiveCamera,\
-                      MeshLambertMaterial, OrbitControls, Renderer
-from pivy import coin
+                      MeshLambertMaterial, MeshBasicMaterial, OrbitControls, Renderer
 import numpy as np
-from ipywidgets import HTML
+from ipywidgets import HTML, Widget, IntProgress
 from IPython.display import display, DisplayHandle
 
-from typing import Union, List, Tuple
+try:
+    import FreeCADGui
+except ImportError:
+    # without FreeCAD only geometry from disk caches can be rendered, see `get_file_renderer`
+    FreeCADGui = None
+try:
+    from pivy import coin
+except ImportError:
+    coin = None
+
+# the widget independent part, also re-exported from here
+from freecadgeometry import SoVectorType, SoQuaternionType, SoCoinTupleType, SoCoordValsArrayType,\
+                            SoIndicesArrayType, MAX_UINT16_VERTICES, GEOMETRY_ARRAY_FIELDS, GeometryBuffers,\
+                            RenderStats, GeometryCache, ChangeTracker, GEOMETRY_CACHE, CHANGE_TRACKER,\
+                            timed_stage, generate_line_segments, compute_normals, geometry_buffers,\
+                            scene_buffers, index_dtype, object_stamp, objects_to_buffers, object_buffers,\
+                            document_to_buffers, load_document_cache, save_document_cache, file_to_buffers,\
+                            buffers_to_gltf, write_glb, export_document_glb, export_file_glb
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Union, List, Tuple, NamedTuple, Any, Iterator, Callable
 
 HIGHLIGHTING_COLOR = (0,1,0)
 LINE_WIDTH = 2
 PICKER_VALID_MODES = ["mousemove", "click", "dblclick"]
+HIGHLIGHT_MODES = ["vertex_colors", "overlay"]
+# a LOD level is shown from this many bounding box diagonals away, each further level from twice the distance
+LOD_DISTANCE_FACTOR = 3
+LOD_MIN_TRIANGLES = 100
+LOD_SEARCH_STEPS = 8
+STREAM_ORDERS = ["largest", "nearest", "document"]
+# a streamed batch ends after the first object exceeding this many seconds, then the kernel is free again
+STREAM_BATCH_SECONDS = 0.2
+# primitives per leaf of a bounding volume hierarchy, see `build_bvh`
+BVH_LEAF_SIZE = 8
+# precisions of quantized positions, each fills its integer type, see `quantize_positions`
+QUANTIZE_BITS = (8, 16)
+PROXY_COLOR = (0.75, 0.75, 0.75)
+PROXY_MIN_SIZE = 1e-3 # extent of proxies of flat objects, so they can be picked
 
 # types:
 
-SoVectorType = Tuple[float, float, float]
-SoQuaternionType = Tuple[float, float, float, float]
-SoCoinTupleType = Tuple[coin.SoIndexedFaceSet, coin.SoCoordinate3, coin.SoMaterial, int, coin.SoTransform]
 ThreeJSSceneGraphObjectType = Union[Mesh, Line, Sphere]
 ThreeJSSceneGraphObjectListType = List[ThreeJSSceneGraphObjectType]
 PartIndicesType = List[List[int]]
-SoCoordValsListType = List[SoVectorType]
-SoIndicesListType = List[List[int]]
+FaceLookupType = Tuple[np.ndarray, np.ndarray, np.ndarray]
 
 def so_col_to_hex(so_color: tuple) -> str:
     """
@@ -71,139 +104,223 @@ def so_col_to_hex(so_color: tuple) -> str:
                                               color[2])
     return hex_col
 
-def transform_indices(so_node: Union[coin.SoIndexedFaceSet, coin.SoIndexedLineSet]) ->  SoIndicesListType:
+def create_geometry(res_tuple: SoCoinTupleType,
+                    name: str="", show_faces: bool=True, show_edges: bool=True,
+                    part_index: Union[np.ndarray, None]=None,
+                    uint32_indices: bool=True) -> ThreeJSSceneGraphObjectListType:
+    """Returns PyThreeJS representations of the given Coin3D object tuples."""
+    buffers = geometry_buffers(res_tuple)
+    if part_index is not None:
+        buffers = buffers._replace(part_index=np.asarray(part_index))
+    return create_geometry_from_buffers(buffers, name, show_faces, show_edges, uint32_indices)
+
+def create_geometry_from_buffers(buffers: GeometryBuffers,
+                                 name: str="", show_faces: bool=True, show_edges: bool=True,
+                                 uint32_indices: bool=True,
+                                 quantize_bits: Union[int, None]=None) -> ThreeJSSceneGraphObjectListType:
     """
-    Returns list of lists that represent indices from pivy.coin
-    scene objects 'SoIndexedLineSet' and 'SoIndexedFaceSet'.
-    When ever a -1 is encountered in `so_node.coordIndex` a separate new Line or Face
-    is created
+    Returns PyThreeJS representations of the given geometry buffers.
+    See `quantize_positions` for `quantize_bits`.
     """
-    faces_lines = list(so_node.coordIndex)
-    indices = []
-    curr_line: List[int] = []
-    for i in faces_lines:
-        if i == -1:
-            indices.append(curr_line)
-            curr_line = []
-            continue
-        curr_line.append(i)
-    return indices
+    if buffers.is_line and show_edges:
+        # geometry based on coin.IndexedLineSet
+        geoms = create_line_segments(buffers.vertices, buffers.edge_ids, buffers.edge_offsets,
+                                     buffers.color, buffers.translation, buffers.quaternion, quantize_bits)
+    elif not buffers.is_line and show_faces:
+        # geometry based on coin.IndexedFaceSet
+        geoms = create_face_geom(buffers.vertices, buffers.faces, buffers.color, buffers.transparency,
+                                 buffers.translation, buffers.quaternion, part_index=buffers.part_index,
+                                 uint32_indices=uint32_indices, normals=buffers.normals,
+                                 quantize_bits=quantize_bits)
+    else:
+        return []
+    if name:
+        for obj in geoms:
+            obj.freecad_name = name
+    return geoms
 
-def generate_line_vertices(line_indices: List[int], coord_vals: SoCoordValsListType) -> SoCoordValsListType:
+def quantize_positions(vertices: np.ndarray, bits: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Replaces indices in list with the corresponding coordinate values
+    Returns the (N, 3) vertices as integers on a grid of `2**bits - 2` steps per axis across
+    their bounding box (int8 for 8 bits, int16 for 16 bits), together with the offset and scale of
+    the object transform that turns them back into `vertices`, i.e. `offset + quantized * scale`.
+    The error is at most half a step.
+
+    The integers are sent as not normalized attributes, so the GPU and the raycasting of the
+    picker both use them as they are and the dequantization is left to the object transform.
     """
-    line_vertices = []
-    for i in line_indices:
-        line_vertices.append(coord_vals[i])
-        line_vertices.append(coord_vals[i])
-    return line_vertices
+    vertices = np.asarray(vertices, dtype='float64').reshape(-1, 3)
+    if len(vertices) == 0:
+        return np.zeros((0, 3), dtype='int16'), np.zeros(3), np.ones(3)
+    lower = vertices.min(axis=0)
+    upper = vertices.max(axis=0)
+    offset = (lower + upper) / 2
+    levels = 2**(bits - 1) - 1
+    scale = (upper - lower) / 2 / levels
+    # flat boxes keep a scale of 1, a zero scale would make the transform singular
+    scale[scale == 0] = 1
+    quantized = np.round((vertices - offset) / scale).astype('int8' if bits <= 8 else 'int16')
+    return quantized, offset, scale
 
-def extract_values(res_tuple: SoCoinTupleType)\
-    -> Tuple[SoCoordValsListType, SoIndicesListType, SoQuaternionType, SoVectorType, SoVectorType, int, bool]:
+def quantize_normals(normals: np.ndarray, scale: np.ndarray) -> np.ndarray:
     """
-    Given the Coin3D scene graph object tuple the function will return the information
-    (coordinates, indices etc.) in an more basic python type as in the typing specification.
+    Returns the normals as normalized int8 attribute values for an object scaled by `scale`.
+    The normals are pre-multiplied with the scale, its inverse is applied by the normal matrix.
+
+    These are three bytes per normal, not a two byte octahedral encoding: the built-in materials
+    of pythreejs read xyz normals and cannot be given the shader that would decode one.
     """
-    so_face_line = res_tuple[0] 
-    so_coord = res_tuple[1]
-    so_shaded_material = res_tuple[2]
-    
-    coords = list(so_coord.point)
-    so_shaded_color = so_shaded_material.diffuseColor.getValues()[0]
-    so_shaded_emissive_color = so_shaded_material.emissiveColor.getValues()[0]
-    color = (so_shaded_color[0], so_shaded_color[1], so_shaded_color[2])
-    emissive_color = (so_shaded_color[0], so_shaded_color[1], so_shaded_color[2])
-    transparency = so_shaded_material.transparency[0]
-    
-    coord_vals = [tuple(x) for x in coords]
-    indices = transform_indices(so_face_line)
- 
-    is_line = False
-    if isinstance(so_face_line, coin.SoIndexedLineSet):
-        is_line = True
-    else:
-        if not isinstance(so_face_line, coin.SoIndexedFaceSet):
-            raise Exception("Unsupported type of given node: {}".format(type(so_face_line)))
-    
-    so_transform = res_tuple[4]
-    translation = tuple(so_transform.translation.getValue())
-    quaternions = tuple(so_transform.rotation.getValue().getValue())
+    normals = np.asarray(normals, dtype='float64').reshape(-1, 3) * scale
+    lengths = np.linalg.norm(normals, axis=1)[:, None]
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    return np.round(normals * 127).astype('int8')
 
-    return coord_vals, indices, quaternions, translation, color, transparency, is_line
+def place_object(obj: ThreeJSSceneGraphObjectType,
+                 translation: SoVectorType=None,
+                 quaternion: SoQuaternionType=None) -> None:
+    """
+    Sets the transform of the pythreejs object, after the offset of quantized positions
+    (`quantization_offset`, see `quantize_positions`) if it has one.
+    """
+    position = getattr(obj, "quantization_offset", None)
+    if position is not None and quaternion:
+        position = rotate_vector(quaternion, position)
+    if translation:
+        position = np.asarray(translation, dtype='float64') + (0 if position is None else position)
+    if position is not None:
+        obj.position = tuple(float(x) for x in position)
+    if quaternion:
+        obj.quaternion = quaternion
 
-def compute_normals(faces: List[Tuple[int, int, int]], vertices: List[SoVectorType]) -> np.array:
+def mesh_chunk_ranges(faces: np.ndarray,
+                      part_index: Union[np.ndarray, None]=None,
+                      max_vertices: int=MAX_UINT16_VERTICES) -> List[Tuple[int, int]]:
     """
-    Returns a list of normals for
-    each vertex.
+    Returns (start, end) triangle ranges that split `faces` into chunks referencing
+    at most `max_vertices` vertices each.
     
-    Input for N faces
-    should be numpy array of shape (N, 3)
-    and for M vertices shape (M, 3) respectively
-    """
-    normals = np.zeros((len(vertices), 3), dtype='float32')
-    for face in faces:
-        v_index_a = face[0]
-        v_index_b = face[1]
-        v_index_c = face[2]
-        vec_a = vertices[v_index_a]
-        vec_b = vertices[v_index_b]
-        vec_c = vertices[v_index_c]
-        vec_a_b = np.subtract(vec_b, vec_a)
-        vec_a_c = np.subtract(vec_c, vec_a)
-        dot_p = np.cross(vec_a_b, vec_a_c)
-        for i in [v_index_a, v_index_b, v_index_c]:
-            np.add(normals[i], dot_p, normals[i])
-    return normals
-
-def create_geometry(res_tuple: SoCoinTupleType,
-                    name: str="", show_faces: bool=True, show_edges: bool=True) -> ThreeJSSceneGraphObjectListType:
-    """Returns PyThreeJS representations of the given Coin3D object tuples."""
-    coord_vals, indices, quaternion, translation, color, transparency, is_line = extract_values(res_tuple)
-    if is_line and show_edges:
-        # geometry based on coin.IndexedLineSet
-        geoms = create_line_geom(coord_vals, indices, color, translation, quaternion)
-    elif not is_line and show_faces:
-        # geometry based on coin.IndexedFaceSet
-        geoms = create_face_geom(coord_vals, indices, color, transparency, translation, quaternion)
-    else:
+    Chunks are cut at the shape face boundaries given by `part_index`, so a FreeCAD face
+    stays inside one chunk unless it alone references too many vertices.
+    """
+    faces = np.asarray(faces).reshape(-1, 3)
+    num_faces = len(faces)
+    if num_faces == 0:
         return []
-    if name:
-        for obj in geoms:
-            obj.freecad_name = name
-    return geoms
+    if part_index is None:
+        part_index = [num_faces]
+    face_ends = np.minimum(np.cumsum(part_index), num_faces).tolist()
+    face_ends.append(num_faces)
+
+    # group whole shape faces into pieces that always fit into a chunk on their own
+    max_triangles = max_vertices // 3
+    pieces = []
+    piece_start = face_start = 0
+    for face_end in face_ends:
+        if face_end - piece_start > max_triangles:
+            if face_start > piece_start:
+                pieces.append((piece_start, face_start))
+                piece_start = face_start
+            while face_end - piece_start > max_triangles:
+                pieces.append((piece_start, piece_start + max_triangles))
+                piece_start += max_triangles
+        face_start = face_end
+    if piece_start < num_faces:
+        pieces.append((piece_start, num_faces))
+
+    # then fill every chunk with pieces as long as their vertices fit
+    ranges = []
+    seen = np.zeros(int(faces.max()) + 1, dtype=bool)
+    chunk_start = 0
+    chunk_vertices = 0
+    for piece_start, piece_end in pieces:
+        piece_vertices = np.unique(faces[piece_start:piece_end])
+        new_vertices = piece_vertices[~seen[piece_vertices]]
+        if chunk_vertices + len(new_vertices) > max_vertices:
+            ranges.append((chunk_start, piece_start))
+            seen[faces[chunk_start:piece_start].ravel()] = False
+            chunk_start = piece_start
+            chunk_vertices = 0
+            new_vertices = piece_vertices
+        seen[new_vertices] = True
+        chunk_vertices += len(new_vertices)
+    ranges.append((chunk_start, num_faces))
+    return ranges
 
-def create_face_geom(coord_vals: SoCoordValsListType,
-                     face_indices: SoIndicesListType, 
+def create_face_geom(coord_vals: SoCoordValsArrayType,
+                     face_indices: SoIndicesArrayType, 
                      face_color: SoVectorType,
                      transparency: float,
                      translation: SoVectorType=None,
-                     quaternion: SoQuaternionType=None) -> ThreeJSSceneGraphObjectListType:
+                     quaternion: SoQuaternionType=None,
+                     part_index: Union[np.ndarray, None]=None,
+                     uint32_indices: bool=True,
+                     normals: Union[np.ndarray, None]=None,
+                     quantize_bits: Union[int, None]=None) -> ThreeJSSceneGraphObjectListType:
     """
-    Returns a pythreejs `Mesh` object that consists of the faces given by
-    face_indices and the coord_vals.
+    Returns pythreejs `Mesh` objects that consist of the faces given by
+    face_indices and the coord_vals. The vertex normals are computed unless given.
+
+    Meshes with more than `MAX_UINT16_VERTICES` vertices use 32-bit indices. If
+    `uint32_indices` is `False` they are instead split into several meshes that each
+    fit 16-bit indices, preferably at the shape face boundaries given by `part_index`.
+
+    With `quantize_bits` positions and normals are sent as small integers, see `quantize_positions`
+    and `quantize_normals`, and indices use the smallest type including 8 bits.
     
-    Additionally the attributes `Mesh.default_material` and `Mesh.geometry.default_color`
-    will be set before returning the Mesh. Those attributes contain references to the
-    default colors and materials that are set in this function to restore later changes.
+    Additionally the attributes `Mesh.default_material`, `Mesh.geometry.default_color`
+    and `Mesh.triangle_offset` will be set before returning the Mesh. Those attributes
+    contain references to the default material and uniform color that are set in this function
+    to restore later changes and the index of the first triangle of the mesh in `face_indices`.
+    The geometry has no color attribute, see `highlight_vertex_colors`.
     """
     vertices = np.asarray(coord_vals, dtype='float32')
-    faces = np.asarray(face_indices, dtype='uint16')
+    faces = np.asarray(face_indices).reshape(-1, 3)
 
-    normals = compute_normals(faces, vertices)
-        
-    faces = faces.ravel()
-    vertexcolors = np.asarray([face_color]*len(coord_vals), dtype='float32')
+    # normals are computed before splitting, so they are smooth across chunk borders
+    if normals is None:
+        normals = compute_normals(faces, vertices)
+
+    if uint32_indices or len(vertices) <= MAX_UINT16_VERTICES:
+        chunks = [(0, faces, vertices, normals)]
+    else:
+        chunks = []
+        for start, end in mesh_chunk_ranges(faces, part_index):
+            used_vertices, chunk_faces = np.unique(faces[start:end], return_inverse=True)
+            chunks.append((start, chunk_faces.reshape(-1, 3), vertices[used_vertices], normals[used_vertices]))
+
+    meshes = []
+    for triangle_offset, chunk_faces, chunk_vertices, chunk_normals in chunks:
+        object_mesh = create_mesh(chunk_vertices, chunk_faces, chunk_normals, face_color, transparency,
+                                  quantize_bits)
+        object_mesh.triangle_offset = triangle_offset
+        place_object(object_mesh, translation, quaternion)
+        meshes.append(object_mesh)
+    return meshes
 
+def create_mesh(vertices: np.ndarray,
+                faces: np.ndarray,
+                normals: np.ndarray,
+                face_color: SoVectorType,
+                transparency: float,
+                quantize_bits: Union[int, None]=None) -> Mesh:
+    """
+    Returns a single pythreejs `Mesh` for the given vertex, triangle and normal arrays.
+    See `create_face_geom`.
+    """
+    quantization = None
+    if quantize_bits is not None:
+        vertices, offset, scale = quantize_positions(vertices, quantize_bits)
+        normals = quantize_normals(normals, scale)
+        quantization = (offset, scale)
+    faces = faces.astype(index_dtype(len(vertices), compact=quantize_bits is not None)).ravel()
 
     face_geometry = BufferGeometry(attributes=dict(
         position=BufferAttribute(vertices, normalized=False),
         index=BufferAttribute(faces, normalized=False),
-        normal=BufferAttribute(normals, normalized=False),
-        color=BufferAttribute(vertexcolors, normalized=False)
+        normal=BufferAttribute(normals, normalized=quantization is not None)
     ))
-    # this is used for returning to original state after highlighting
-    face_geometry.default_color = vertexcolors 
+    # this is used for the vertex colors of highlighting
+    face_geometry.default_color = np.asarray(face_color, dtype='float32')
     
     # BUG: This is a bug in pythreejs and currently does not work
     #faceGeometry.exec_three_obj_method('computeFaceNormals')
@@ -216,96 +333,66 @@ def create_face_geom(coord_vals: SoCoordValsListType,
         position=[0,0,0]   # Center the cube
     )
     object_mesh.default_material = material
-    
-    if quaternion:
-        object_mesh.quaternion = quaternion
-    if translation:
-        object_mesh.position = translation
-    return [object_mesh]
+    if quantization is not None:
+        object_mesh.quantization_offset, scale = quantization
+        object_mesh.scale = tuple(float(x) for x in scale)
+    return object_mesh
 
-def create_line_geom(coord_vals: SoCoordValsListType,
-                     indices: SoIndicesListType,
+def create_line_geom(coord_vals: SoCoordValsArrayType,
+                     indices: SoIndicesArrayType,
                      line_color: SoVectorType,
                      translation: SoVectorType=None,
-                     quaternion: SoQuaternionType=None) -> ThreeJSSceneGraphObjectListType:
+                     quaternion: SoQuaternionType=None,
+                     quantize_bits: Union[int, None]=None) -> ThreeJSSceneGraphObjectListType:
     """
-    Return a pythreejs Line object consisting of lines
-    defined by the line_indices and the coord_vals.
-    
-    Additionally the attributes `Line.default_color` and `Line.edge_index`
-    will be set before returning the `Line` array. Those attributes contain references to the
-    default colors, that are set in this function to restore later changes, and the FreeCAD edge index.
-    """
-    lines = []
-    for i, line_indices in enumerate(indices):
-        vertices = generate_line_vertices(line_indices, coord_vals)
-        vertices = np.array(vertices, dtype="float32")
-        line_geom = BufferGeometry(attributes=dict(
-        position=BufferAttribute(vertices, normalized=False)))
-        # BUG: This is a bug in pythreejs and currently does not work
-        #linesgeom.exec_three_obj_method('computeVertexNormals')
-        col = so_col_to_hex(line_color)
-        material = LineBasicMaterial(linewidth=LINE_WIDTH, color=col)
-        material.default_color = col        
-        line = Line(geometry=line_geom, 
-                     material=material)
-        line.edge_index = i + 1 # using FreeCAD's 1-based indexing
-        if translation:
-            line.position = translation
-        if quaternion:
-            line.quaternion = quaternion
-        lines.append(line)
-    return lines
+    Return a pythreejs `LineSegments` object holding all lines
+    defined by the line_indices and the coord_vals, see `create_line_segments`.
+    """
+    vertices, edge_ids, edge_offsets = generate_line_segments(indices, coord_vals)
+    return create_line_segments(vertices, edge_ids, edge_offsets, line_color, translation, quaternion,
+                                quantize_bits)
 
-def bfs_traversal(node: coin.SoNode,
-                  coordinates: Union[coin.SoCoordinate3, None]=None,
-                  material: Union[coin.SoMaterial, None]=None,
-                  transform: Union[coin.SoTransform, None]=None, 
-                  index: int=0,
-                  print_tree: bool=False,
-                  depth_counter: int=0,
-                  object_index: int=0) -> List[SoCoinTupleType]:
-    """
-    Return list of all (SoIndexed(Line/Face)Set, SoCoordinate3, SoMaterial) tuples
-    inside the scene graph.
+def create_line_segments(vertices: np.ndarray,
+                         edge_ids: np.ndarray,
+                         edge_offsets: np.ndarray,
+                         line_color: SoVectorType,
+                         translation: SoVectorType=None,
+                         quaternion: SoQuaternionType=None,
+                         quantize_bits: Union[int, None]=None) -> ThreeJSSceneGraphObjectListType:
+    """
+    Return a pythreejs `LineSegments` object for the line segments returned
+    by `generate_line_segments`. With `quantize_bits` the positions are sent as small
+    integers (see `quantize_positions`) and the edge indices as the smallest unsigned type.
     
-    The breadth first search always referes to the parent material and coordinates
-    if there aren't any on the same level.
+    The FreeCAD edge index of every vertex is stored in the `edge_index` attribute of
+    the geometry. Additionally the attributes `LineSegments.default_material`,
+    `LineSegments.geometry.default_color` and `LineSegments.edge_offsets` will be set before
+    returning. Those contain references to the default material and uniform color, that are set
+    in this function to restore later changes, and the vertex offsets of the edges
+    (see `generate_line_segments`).
     """
-    if print_tree:
-        print(str("   " * index) + str(type(node)))
-    if not isinstance(node, (coin.SoSwitch, coin.SoSeparator)):
-        return []
-    coords = coordinates
-    mat = material
-    trans = transform
-    edge_face_set = None
-    for child in node:
-        if isinstance(child, coin.SoCoordinate3):
-            coords = child
-        if isinstance(child, coin.SoTransform):
-            trans = child
-        if isinstance(child, coin.SoMaterial):
-            mat = child
-        if isinstance(child, (coin.SoIndexedLineSet, coin.SoIndexedFaceSet)):
-            edge_face_set = child
-    res_children = []
-    this_object_index = -1
-    for child in node:
-        if depth_counter != 0:
-            this_object_index = object_index
-        else:
-            this_object_index += 1
-        res_recursive = bfs_traversal(child, coords, transform=trans, index=index+1,\
-                                      print_tree=print_tree, depth_counter=depth_counter+1,\
-                                      object_index=this_object_index)
-        res_children.extend(res_recursive)
-    if edge_face_set:
-        res = [(edge_face_set, coords, mat, this_object_index, trans)]
-    else:
-        res = []
-    res.extend(res_children)
-    return res
+    quantization = None
+    if quantize_bits is not None:
+        vertices, offset, scale = quantize_positions(vertices, quantize_bits)
+        quantization = (offset, scale)
+        edge_ids = np.asarray(edge_ids).astype(index_dtype(len(edge_offsets), compact=True))
+    line_geom = BufferGeometry(attributes=dict(
+        position=BufferAttribute(vertices, normalized=False),
+        edge_index=BufferAttribute(edge_ids, normalized=False)
+    ))
+    line_geom.default_color = np.asarray(line_color, dtype='float32')
+    # BUG: This is a bug in pythreejs and currently does not work
+    #linesgeom.exec_three_obj_method('computeVertexNormals')
+    material = LineBasicMaterial(linewidth=LINE_WIDTH, color=so_col_to_hex(line_color))
+    lines = LineSegments(geometry=line_geom,
+                         material=material)
+    lines.default_material = material
+    lines.edge_offsets = edge_offsets
+    if quantization is not None:
+        lines.quantization_offset, scale = quantization
+        lines.scale = tuple(float(x) for x in scale)
+    place_object(lines, translation, quaternion)
+    return [lines]
 
 def get_line_geometries(geom: ThreeJSSceneGraphObjectType) -> LineSegments:
     """
@@ -313,7 +400,8 @@ def get_line_geometries(geom: ThreeJSSceneGraphObjectType) -> LineSegments:
     """
     line_geom = EdgesGeometry(geom.geometry)
     lines = LineSegments(geometry=line_geom, 
-                 material=LineBasicMaterial(linewidth=LINE_WIDTH, color='#000000'))
+                 material=LineBasicMaterial(linewidth=LINE_WIDTH, color='#000000'),
+                 position=geom.position, quaternion=geom.quaternion, scale=geom.scale)
     return lines
 
 def get_name(obj: Union[ThreeJSSceneGraphObjectType, None]) -> str:
@@ -342,52 +430,131 @@ def index_by_face_index(part_index: List[int], face_index: int) -> Union[int, No
     Returns the index of the Shape face for a given face index.
     If the face index is not in the part_index returns `None`.
     """
-    upper_limit = 0
-    for i, part_num_elements in enumerate(part_index):
-        upper_limit += part_num_elements
-        if face_index < upper_limit:
-            return i + 1 # FreeCAD uses 1-based indexing
-    return None
+    return shape_face_by_triangle(np.cumsum(part_index), face_index)
+
+def shape_face_by_triangle(triangle_ends: np.ndarray, face_index: int) -> Union[int, None]:
+    """
+    Returns the index of the Shape face for a given face index by binary search in
+    the cumulative triangle counts of the shape faces, i.e. `np.cumsum(part_index)`.
+    If the face index is not in any of the shape faces returns `None`.
+    """
+    shape_face_index = int(np.searchsorted(triangle_ends, face_index, side='right'))
+    if shape_face_index >= len(triangle_ends):
+        return None
+    return shape_face_index + 1 # FreeCAD uses 1-based indexing
+
+def build_face_lookup(part_index: List[int], face_indices: np.ndarray, triangle_offset: int=0) -> FaceLookupType:
+    """
+    Returns the tables needed to pick and highlight shape faces of a mesh in time
+    independent of the number of shape faces:
+    
+    - the cumulative triangle counts of the shape faces, `np.cumsum(part_index)`
+    - vertex offsets per shape face, so the vertices of shape face i are
+      `face_vertices[vertex_offsets[i-1]:vertex_offsets[i]]` (1-based like FreeCAD)
+    - the vertices of the mesh used by each shape face
+    
+    `face_indices` are the triangle indices of the mesh and `triangle_offset` the index of
+    its first triangle in the shape, see `create_face_geom`.
+    """
+    triangle_ends = np.cumsum(part_index).astype(np.intp)
+    faces = np.asarray(face_indices).reshape(-1, 3).astype(np.intp)
+    num_vertices = int(faces.max()) + 1 if len(faces) else 0
+    triangles = np.arange(triangle_offset, triangle_offset + len(faces))
+    triangle_shape_faces = np.searchsorted(triangle_ends, triangles, side='right')
+    # unique (shape face, vertex) pairs sorted by shape face
+    keys = np.unique(np.repeat(triangle_shape_faces, 3) * num_vertices + faces.ravel())
+    key_shape_faces = keys // max(num_vertices, 1)
+    vertex_offsets = np.searchsorted(key_shape_faces, np.arange(len(triangle_ends) + 1))
+    face_vertices = keys - key_shape_faces * num_vertices
+    return triangle_ends, vertex_offsets, face_vertices
 
 def vertices_col_highlight_face(shape_face_index: int,
                                 cols_default: np.array,
                                 part_index: List[int],
-                                face_indices: List[int]) -> np.array :
+                                face_indices: List[int],
+                                triangle_offset: int=0) -> np.array :
     """
     Returns vertex color array where the indexed face is highlighted.
+    For meshes holding only a chunk of the shape's triangles `triangle_offset` is the
+    index of their first triangle, parts of the face outside of the chunk are skipped.
+    """
+    cols = np.copy(cols_default)
+    triangle_starts = np.concatenate([[0], np.cumsum(part_index)])
+    #this is using the freecad base 1-indexing!
+    start_index = max(triangle_starts[shape_face_index-1] - triangle_offset, 0) * 3
+    end_index = max(triangle_starts[shape_face_index] - triangle_offset, 0) * 3
+    cols[np.asarray(face_indices)[start_index:end_index]] = HIGHLIGHTING_COLOR
+    return cols
+
+def vertices_col_highlight_lookup(shape_face_index: int,
+                                  cols_default: np.array,
+                                  face_lookup: FaceLookupType) -> np.array:
+    """
+    Returns vertex color array where the indexed face is highlighted using the
+    tables returned by `build_face_lookup`.
+    """
+    cols = np.copy(cols_default)
+    _, vertex_offsets, face_vertices = face_lookup
+    cols[face_vertices[vertex_offsets[shape_face_index-1]:vertex_offsets[shape_face_index]]] = HIGHLIGHTING_COLOR
+    return cols
+
+def vertices_col_highlight_edge(edge_index: int,
+                                cols_default: np.array,
+                                edge_offsets: np.array) -> np.array:
+    """
+    Returns vertex color array where the indexed edge is highlighted.
     """
     cols = np.copy(cols_default)
-    start_index = 0
-    for i in range(shape_face_index-1): #this is using the freecad base 1-indexing!
-        start_index += part_index[i]*3
-    end_index = start_index + part_index[shape_face_index-1]*3 - 1
-    if start_index < 0:
-        start_index = 0
-    for i in range(start_index, end_index+1):
-        pos_index = face_indices[i]
-        cols[pos_index] = HIGHLIGHTING_COLOR
+    cols[edge_offsets[edge_index-1]:edge_offsets[edge_index]] = HIGHLIGHTING_COLOR #this is using the freecad base 1-indexing!
     return cols
 
 def reset_object_highlighting(obj: ThreeJSSceneGraphObjectType) -> None:
     """
-    After calling this function the object of type `Line`, `Sphere` or `Mesh` will be reset
+    After calling this function the object of type `LineSegments`, `Sphere` or `Mesh` will be reset
     to it's default colors.
     """
-    # case obj is a Line
-    if isinstance(obj, Line):
-        obj.material.color = obj.material.default_color
-        return
-    
     # case obj is a Sphere (representing a vertex)
     if isinstance(obj, Sphere):
         # TODO
         return
     
-    # case obj is a Mesh of faces
-    obj.material = obj.default_material
-    obj.geometry.attributes["color"].array = obj.geometry.default_color
-    obj.geometry.attributes["color"].needsUpdate = True        
-    
+    # case obj is LineSegments or Mesh
+    if obj.material is not obj.default_material:
+        obj.material.close()
+        obj.material = obj.default_material
+    attributes = obj.geometry.attributes
+    if "color" in attributes:
+        # uniform colors don't need a color buffer
+        obj.geometry.attributes = {name: attribute for name, attribute in attributes.items() if name != "color"}
+        attributes["color"].close()
+
+def default_vertex_colors(obj: ThreeJSSceneGraphObjectType) -> np.ndarray:
+    """
+    Returns a new vertex color array of the `Mesh` or `LineSegments` in its uniform default color.
+    """
+    num_vertices = len(obj.geometry.attributes["position"].array)
+    return np.tile(obj.geometry.default_color, (num_vertices, 1))
+
+def highlight_vertex_colors(obj: ThreeJSSceneGraphObjectType, cols: np.ndarray) -> None:
+    """
+    Shows the vertex colors on the `Mesh` or `LineSegments`. The color attribute is only
+    created for highlighted objects, `reset_object_highlighting` drops it again.
+    """
+    attributes = obj.geometry.attributes
+    if "color" in attributes:
+        attributes["color"].array = cols
+        attributes["color"].needsUpdate = True
+    else:
+        obj.geometry.attributes = dict(attributes, color=BufferAttribute(cols, normalized=False))
+    if obj.material is not obj.default_material:
+        return
+    if isinstance(obj, Line):
+        obj.material = LineBasicMaterial(linewidth=LINE_WIDTH, vertexColors='VertexColors')
+    else:
+        material = MeshLambertMaterial(vertexColors='VertexColors', shininess=1)
+        material.name = obj.default_material.color
+        obj.material = material
+
 def freecad_name_from_obj3d(obj3d: ThreeJSSceneGraphObjectType) -> str:
     """
     Returns the objects name inside the FreeCAD document.
@@ -397,27 +564,134 @@ def freecad_name_from_obj3d(obj3d: ThreeJSSceneGraphObjectType) -> str:
         txt = "{}: ".format(obj3d.freecad_name)
     return txt
     
+def face_highlight_geometry(obj: Mesh, shape_face_index: int, triangle_ends: np.ndarray) -> BufferGeometry:
+    """
+    Returns a geometry holding only the triangles of the indexed shape face of the mesh.
+    `triangle_ends` are the cumulative triangle counts of the shape faces, i.e. `np.cumsum(part_index)`.
+    """
+    attributes = obj.geometry.attributes
+    triangle_starts = np.concatenate([[0], triangle_ends])
+    #this is using the freecad base 1-indexing!
+    start = max(triangle_starts[shape_face_index-1] - obj.triangle_offset, 0)
+    end = max(triangle_starts[shape_face_index] - obj.triangle_offset, 0)
+    triangles = np.asarray(attributes["index"].array).reshape(-1, 3)[start:end]
+    used_vertices, faces = np.unique(triangles, return_inverse=True)
+    return BufferGeometry(attributes=dict(
+        position=BufferAttribute(attributes["position"].array[used_vertices], normalized=False),
+        index=BufferAttribute(faces.astype(index_dtype(len(used_vertices))).ravel(), normalized=False),
+        normal=BufferAttribute(attributes["normal"].array[used_vertices], normalized=attributes["normal"].normalized)
+    ))
+
+def edge_highlight_geometry(obj: LineSegments, edge_index: int) -> BufferGeometry:
+    """
+    Returns a geometry holding only the line segments of the indexed edge.
+    """
+    positions = obj.geometry.attributes["position"].array
+    vertices = positions[obj.edge_offsets[edge_index-1]:obj.edge_offsets[edge_index]]
+    return BufferGeometry(attributes=dict(position=BufferAttribute(vertices, normalized=False)))
+
+def picked_edge_index(obj: LineSegments, picker: Picker) -> Union[int, None]:
+    """
+    Returns the edge of the `LineSegments` the picker is on, `None` without edges.
+    pythreejs 2.4 and later send the picked vertex as `picker.index`, with older versions
+    the segment closest to the picked point is searched.
+    """
+    if not hasattr(obj, "edge_offsets"):
+        return None
+    edge_ids = obj.geometry.attributes["edge_index"].array
+    index = getattr(picker, "index", None)
+    if index is None:
+        positions = np.asarray(obj.geometry.attributes["position"].array, dtype='float64').reshape(-1, 2, 3)
+        if len(positions) == 0:
+            return None
+        # the picked point is in world coordinates, the positions are before scale, rotation and position
+        point = np.asarray(picker.point, dtype='float64') - obj.position
+        x, y, z, w = obj.quaternion
+        point = rotate_vector((-x, -y, -z, w), point) / obj.scale
+        starts, directions = positions[:, 0], positions[:, 1] - positions[:, 0]
+        lengths = np.maximum((directions * directions).sum(axis=1), np.finfo('float64').tiny)
+        t = np.clip(((point - starts) * directions).sum(axis=1) / lengths, 0, 1)
+        distances = np.linalg.norm(starts + t[:, None] * directions - point, axis=1)
+        index = 2 * int(np.argmin(distances))
+    return int(edge_ids[index])
+
+def create_highlight_overlays() -> Tuple[Mesh, LineSegments]:
+    """
+    Returns the invisible overlay objects used to show the highlighted face and edge.
+    Highlighting then only sends the geometry of the highlighted face or edge instead of the
+    color buffer of the whole object. The overlays have to be part of the scene but must
+    not be controlled by the picker.
+    """
+    col = so_col_to_hex(HIGHLIGHTING_COLOR)
+    # the polygon offset draws the overlay in front of the face it covers
+    face_material = MeshLambertMaterial(color=col, polygonOffset=True,
+                                        polygonOffsetFactor=-1, polygonOffsetUnits=-1)
+    face_overlay = Mesh(geometry=BufferGeometry(), material=face_material, visible=False)
+    edge_overlay = LineSegments(geometry=BufferGeometry(),
+                                material=LineBasicMaterial(linewidth=LINE_WIDTH, color=col), visible=False)
+    return face_overlay, edge_overlay
+
 def generate_picker(geometries: ThreeJSSceneGraphObjectListType,
                     part_indices: PartIndicesType,
-                    mode: str="click") -> Tuple[HTML, Picker]:
+                    mode: str="click",
+                    highlight_mode: str="overlay",
+                    stats: Union[RenderStats, None]=None,
+                    throttle: float=0.0,
+                    debounce: float=0.0,
+                    skip_unchanged: bool=False) -> Tuple[HTML, Picker]:
     """
     Returns a picker that will enable object and face selection
     as well as highlighting those selections
     
     Picker mode can be `mousemove` or `click` or `dblclick` and is set via the `mode`
     parameter.
+
+    With `highlight_mode="vertex_colors"` the color buffer of the selected object is changed
+    and sent again. With `highlight_mode="overlay"` the selection is drawn by the overlay objects
+    `picker.face_overlay` and `picker.edge_overlay` holding only the selected face or edge,
+    they have to be added to the scene by the caller.
+
+    Every pointer move in `mousemove` mode is a picker event. With `skip_unchanged` events on
+    the same shape face or edge of the same object as the event before are skipped right away.
+    With `throttle` seconds the events are handled at most once per `throttle`, with `debounce`
+    seconds only after no event came for `debounce`. Both coalesce the pending events, only
+    the latest picked state is handled, by a callback on the asyncio event loop of the kernel.
+
+    The duration of every callback is appended to `stats.picker_latencies` if `stats` is given,
+    see `RenderStats` for the event counts and delays.
     """
     VALUE_TYPE = "point"
     
     if mode not in PICKER_VALID_MODES:
         raise Exception("Given `mode` parameter has to be on of {}, but was `{}`"
                         .format(PICKER_VALID_MODES, mode))
+    if highlight_mode not in HIGHLIGHT_MODES:
+        raise Exception("Given `highlight_mode` parameter has to be one of {}, but was `{}`"
+                        .format(HIGHLIGHT_MODES, highlight_mode))
     html = HTML("<b>No selection.</b>")
     picker = Picker(
         controlling = geometries,
         event = mode)
     picker.shape_face_index_old = -1
     picker.last_object = None
+    if highlight_mode == "overlay":
+        picker.face_overlay, picker.edge_overlay = create_highlight_overlays()
+
+    def reset_highlighting(obj):
+        """Removes the highlighting from the given object."""
+        if highlight_mode == "overlay":
+            picker.face_overlay.visible = False
+            picker.edge_overlay.visible = False
+        else:
+            reset_object_highlighting(obj)
+
+    def show_overlay(overlay, geometry, obj):
+        """Shows the overlay with the given geometry at the place of the object."""
+        overlay.geometry = geometry
+        overlay.position = obj.position
+        overlay.quaternion = obj.quaternion
+        overlay.scale = obj.scale
+        overlay.visible = True
     
     def callback_f(change):
         """
@@ -431,45 +705,571 @@ def generate_picker(geometries: ThreeJSSceneGraphObjectListType,
 
         if value is None:
             if not (last_value is None):
-                reset_object_highlighting(last_value)
+                reset_highlighting(last_value)
             html.value = "<b>No selection.</b>"
             return
+
+        if hasattr(value, "proxy_bounds"):
+            # the bounding box of an object that isn't loaded, see `BudgetedViewer`
+            if not (last_value is None):
+                reset_highlighting(last_value)
+            picker.last_object = None
+            picker.shape_face_index_old = -1
+            html.value = "{} <b>not loaded</b>".format(value_freecad_name)
+            return
         
         if isinstance(value, Line):
+            edge_index = picked_edge_index(value, picker)
+            if edge_index is None:
+                return
             if not (last_value is None):
-                reset_object_highlighting(last_value)
-            value.material.color = so_col_to_hex(HIGHLIGHTING_COLOR)
-            html.value = "{} <b>Edge{}</b>".format(value_freecad_name, value.edge_index)
+                # check for case of selecting the same freecad edge
+                if (last_value.name == value.name) and (picker.shape_face_index_old == edge_index):
+                    return
+                if last_value is not value or highlight_mode == "overlay":
+                    reset_highlighting(last_value)
+            if highlight_mode == "overlay":
+                show_overlay(picker.edge_overlay, edge_highlight_geometry(value, edge_index), value)
+            else:
+                cols_highlighted = vertices_col_highlight_edge(edge_index, default_vertex_colors(value),
+                                                               value.edge_offsets)
+                highlight_vertex_colors(value, cols_highlighted)
+            picker.shape_face_index_old = edge_index
+            picker.last_object = value
+            if hasattr(value, "merged_lookup"):
+                source_name, edge_index = merged_source(value.merged_lookup, edge_index)
+                value_freecad_name = "{}: ".format(source_name)
+            html.value = "{} <b>Edge{}</b>".format(value_freecad_name, edge_index)
             return
 
-        face_index = int(picker.faceIndex)
-        part_index = part_index_by_name(get_name(value), part_indices)
-        shape_face_index = index_by_face_index(part_index, face_index)        
+        face_index = int(picker.faceIndex) + value.triangle_offset
+        if hasattr(value, "face_lookup"):
+            shape_face_index = shape_face_by_triangle(value.face_lookup[0], face_index)
+        else:
+            part_index = part_index_by_name(get_name(value), part_indices)
+            shape_face_index = index_by_face_index(part_index, face_index)
+        if shape_face_index is None:
+            return
 
         if not (last_value is None):
             # check for case of selecting the same freecad face
             if (last_value.name == value.name) and (picker.shape_face_index_old == shape_face_index):
                 return
-            reset_object_highlighting(last_value)
+            # the color buffer of the same object is reused
+            if last_value is not value or highlight_mode == "overlay":
+                reset_highlighting(last_value)
 
-        face_indices = value.geometry.attributes["index"].array
-        cols_default = value.geometry.default_color
-        cols_highlighted = vertices_col_highlight_face(shape_face_index, cols_default, part_index, face_indices)
-        value.geometry.attributes["color"].array = cols_highlighted
-        value.geometry.attributes["color"].needsUpdate = True 
-        
-        material = MeshLambertMaterial(vertexColors='VertexColors', shininess=1)
-        material.name = value.material.color
-        value.material = material
+        if highlight_mode == "overlay":
+            if hasattr(value, "face_lookup"):
+                triangle_ends = value.face_lookup[0]
+            else:
+                triangle_ends = np.cumsum(part_index)
+            show_overlay(picker.face_overlay, face_highlight_geometry(value, shape_face_index, triangle_ends), value)
+        else:
+            cols_default = default_vertex_colors(value)
+            if hasattr(value, "face_lookup"):
+                cols_highlighted = vertices_col_highlight_lookup(shape_face_index, cols_default, value.face_lookup)
+            else:
+                face_indices = value.geometry.attributes["index"].array
+                cols_highlighted = vertices_col_highlight_face(shape_face_index, cols_default, part_index, face_indices,
+                                                               value.triangle_offset)
+            highlight_vertex_colors(value, cols_highlighted)
         picker.shape_face_index_old = shape_face_index
         picker.last_object = value
 
+        if hasattr(value, "merged_lookup"):
+            source_name, shape_face_index = merged_source(value.merged_lookup, shape_face_index)
+            value_freecad_name = "{}: ".format(source_name)
         html.value = "{} <b>Face{}</b>".format(value_freecad_name, shape_face_index)
 
-    picker.observe(callback_f, names=[VALUE_TYPE]) 
+    def hovered_key():
+        """Returns the picked object and its shape face or edge, by the same lookups as `callback_f`."""
+        value = picker.object
+        if value is None or hasattr(value, "proxy_bounds"):
+            return (id(value),)
+        if isinstance(value, Line):
+            return (id(value), "Edge", picked_edge_index(value, picker))
+        face_index = int(picker.faceIndex) + value.triangle_offset
+        if hasattr(value, "face_lookup"):
+            return (id(value), "Face", shape_face_by_triangle(value.face_lookup[0], face_index))
+        return (id(value), "Face", index_by_face_index(part_index_by_name(get_name(value), part_indices), face_index))
+
+    def handle_f(arrival):
+        """Handles the picked state of the picker for the events pending since `arrival`."""
+        picker.pending_handle = None
+        picker.handled_time = start = time.perf_counter()
+        callback_f(None)
+        if stats is not None:
+            end = time.perf_counter()
+            stats.picker_latencies.append(end - start)
+            stats.picker_delays.append(end - arrival)
+
+    def event_f(change):
+        """Receives a picker event, skips it if unchanged and handles, throttles or debounces it."""
+        arrival = time.perf_counter()
+        if stats is not None:
+            stats.picker_event_times.append(arrival)
+        if skip_unchanged:
+            key = hovered_key()
+            if key == picker.last_event_key:
+                if stats is not None:
+                    stats.picker_skipped += 1
+                return
+            picker.last_event_key = key
+        if not throttle and not debounce:
+            handle_f(arrival)
+            return
+        if picker.pending_handle is not None:
+            # the pending event is replaced by this one, it keeps its arrival for the delay
+            if stats is not None:
+                stats.picker_coalesced += 1
+            if not debounce:
+                return
+            picker.pending_handle.cancel()
+        else:
+            picker.pending_arrival = arrival
+        delay = max(debounce, picker.handled_time + throttle - arrival)
+        if delay <= 0:
+            handle_f(arrival)
+        else:
+            picker.pending_handle = asyncio.get_event_loop().call_later(delay, handle_f, picker.pending_arrival)
+
+    picker.last_event_key = None
+    picker.pending_handle = None
+    picker.pending_arrival = None
+    picker.handled_time = -float("inf")
+    picker.observe(event_f, names=[VALUE_TYPE])
     return html, picker
 
 
+def cluster_vertices(vertices: np.ndarray,
+                     faces: np.ndarray,
+                     face_ids: np.ndarray,
+                     cell_size: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decimates a triangle mesh by merging all vertices inside the same cell of a grid with the
+    given cell size. Each cluster is placed where it minimizes the quadric error of the planes
+    of its triangles, pulled slightly towards the mean of its vertices to stay well defined on
+    flat and curved regions alike. Collapsed and duplicate triangles are removed.
+    
+    Returns the new vertices, the triangles sorted by their `face_ids` and those `face_ids`,
+    so every remaining triangle still belongs to the shape face it came from.
+    """
+    vertices = np.asarray(vertices, dtype='float64')
+    faces = np.asarray(faces, dtype=np.intp).reshape(-1, 3)
+    cells = np.floor((vertices - vertices.min(axis=0)) / cell_size).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    _, clusters = np.unique(keys, return_inverse=True)
+    clusters = clusters.ravel()
+    num_clusters = int(clusters.max()) + 1
+
+    # area weighted plane quadrics of the triangles, accumulated per cluster of their corners
+    corners = vertices[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    areas = np.linalg.norm(normals, axis=1)
+    unit_normals = np.divide(normals, areas[:, np.newaxis], out=np.zeros_like(normals),
+                             where=areas[:, np.newaxis] > 0)
+    offsets = -np.einsum('ij,ij->i', unit_normals, corners[:, 0])
+    face_a = areas[:, np.newaxis, np.newaxis] * unit_normals[:, :, np.newaxis] * unit_normals[:, np.newaxis, :]
+    face_b = (areas * offsets)[:, np.newaxis] * unit_normals
+    corner_clusters = clusters[faces].ravel()
+    quadric_a = np.zeros((num_clusters, 3, 3))
+    quadric_b = np.zeros((num_clusters, 3))
+    for row in range(3):
+        quadric_b[:, row] = np.bincount(corner_clusters, weights=np.repeat(face_b[:, row], 3),
+                                        minlength=num_clusters)
+        for col in range(3):
+            quadric_a[:, row, col] = np.bincount(corner_clusters, weights=np.repeat(face_a[:, row, col], 3),
+                                                 minlength=num_clusters)
+    counts = np.bincount(clusters, minlength=num_clusters)[:, np.newaxis]
+    means = np.stack([np.bincount(clusters, weights=vertices[:, axis], minlength=num_clusters)
+                      for axis in range(3)], axis=1) / counts
+    regularization = 1e-2 * np.trace(quadric_a, axis1=1, axis2=2) / 3 + 1e-12
+    system = quadric_a + regularization[:, np.newaxis, np.newaxis] * np.eye(3)
+    rhs = regularization[:, np.newaxis] * means - quadric_b
+    new_vertices = np.linalg.solve(system, rhs[:, :, np.newaxis])[:, :, 0]
+
+    new_faces = clusters[faces]
+    valid = ((new_faces[:, 0] != new_faces[:, 1]) & (new_faces[:, 1] != new_faces[:, 2])
+             & (new_faces[:, 0] != new_faces[:, 2]))
+    new_faces = new_faces[valid]
+    new_face_ids = np.asarray(face_ids)[valid]
+    # triangles using the same clusters in any order are duplicates
+    _, first = np.unique(np.sort(new_faces, axis=1), axis=0, return_index=True)
+    first = np.sort(first)
+    new_faces = new_faces[first]
+    new_face_ids = new_face_ids[first]
+
+    order = np.argsort(new_face_ids, kind='stable')
+    new_faces = new_faces[order]
+    new_face_ids = new_face_ids[order]
+    used_clusters, new_faces = np.unique(new_faces, return_inverse=True)
+    return (new_vertices[used_clusters].astype('float32'), new_faces.reshape(-1, 3).astype('int32'),
+            new_face_ids)
+
+def decimate_buffers(buffers: GeometryBuffers, target_triangles: int) -> GeometryBuffers:
+    """
+    Returns the face set buffers decimated by `cluster_vertices` to at most `target_triangles`
+    triangles, as close to it as `LOD_SEARCH_STEPS` bisections of the cell size get. Their
+    `part_index` is recomputed, so picking still maps to the right shape face.
+    """
+    num_faces = len(buffers.faces)
+    if num_faces <= target_triangles or num_faces == 0:
+        return buffers
+    face_ids = np.repeat(np.arange(len(buffers.part_index)), buffers.part_index)
+    if len(face_ids) < num_faces:
+        # triangles not covered by the part index keep belonging to no shape face
+        face_ids = np.concatenate([face_ids, np.full(num_faces - len(face_ids), len(buffers.part_index))])
+    face_ids = face_ids[:num_faces]
+
+    corners = buffers.vertices[buffers.faces].astype('float64')
+    area = np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1).sum() / 2
+    # a regular tessellation of the area with the target number of triangles has about this edge length
+    cell_size = max(np.sqrt(2 * area / max(target_triangles, 1)), 1e-9)
+    smaller = 0.0
+    larger = None
+    best = None
+    for _ in range(LOD_SEARCH_STEPS):
+        result = cluster_vertices(buffers.vertices, buffers.faces, face_ids, cell_size)
+        if len(result[1]) > target_triangles:
+            smaller = cell_size
+        else:
+            larger = cell_size
+            if best is None or len(result[1]) > len(best[1]):
+                best = result
+        cell_size = (smaller + larger) / 2 if larger is not None else cell_size * 2
+    if best is None:
+        best = result
+    vertices, faces, new_face_ids = best
+    part_index = np.bincount(new_face_ids, minlength=len(buffers.part_index))[:len(buffers.part_index)]
+    return buffers._replace(vertices=vertices, faces=faces, normals=compute_normals(faces, vertices),
+                            part_index=part_index.astype('int32'))
+
+def lod_buffers(buffers: GeometryBuffers, target_triangles: int, num_levels: int) -> List[GeometryBuffers]:
+    """
+    Returns up to `num_levels` levels of detail of the face set buffers, the first one with
+    at most `target_triangles` triangles and every further one with a quarter of the triangles
+    of the previous one. Levels below `LOD_MIN_TRIANGLES` triangles are left out.
+    """
+    levels = [decimate_buffers(buffers, target_triangles)]
+    target = len(levels[0].faces)
+    for _ in range(num_levels - 1):
+        target //= 4
+        if target < LOD_MIN_TRIANGLES:
+            break
+        levels.append(decimate_buffers(levels[-1], target))
+    return levels
+
+def weld_labels(vertices: np.ndarray, groups: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Returns for every vertex the index of the vertex it is welded to, the first one of its
+    cluster. Only vertices of the same group are welded. With a `tolerance` of 0 exact
+    duplicates are welded, otherwise vertices sharing a cell of a grid of that size, first on
+    the grid and then on the grid shifted by half a cell, so close pairs split by a cell border
+    of the first grid are welded too. Both passes are one vectorized sort of the vertices.
+    """
+    vertices = np.asarray(vertices, dtype='float64').reshape(-1, 3)
+    labels = np.arange(len(vertices))
+    if len(vertices) == 0:
+        return labels
+    for offset in ([None] if tolerance == 0 else [0.0, 0.5]):
+        representatives = np.unique(labels)
+        if offset is None:
+            cells = vertices[representatives]
+        else:
+            cells = np.floor(vertices[representatives] / tolerance + offset)
+        keys = np.column_stack([groups[representatives], cells])
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        welded = representatives[first[inverse.ravel()]]
+        labels = welded[np.searchsorted(representatives, labels)]
+    return labels
+
+def weld_buffers(buffers: GeometryBuffers, tolerance: float) -> Tuple[GeometryBuffers, int]:
+    """
+    Returns the buffers with coincident vertices welded (see `weld_labels`) and the number of
+    vertices removed.
+
+    Face sets are only welded inside their shape faces, so the normals stay sharp at the edges
+    of the CAD model but get smooth across seams. Unused vertices and triangles that collapse
+    are removed and the normals are computed again. Line sets drop the segments that collapse
+    and the ones repeated inside an edge.
+    """
+    vertices = np.asarray(buffers.vertices, dtype='float32').reshape(-1, 3)
+    if buffers.is_line:
+        num_edges = len(buffers.edge_offsets) - 1
+        segment_edges = np.repeat(np.arange(num_edges), np.diff(buffers.edge_offsets) // 2)
+        labels = weld_labels(vertices, np.repeat(segment_edges, 2), tolerance)
+        ends = np.sort(labels.reshape(-1, 2), axis=1)
+        keys = np.column_stack([segment_edges, ends])
+        candidates = np.flatnonzero(ends[:, 0] != ends[:, 1])
+        _, first = np.unique(keys[candidates], axis=0, return_index=True)
+        segments = candidates[np.sort(first)]
+        vertex_ids = (2 * segments[:, None] + np.arange(2)).ravel()
+        counts = np.bincount(segment_edges[segments], minlength=num_edges)
+        welded = buffers._replace(vertices=vertices[labels[vertex_ids]],
+                                  edge_ids=np.asarray(buffers.edge_ids)[vertex_ids],
+                                  edge_offsets=np.concatenate([[0], np.cumsum(2 * counts)]).astype(np.intp))
+        return welded, len(vertices) - len(welded.vertices)
+
+    faces = np.asarray(buffers.faces, dtype=np.intp).reshape(-1, 3)
+    if len(buffers.part_index):
+        triangle_faces = np.searchsorted(np.cumsum(buffers.part_index), np.arange(len(faces)), side='right')
+    else:
+        triangle_faces = np.zeros(len(faces), dtype=np.intp)
+    # every vertex belongs to the first shape face using it, unused ones are dropped anyway
+    owners = np.full(len(vertices), len(buffers.part_index) + 1, dtype=np.intp)
+    np.minimum.at(owners, faces.ravel(), np.repeat(triangle_faces, 3))
+    labels = weld_labels(vertices, owners, tolerance)
+    welded_faces = labels[faces]
+    keep = ((welded_faces[:, 0] != welded_faces[:, 1]) & (welded_faces[:, 1] != welded_faces[:, 2])
+            & (welded_faces[:, 2] != welded_faces[:, 0]))
+    used, new_faces = np.unique(welded_faces[keep], return_inverse=True)
+    new_faces = new_faces.reshape(-1, 3).astype('int32')
+    new_vertices = vertices[used]
+    part_index = buffers.part_index
+    if len(part_index):
+        part_index = np.bincount(triangle_faces[keep], minlength=len(part_index)).astype(np.asarray(part_index).dtype)
+    welded = buffers._replace(vertices=new_vertices, faces=new_faces, part_index=part_index,
+                              normals=compute_normals(new_faces, new_vertices))
+    return welded, len(vertices) - len(new_vertices)
+
+def rotate_vector(quaternion: SoQuaternionType, vector: np.ndarray) -> np.ndarray:
+    """
+    Returns the vector rotated by the (x, y, z, w) quaternion.
+    """
+    axis = np.asarray(quaternion[:3], dtype='float64')
+    vector = np.asarray(vector, dtype='float64')
+    twice_cross = 2 * np.cross(axis, vector)
+    return vector + quaternion[3] * twice_cross + np.cross(axis, twice_cross)
+
+def world_vertices(buffers: GeometryBuffers) -> np.ndarray:
+    """
+    Returns the (N, 3) vertices of the buffers placed by their transform, as float64 array.
+    """
+    vertices = np.asarray(buffers.vertices, dtype='float64').reshape(-1, 3)
+    if buffers.quaternion:
+        vertices = rotate_vector(buffers.quaternion, vertices)
+    if buffers.translation:
+        vertices = vertices + buffers.translation
+    return vertices
+
+def create_lod(levels: List[GeometryBuffers], buffers: GeometryBuffers,
+               build: Callable[[int, GeometryBuffers], ThreeJSSceneGraphObjectListType]) -> Group:
+    """
+    Returns a `Group` switching between the levels of detail of the face set `buffers`, given
+    by their buffers, see `update_lod`. `build(level, level_buffers)` returns the pythreejs
+    objects of a level, it is only called when the level is shown for the first time, so the
+    widgets of levels the camera never gets to are never created and sent. The group starts
+    empty, `create_renderer` shows the level that fits the camera.
+    
+    pythreejs doesn't expose the levels of three.js' `LOD`, so the level is chosen on
+    the Python side. Only the objects of the current level are children of the group,
+    that way the picker can't select hidden levels.
+    """
+    vertices = buffers.vertices
+    diagonal = float(np.linalg.norm(vertices.max(axis=0) - vertices.min(axis=0))) if len(vertices) else 0.0
+    center = (vertices.max(axis=0) + vertices.min(axis=0)) / 2 if len(vertices) else np.zeros(3)
+    if buffers.quaternion:
+        center = rotate_vector(buffers.quaternion, center)
+    if buffers.translation:
+        center = center + np.asarray(buffers.translation)
+    lod = Group()
+    lod.lod_buffers = levels
+    lod.lod_levels = [None] * len(levels) # pythreejs objects per level, once built
+    lod.lod_build = build
+    lod.lod_distances = np.array([0] + [LOD_DISTANCE_FACTOR * 2**k * diagonal for k in range(len(levels) - 1)])
+    lod.lod_center = center
+    lod.lod_level = None
+    return lod
+
+def update_lod(lod: Group, camera_position: SoVectorType) -> None:
+    """
+    Shows the level of detail of the `Group` created by `create_lod` that fits the distance
+    between the camera and the center of the object, building it if it wasn't shown before.
+    """
+    distance = np.linalg.norm(np.asarray(camera_position) - lod.lod_center)
+    level = int(np.searchsorted(lod.lod_distances, distance, side='right')) - 1
+    if level != lod.lod_level:
+        if lod.lod_levels[level] is None:
+            lod.lod_levels[level] = lod.lod_build(level, lod.lod_buffers[level])
+        lod.children = tuple(lod.lod_levels[level])
+        lod.lod_level = level
+
+def lod_meshes(obj: ThreeJSSceneGraphObjectType) -> ThreeJSSceneGraphObjectListType:
+    """
+    Returns the objects of all built levels of a `Group` created by `create_lod`, or the object itself.
+    """
+    if hasattr(obj, "lod_levels"):
+        return [level_obj for level in obj.lod_levels if level is not None for level_obj in level]
+    return [obj]
+
+def object_bounds(buffers: List[GeometryBuffers]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the lower and upper corner of the bounding box of the geometry buffers of an object,
+    placed by their transform. The corners of the box of the coordinates of each buffer are placed,
+    so the box holds all vertices but can be larger than theirs for rotated buffers.
+    """
+    corners = []
+    for obj_buffers in buffers:
+        vertices = np.asarray(obj_buffers.vertices).reshape(-1, 3)
+        if len(vertices) == 0:
+            continue
+        box = np.where((np.arange(8)[:, None] >> np.arange(3)) & 1, vertices.max(axis=0), vertices.min(axis=0))
+        corners.append(world_vertices(obj_buffers._replace(vertices=box)))
+    if not corners:
+        return np.zeros(3), np.zeros(3)
+    corners = np.concatenate(corners)
+    return corners.min(axis=0), corners.max(axis=0)
+
+def create_proxy_template() -> Mesh:
+    """
+    Returns a wireframe `Mesh` of the unit box around the origin, `create_proxy` shares its
+    geometry and material.
+    """
+    corners = (((np.arange(8)[:, None] >> np.arange(3)) & 1) - 0.5).astype('float32')
+    faces = np.array([[0, 2, 1], [1, 2, 3], [4, 5, 6], [5, 7, 6], [0, 1, 4], [1, 5, 4],
+                      [2, 6, 3], [3, 6, 7], [0, 4, 2], [2, 4, 6], [1, 3, 5], [3, 7, 5]], dtype='uint16')
+    geometry = BufferGeometry(attributes={"position": BufferAttribute(corners, normalized=False),
+                                          "index": BufferAttribute(faces.ravel(), normalized=False)})
+    material = MeshBasicMaterial(color=so_col_to_hex(PROXY_COLOR), wireframe=True, side="DoubleSide")
+    return Mesh(geometry=geometry, material=material)
+
+def create_proxy(template: Mesh, lower: np.ndarray, upper: np.ndarray) -> Mesh:
+    """
+    Returns a `Mesh` of the box from `lower` to `upper` that stands in for an object which isn't
+    loaded, sharing geometry and material with the `template` of `create_proxy_template`.
+    The box is kept as `proxy_bounds`, the picker tells proxies apart by it.
+    """
+    size = np.maximum(np.asarray(upper) - lower, PROXY_MIN_SIZE)
+    proxy = Mesh(geometry=template.geometry, material=template.material,
+                 position=tuple(float(x) for x in (np.asarray(upper) + lower) / 2),
+                 scale=tuple(float(x) for x in size))
+    proxy.proxy_bounds = (np.asarray(lower), np.asarray(upper))
+    return proxy
+
+def objects_in_view(centers: np.ndarray, radii: np.ndarray, camera_position: SoVectorType, target: SoVectorType,
+                    fov: float, aspect: float) -> np.ndarray:
+    """
+    Returns the indices of the bounding spheres (`centers`, `radii`) that reach into the view of the
+    camera at `camera_position` looking at `target`, the largest on screen first. `fov` is the vertical
+    field of view in degrees, the view is approximated by the cone around the corners of the frustum.
+    """
+    camera_position = np.asarray(camera_position, dtype='float64')
+    view = np.asarray(target, dtype='float64') - camera_position
+    view /= max(np.linalg.norm(view), np.finfo('float64').tiny)
+    offsets = centers - camera_position
+    distances = np.linalg.norm(offsets, axis=1)
+    half_angle = np.arctan(np.tan(np.radians(fov) / 2) * np.sqrt(1 + aspect**2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        angles = np.arccos(np.clip(offsets @ view / distances, -1, 1))
+        reach = np.arcsin(np.clip(radii / distances, 0, 1))
+        screen_size = np.where(distances > radii, radii / distances, np.inf)
+    visible = np.flatnonzero((distances <= radii) | (angles - reach <= half_angle))
+    return visible[np.argsort(-screen_size[visible], kind='stable')]
+
+
+def buffers_digest(buffers: GeometryBuffers) -> bytes:
+    """
+    Returns a hash of everything that ends up in the `BufferGeometry` and material created from
+    the buffers. Copies of a part only differ in their transform, so they have the same digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for field in GEOMETRY_ARRAY_FIELDS:
+        if field == "normals":
+            # derived from vertices and faces
+            continue
+        array = np.ascontiguousarray(getattr(buffers, field))
+        digest.update("{}{}{}".format(field, array.dtype.str, array.shape).encode())
+        digest.update(array.data)
+    digest.update(repr((tuple(buffers.color), buffers.transparency, buffers.is_line)).encode())
+    return digest.digest()
+
+def create_instance(template: ThreeJSSceneGraphObjectType,
+                    translation: SoVectorType=None,
+                    quaternion: SoQuaternionType=None) -> ThreeJSSceneGraphObjectType:
+    """
+    Returns a new `Mesh` or `LineSegments` sharing geometry and material with the given one,
+    placed by its own transform. The Python side attributes used for picking are shared as well.
+    """
+    instance = type(template)(geometry=template.geometry, material=template.material, scale=template.scale)
+    for name in ["default_material", "triangle_offset", "face_lookup", "edge_offsets", "quantization_offset"]:
+        if hasattr(template, name):
+            setattr(instance, name, getattr(template, name))
+    place_object(instance, translation, quaternion)
+    return instance
+
+def merge_buffers(buffers: List[GeometryBuffers]) -> Tuple[GeometryBuffers, np.ndarray, np.ndarray]:
+    """
+    Merges face sets or line sets into a single one in world coordinates, the material of
+    the first one is used. Returns the merged buffers, the object index of each merged set and
+    the offset table of their shape faces or edges: set k holds the global shape faces (or edges)
+    `offsets[k] + 1` to `offsets[k + 1]`, see `merged_source`.
+    """
+    first = buffers[0]
+    vertices = []
+    normals = []
+    faces = []
+    edge_ids = []
+    edge_offsets = [np.zeros(1, dtype=np.intp)]
+    counts = []
+    num_vertices = 0
+    for obj_buffers in buffers:
+        obj_vertices = world_vertices(obj_buffers)
+        obj_normals = np.asarray(obj_buffers.normals, dtype='float64')
+        if obj_buffers.quaternion:
+            obj_normals = rotate_vector(obj_buffers.quaternion, obj_normals)
+        vertices.append(obj_vertices.astype('float32'))
+        normals.append(obj_normals.astype('float32'))
+        if obj_buffers.is_line:
+            edge_ids.append(obj_buffers.edge_ids + sum(counts))
+            edge_offsets.append(np.asarray(obj_buffers.edge_offsets[1:]) + num_vertices)
+            counts.append(len(obj_buffers.edge_offsets) - 1)
+        else:
+            faces.append(np.asarray(obj_buffers.faces) + num_vertices)
+            counts.append(len(obj_buffers.part_index))
+        num_vertices += len(obj_vertices)
+    merged = first._replace(
+        vertices=np.concatenate(vertices).reshape(-1, 3),
+        faces=np.concatenate(faces).astype('int32') if faces else first.faces,
+        normals=np.concatenate(normals).reshape(-1, 3) if faces else first.normals,
+        part_index=np.concatenate([obj_buffers.part_index for obj_buffers in buffers]),
+        edge_ids=np.concatenate(edge_ids).astype('float32') if edge_ids else first.edge_ids,
+        edge_offsets=np.concatenate(edge_offsets) if edge_ids else first.edge_offsets,
+        translation=None, quaternion=None, object_index=-1)
+    sources = np.array([obj_buffers.object_index for obj_buffers in buffers], dtype=np.intp)
+    return merged, sources, np.concatenate([[0], np.cumsum(counts)]).astype(np.intp)
+
+def merged_source(merged_lookup: Tuple[np.ndarray, List[str]], index: int) -> Tuple[str, int]:
+    """
+    Returns the FreeCAD object name and its own shape face (or edge) index for the global
+    index of a merged object, using its `merged_lookup` of offset table and object names.
+    """
+    offsets, source_names = merged_lookup
+    source = int(np.searchsorted(offsets, index - 1, side='right')) - 1
+    return source_names[source], index - int(offsets[source])
+
+def tag_merged_object(obj3d: ThreeJSSceneGraphObjectType, sources: np.ndarray, offsets: np.ndarray,
+                      names: Union[List[str], None]=None) -> None:
+    """
+    Adds the `object_id` vertex attribute holding the object index of every vertex and the
+    `merged_lookup` used by the picker to a `Mesh` or `LineSegments` created from merged buffers.
+    """
+    attributes = obj3d.geometry.attributes
+    if isinstance(obj3d, Mesh):
+        triangles = np.arange(len(attributes["index"].array) // 3) + obj3d.triangle_offset
+        global_indices = np.searchsorted(obj3d.face_lookup[0], triangles, side='right')
+        vertex_indices = np.asarray(attributes["index"].array)
+        per_index = np.repeat(global_indices, 3)
+    else:
+        per_index = np.asarray(attributes["edge_index"].array).astype(np.intp) - 1
+        vertex_indices = np.arange(len(per_index))
+    object_ids = np.zeros(len(attributes["position"].array), dtype='float32')
+    object_ids[vertex_indices] = sources[np.searchsorted(offsets, per_index, side='right') - 1]
+    obj3d.geometry.attributes = dict(attributes, object_id=BufferAttribute(object_ids, normalized=False))
+    source_names = [names[index] if names and 0 <= index < len(names) else str(index) for index in sources]
+    obj3d.merged_lookup = (offsets, source_names)
+
 class RendererConfig():
     """Provides a safe configuration for the PyThreeJS renderer"""
     def __init__(self):
@@ -480,6 +1280,19 @@ class RendererConfig():
         self.view_width = 600
         self.view_height = 600
         self.selection_mode = "mousemove"
+        self.uint32_indices = True
+        self.highlight_mode = "overlay"
+        self.workers = 1
+        self.triangle_budget = None
+        self.lod_levels = 3
+        self.share_geometry = False
+        self.merge_materials = False
+        self.quantize_bits = None
+        self.weld_tolerance = None
+        self.memory_budget = None
+        self.picker_throttle = 0.0
+        self.picker_debounce = 0.0
+        self.skip_unchanged_hovers = False
     @property
     def show_mesh(self):
         return self._show_mesh
@@ -545,6 +1358,123 @@ class RendererConfig():
             self._selection_mode = value
         else:
             raise TypeError("Must be one of: {}, but got: {}".format(modes_with_none, value))
+    @property
+    def uint32_indices(self):
+        return self._uint32_indices
+    @uint32_indices.setter
+    def uint32_indices(self, value):
+        if isinstance(value, bool):
+            self._uint32_indices = value
+        else:
+            raise TypeError("Must be bool.")
+    @property
+    def highlight_mode(self):
+        return self._highlight_mode
+    @highlight_mode.setter
+    def highlight_mode(self, value):
+        if value in HIGHLIGHT_MODES:
+            self._highlight_mode = value
+        else:
+            raise TypeError("Must be one of: {}, but got: {}".format(HIGHLIGHT_MODES, value))
+    @property
+    def workers(self):
+        return self._workers
+    @workers.setter
+    def workers(self, value):
+        if isinstance(value, int) and value > 0:
+            self._workers = value
+        else:
+            raise TypeError("Must be int and > 0.")
+    @property
+    def triangle_budget(self):
+        return self._triangle_budget
+    @triangle_budget.setter
+    def triangle_budget(self, value):
+        if value is None or (isinstance(value, int) and value > 0):
+            self._triangle_budget = value
+        else:
+            raise TypeError("Must be None or int and > 0.")
+    @property
+    def lod_levels(self):
+        return self._lod_levels
+    @lod_levels.setter
+    def lod_levels(self, value):
+        if isinstance(value, int) and value > 0:
+            self._lod_levels = value
+        else:
+            raise TypeError("Must be int and > 0.")
+    @property
+    def share_geometry(self):
+        return self._share_geometry
+    @share_geometry.setter
+    def share_geometry(self, value):
+        if isinstance(value, bool):
+            self._share_geometry = value
+        else:
+            raise TypeError("Must be bool.")
+    @property
+    def merge_materials(self):
+        return self._merge_materials
+    @merge_materials.setter
+    def merge_materials(self, value):
+        if isinstance(value, bool):
+            self._merge_materials = value
+        else:
+            raise TypeError("Must be bool.")
+    @property
+    def quantize_bits(self):
+        return self._quantize_bits
+    @quantize_bits.setter
+    def quantize_bits(self, value):
+        if value is None or (isinstance(value, int) and value in QUANTIZE_BITS):
+            self._quantize_bits = value
+        else:
+            raise TypeError("Must be None or one of {}.".format(", ".join(str(bits) for bits in QUANTIZE_BITS)))
+    @property
+    def weld_tolerance(self):
+        return self._weld_tolerance
+    @weld_tolerance.setter
+    def weld_tolerance(self, value):
+        if value is None or (isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0):
+            self._weld_tolerance = value
+        else:
+            raise TypeError("Must be None or float and >= 0.")
+    @property
+    def memory_budget(self):
+        return self._memory_budget
+    @memory_budget.setter
+    def memory_budget(self, value):
+        if value is None or (isinstance(value, int) and value > 0):
+            self._memory_budget = value
+        else:
+            raise TypeError("Must be None or int and > 0.")
+    @property
+    def picker_throttle(self):
+        return self._picker_throttle
+    @picker_throttle.setter
+    def picker_throttle(self, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+            self._picker_throttle = value
+        else:
+            raise TypeError("Must be float and >= 0.")
+    @property
+    def picker_debounce(self):
+        return self._picker_debounce
+    @picker_debounce.setter
+    def picker_debounce(self, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+            self._picker_debounce = value
+        else:
+            raise TypeError("Must be float and >= 0.")
+    @property
+    def skip_unchanged_hovers(self):
+        return self._skip_unchanged_hovers
+    @skip_unchanged_hovers.setter
+    def skip_unchanged_hovers(self, value):
+        if isinstance(value, bool):
+            self._skip_unchanged_hovers = value
+        else:
+            raise TypeError("Must be bool.")
     def show_config(self):
         print(dict((x[0][1:], x[1]) for x in self.__dict__.items()))
         
@@ -558,72 +1488,716 @@ def render_objects(root_node: coin.SoSeparator,
     renderer, html = get_objects_renderer(root_node, names, renderer_config)
     return display(renderer, html)
 
-# TODO : Add displaying the FreeCAD object names to the renderer
 def get_objects_renderer(root_node: coin.SoSeparator,
                    names: List[str],
-                   renderer_config: RendererConfig=RendererConfig()) -> Tuple[Renderer, HTML]:
+                   renderer_config: RendererConfig=RendererConfig(),
+                   return_stats: bool=False) -> Union[Tuple[Renderer, HTML], Tuple[Renderer, HTML, RenderStats]]:
     """
     Return a `Renderer` and `HTML` for rendering any coin root node of a scene graph containing LineSets
-    or FaceSets inside Jupyter notebook.
+    or FaceSets inside Jupyter notebook. With `return_stats` a `RenderStats` is returned as well,
+    it keeps collecting picker latencies while the renderer is used.
+    """
+    stats = RenderStats() if return_stats else None
+    buffers = scene_buffers(root_node, renderer_config.workers, stats)
+    renderer, html = get_buffers_renderer(buffers, names, renderer_config, stats)
+    if return_stats:
+        return renderer, html, stats
+    return renderer, html
+
+def create_objects(buffers: List[GeometryBuffers],
+                   renderer_config: RendererConfig=RendererConfig(),
+                   names: Union[List[str], None]=None,
+                   first_index: int=0,
+                   total_triangles: Union[int, None]=None,
+                   instances: Union[dict, None]=None,
+                   stats: Union[RenderStats, None]=None,
+                   prepared: Union[Callable[[ThreeJSSceneGraphObjectType], None], None]=None)\
+                   -> Tuple[ThreeJSSceneGraphObjectListType, int]:
     """
-    view_width = renderer_config.view_width
-    view_height = renderer_config.view_height
-    geometries = Group()
-    part_indices = [] # contains the partIndex indices that relate triangle faces to shape faces
+    Return the pythreejs objects of all given geometry buffers, named `object_index i` with i
+    counting up from `first_index`, and the next unused i. `names` are the FreeCAD object names
+    by object index, they are shown when the object is selected. `prepared` is called with
+    every created `Mesh` and `LineSegments` once its picking attributes are set.
     
-    render_face_set = True
-    i = 0
-    for res in bfs_traversal(root_node, print_tree=False):
-        if isinstance(res[0], coin.SoIndexedFaceSet) and render_face_set:
-            render_face_set = False
-            continue
-        if isinstance(res[0], coin.SoIndexedFaceSet):
-            render_face_set = True
-            part_index_list = list(res[0].partIndex)
-            part_indices.append(part_index_list)
-        elif isinstance(res[0], coin.SoIndexedLineSet):
-            pass
+    If `renderer_config.triangle_budget` is set, face sets get levels of detail (see `create_lod`).
+    The budget is shared among them by their share of `total_triangles`, which defaults to the
+    triangles of all given buffers. The objects of a level are only created when it is shown,
+    with the same options as other objects.
+
+    If `renderer_config.weld_tolerance` is set, coincident vertices are welded first (see
+    `weld_buffers`) and the removed vertices are added to `stats.removed_vertices`.
+
+    If `renderer_config.quantize_bits` is set, positions, normals and indices are sent as small
+    integers (see `create_face_geom`), unless `show_normals` is set.
+
+    If `renderer_config.share_geometry` is set, buffers with the same `buffers_digest` share
+    one `BufferGeometry` and material (see `create_instance`). The first objects created for
+    a digest are kept in `instances`, pass the same dict to share across calls. Highlighting
+    with vertex colors changes the geometry, so sharing needs `highlight_mode="overlay"`
+    or no selection. It is off by default, hashing every buffer only pays off for documents
+    with repeated parts.
+    """
+    if renderer_config.weld_tolerance is not None:
+        welded = [weld_buffers(obj_buffers, renderer_config.weld_tolerance) for obj_buffers in buffers]
+        buffers = [obj_buffers for obj_buffers, _ in welded]
+        if stats is not None:
+            stats.removed_vertices += sum(removed for _, removed in welded)
+    budget = renderer_config.triangle_budget
+    if budget is not None and total_triangles is None:
+        total_triangles = sum(len(obj_buffers.faces) for obj_buffers in buffers)
+    share = renderer_config.share_geometry and (renderer_config.highlight_mode == "overlay"
+                                                or renderer_config.selection_mode is None)
+    # the normals helper reads the attribute values as they are
+    quantize_bits = None if renderer_config.show_normals else renderer_config.quantize_bits
+    if instances is None:
+        instances = {}
+    objects = []
+    i = first_index
+
+    def prepare(geoms, obj_buffers, name, label=None):
+        nonlocal i
+        for k, obj3d in enumerate(geoms):
+            if name:
+                obj3d.freecad_name = name
+            if label is None:
+                obj3d.name = str(obj_buffers.object_index) + " " + str(i) #the name of the object is `object_index i`
+                i += 1
+            else:
+                # objects of levels of detail are built later, they are numbered inside the i of their level
+                obj3d.name = "{} {}.{}".format(obj_buffers.object_index, label, k)
+            if isinstance(obj3d, Mesh) and not hasattr(obj3d, "face_lookup"):
+                obj3d.face_lookup = build_face_lookup(obj_buffers.part_index, obj3d.geometry.attributes["index"].array,
+                                                      obj3d.triangle_offset)
+            if prepared is not None:
+                prepared(obj3d)
+        return geoms
+
+    def build(obj_buffers, name, label=None):
+        """Returns the objects shown for the buffers, with normals helpers and as wireframe if configured."""
+        digest = buffers_digest(obj_buffers) if share else None
+        if digest in instances:
+            geoms = [create_instance(template, obj_buffers.translation, obj_buffers.quaternion)
+                     for template in instances[digest]]
         else:
-            continue
-        
-        geoms = create_geometry(res, show_edges=renderer_config.show_edges, show_faces=renderer_config.show_faces)
-        
-        for obj3d in geoms:
-            obj3d.name = str(res[3]) + " " + str(i) #the name of the object is `object_index i`
-            i += 1
-        
-        
+            geoms = create_geometry_from_buffers(obj_buffers, show_edges=renderer_config.show_edges,
+                                                 show_faces=renderer_config.show_faces,
+                                                 uint32_indices=renderer_config.uint32_indices,
+                                                 quantize_bits=quantize_bits)
+            if share:
+                instances[digest] = geoms
+        geoms = prepare(geoms, obj_buffers, name, label)
+
+        shown = []
         for geom in geoms:
             if renderer_config.show_normals:
                 helper = VertexNormalsHelper(geom)
-                geometries.add(helper)
+                shown.append(helper)
             if renderer_config.show_mesh and not isinstance(geom, Line):
-                geometries.add(get_line_geometries(geom))
+                shown.append(get_line_geometries(geom))
             else:
-                geometries.add(geom)
-    
+                shown.append(geom)
+        return shown
+
+    for obj_buffers in buffers:
+        name = ""
+        if names and obj_buffers.object_index < len(names):
+            name = names[obj_buffers.object_index]
+
+        if budget is not None and renderer_config.show_faces and not obj_buffers.is_line:
+            target = max(len(obj_buffers.faces) * budget // max(total_triangles, 1), LOD_MIN_TRIANGLES)
+            levels = lod_buffers(obj_buffers, target, renderer_config.lod_levels)
+            if len(levels) > 1 or len(levels[0].faces) < len(obj_buffers.faces):
+                def build_level(level, level_buffers, name=name, lod_index=i):
+                    return build(level_buffers, name, "{}.{}".format(lod_index, level))
+                i += 1
+                objects.append(create_lod(levels, obj_buffers, build_level))
+                continue
+
+        objects.extend(build(obj_buffers, name))
+    return objects, i
+
+def create_geometries(buffers: List[GeometryBuffers],
+                      renderer_config: RendererConfig=RendererConfig(),
+                      names: Union[List[str], None]=None,
+                      stats: Union[RenderStats, None]=None) -> Tuple[Group, PartIndicesType]:
+    """
+    Return a `Group` holding the pythreejs objects of all given geometry buffers and the
+    `partIndex` indices of the face sets among them.
+    """
+    with timed_stage(stats, "widgets"):
+        if renderer_config.merge_materials:
+            return create_merged_geometries(buffers, renderer_config, names, stats)
+        part_indices = [obj_buffers.part_index for obj_buffers in buffers if not obj_buffers.is_line]
+        objects, _ = create_objects(buffers, renderer_config, names, stats=stats)
+        return Group(children=objects), part_indices
+
+def create_merged_geometries(buffers: List[GeometryBuffers],
+                             renderer_config: RendererConfig=RendererConfig(),
+                             names: Union[List[str], None]=None,
+                             stats: Union[RenderStats, None]=None) -> Tuple[Group, PartIndicesType]:
+    """
+    Like `create_geometries`, but all face sets and all line sets of the same material are merged
+    into one object each (see `merge_buffers`), which cuts draw calls and widgets. The picker
+    maps the picked triangle or edge back to the FreeCAD object through `merged_lookup`.
+    """
+    groups = OrderedDict()
+    for obj_buffers in buffers:
+        key = (obj_buffers.is_line, tuple(obj_buffers.color), obj_buffers.transparency)
+        groups.setdefault(key, []).append(obj_buffers)
+    objects = []
+    part_indices = []
+    i = 0
+    for group in groups.values():
+        merged, sources, offsets = merge_buffers(group)
+        def tag(obj3d, sources=sources, offsets=offsets):
+            if hasattr(obj3d, "face_lookup") or hasattr(obj3d, "edge_offsets"):
+                tag_merged_object(obj3d, sources, offsets, names)
+        merged_objects, i = create_objects([merged], renderer_config, first_index=i, stats=stats, prepared=tag)
+        objects.extend(merged_objects)
+        if not merged.is_line:
+            part_indices.append(merged.part_index)
+    return Group(children=objects), part_indices
+
+def get_buffers_renderer(buffers: List[GeometryBuffers],
+                         names: List[str],
+                         renderer_config: RendererConfig=RendererConfig(),
+                         stats: Union[RenderStats, None]=None) -> Tuple[Renderer, HTML]:
+    """
+    Return a `Renderer` and `HTML` for rendering the given geometry buffers inside Jupyter notebook.
+    If `stats` is given, the object counts, stage timings and widget payload are recorded in it.
+
+    With `renderer_config.memory_budget` only the objects in view that fit into the budget get
+    their geometry, the others are bounding boxes (see `BudgetedViewer`, kept as `renderer.viewer`).
+    """
+    if renderer_config.memory_budget is not None:
+        with timed_stage(stats, "widgets"):
+            viewer = BudgetedViewer(buffers, names, renderer_config)
+        renderer, html = viewer.renderer, viewer.html
+        renderer.viewer = viewer
+    else:
+        geometries, part_indices = create_geometries(buffers, renderer_config, names, stats)
+        renderer, html = create_renderer(geometries, part_indices, renderer_config, stats)
+    if stats is not None:
+        stats.count_buffers(buffers, names)
+        stats.count_widgets(renderer)
+    return renderer, html
+
+def create_renderer(geometries: Group,
+                    part_indices: PartIndicesType,
+                    renderer_config: RendererConfig=RendererConfig(),
+                    stats: Union[RenderStats, None]=None) -> Tuple[Renderer, HTML]:
+    """
+    Return a `Renderer` showing the given `Group` of pythreejs objects and the `HTML`
+    displaying the current selection.
+    """
+    with timed_stage(stats, "renderer"):
+        view_width = renderer_config.view_width
+        view_height = renderer_config.view_height
         
-    light = PointLight(color="white", position=[40,40,40], intensity=1.0, castShadow=True)
-    ambient_light = AmbientLight(intensity=0.5)
-    camera = PerspectiveCamera(
-        position=[0, -40, 20], fov=40,
-        aspect=view_width/view_height)
-    children = [camera, light, ambient_light]
-    children.append(geometries)
-    scene = Scene(children=children)
-    scene.background = "#65659a"
+        light = PointLight(color="white", position=[40,40,40], intensity=1.0, castShadow=True)
+        ambient_light = AmbientLight(intensity=0.5)
+        camera = PerspectiveCamera(
+            position=[0, -40, 20], fov=40,
+            aspect=view_width/view_height)
+        children = [camera, light, ambient_light]
+        children.append(geometries)
+        scene = Scene(children=children)
+        scene.background = "#65659a"
  
-    controls = [OrbitControls(controlling=camera)]
-    html = HTML()
+        controls = [OrbitControls(controlling=camera)]
+        html = HTML()
 
-    if renderer_config.selection_mode:
-        html, picker = generate_picker(geometries, part_indices, "mousemove")
-        controls.append(picker)
+        if renderer_config.selection_mode:
+            html, picker = generate_picker(geometries, part_indices, renderer_config.selection_mode,
+                                           renderer_config.highlight_mode, stats, renderer_config.picker_throttle,
+                                           renderer_config.picker_debounce, renderer_config.skip_unchanged_hovers)
+            controls.append(picker)
+            if renderer_config.highlight_mode == "overlay":
+                scene.add([picker.face_overlay, picker.edge_overlay])
     
-    renderer = Renderer(camera=camera,
-                    scene=scene, controls=controls,
-                    width=view_width, height=view_height)
-    return (renderer, html)
+        if renderer_config.triangle_budget is not None:
+            def lod_callback(change):
+                """Switches the levels of detail when the camera moves."""
+                for obj in geometries.children:
+                    if hasattr(obj, "lod_levels"):
+                        update_lod(obj, camera.position)
+            camera.observe(lod_callback, names=["position"])
+            geometries.observe(lod_callback, names=["children"])
+            lod_callback(None)
+
+        renderer = Renderer(camera=camera,
+                        scene=scene, controls=controls,
+                        width=view_width, height=view_height)
+        return (renderer, html)
+
+def renderer_picker(renderer: Renderer) -> Union[Picker, None]:
+    """Returns the picker of a renderer of `create_renderer` or `None` if selection is disabled."""
+    for control in renderer.controls:
+        if isinstance(control, Picker):
+            return control
+    return None
+
+def object_widgets(obj3d: ThreeJSSceneGraphObjectType) -> List[Widget]:
+    """Returns the geometry, its attributes and the materials of a pythreejs object, which instances may share."""
+    geometry = getattr(obj3d, "geometry", None)
+    if geometry is None:
+        return []
+    materials = [obj3d.material, getattr(obj3d, "default_material", obj3d.material)]
+    return [geometry] + list(getattr(geometry, "attributes", {}).values()) + materials
+
+def release_objects(objects: ThreeJSSceneGraphObjectListType, picker: Union[Picker, None], html: HTML,
+                    instances: dict) -> None:
+    """
+    Prepares removing the pythreejs objects of `create_objects` from the scene: the selection of
+    the picker is cleared if it is on one of them and they are dropped as templates from `instances`.
+    The last hovered key of the picker is forgotten, a new object may take over the id of a removed one.
+    """
+    if picker is not None:
+        picker.last_event_key = None
+    if picker is not None and any(picker.last_object in lod_meshes(obj) for obj in objects):
+        # the selection is gone with the object
+        if hasattr(picker, "face_overlay"):
+            picker.face_overlay.visible = False
+            picker.edge_overlay.visible = False
+        picker.last_object = None
+        picker.shape_face_index_old = -1
+        html.value = "<b>No selection.</b>"
+    # don't keep removed objects alive as templates
+    removed = set(id(obj3d) for obj in objects for obj3d in lod_meshes(obj))
+    for digest in [digest for digest, templates in instances.items()
+                   if any(id(template) in removed for template in templates)]:
+        del instances[digest]
+
+def render_file(path: str, renderer_config: RendererConfig=RendererConfig()) -> DisplayHandle:
+    """
+    Return a DisplayHandle rendering the .FCStd file at `path` inside Jupyter notebook,
+    see `file_to_buffers`.
+    """
+    renderer, html = get_file_renderer(path, renderer_config)
+    return display(renderer, html)
+
+def get_file_renderer(path: str, renderer_config: RendererConfig=RendererConfig()) -> Tuple[Renderer, HTML]:
+    """
+    Return a `Renderer` and `HTML` for rendering the .FCStd file at `path` inside Jupyter notebook,
+    see `file_to_buffers`.
+    """
+    buffers, names = file_to_buffers(path, renderer_config.workers)
+    return get_buffers_renderer(buffers, names, renderer_config)
+
+# TODO : Add typing after finding out how to reference the document class
+def stream_order_key(obj, order: str="largest", camera_position: SoVectorType=(0, 0, 0)) -> float:
+    """
+    Returns the sort key of a document object for streaming it in the given order: `largest`
+    bounding box first, `nearest` bounding box center to the camera first or `document` order,
+    which keeps the order of a stable sort. Objects without a valid shape come last.
+    """
+    if order not in STREAM_ORDERS:
+        raise Exception("Given `order` parameter has to be one of {}, but was `{}`".format(STREAM_ORDERS, order))
+    shape = getattr(obj, "Shape", None)
+    if order == "document":
+        return 0.0
+    if shape is None or shape.isNull() or not shape.BoundBox.isValid():
+        return float("inf")
+    if order == "largest":
+        return -shape.BoundBox.DiagonalLength
+    center = shape.BoundBox.Center
+    return float(np.linalg.norm(np.subtract(tuple(center), camera_position)))
+
+class BVHTree(NamedTuple):
+    """
+    Bounding volume hierarchy over axis aligned boxes, see `build_bvh`. It is a complete binary
+    tree stored level by level, the root first: `box_min[level][k]` and `box_max[level][k]` bound
+    node k of a level and its children are nodes 2k and 2k + 1 of the next level. Leaf k holds
+    the primitives `order[k * leaf_size:(k + 1) * leaf_size]`, empty nodes have inverted boxes.
+    """
+    order: np.ndarray
+    leaf_size: int
+    box_min: List[np.ndarray]
+    box_max: List[np.ndarray]
+
+class IndexedObject(NamedTuple):
+    """
+    Triangles of the face sets of one object in world coordinates, the 1-based shape face of
+    each triangle (0 without `partIndex`) and the `BVHTree` over them, see `index_object`.
+    """
+    vertices: np.ndarray
+    triangles: np.ndarray
+    faces: np.ndarray
+    tree: BVHTree
+
+class QueryHits(NamedTuple):
+    """
+    Results of a batch of `GeometryIndex.ray` or `GeometryIndex.nearest` queries, one entry per
+    query: the distance (`inf` without a hit), the hit point (`nan` without a hit), the object name
+    (`None` without a hit) and the 1-based shape face (0 without a hit).
+    """
+    distance: np.ndarray
+    point: np.ndarray
+    objects: List[Union[str, None]]
+    faces: np.ndarray
+
+def morton_codes(points: np.ndarray) -> np.ndarray:
+    """
+    Returns the 30 bit Morton codes of (N, 3) points on a grid of 1024^3 cells over their bounds.
+    """
+    lower = points.min(axis=0)
+    extent = points.max(axis=0) - lower
+    extent[extent == 0] = 1
+    cells = np.clip(((points - lower) / extent * 1024).astype(np.int64), 0, 1023).astype(np.uint64)
+    # spreads the 10 bits of each coordinate to every third bit
+    for shift, mask in [(16, 0x030000FF), (8, 0x0300F00F), (4, 0x030C30C3), (2, 0x09249249)]:
+        cells = (cells | (cells << np.uint64(shift))) & np.uint64(mask)
+    return (cells[:, 0] << np.uint64(2)) | (cells[:, 1] << np.uint64(1)) | cells[:, 2]
+
+def build_bvh(prim_min: np.ndarray, prim_max: np.ndarray, leaf_size: int=BVH_LEAF_SIZE) -> BVHTree:
+    """
+    Returns a `BVHTree` over N primitives given by the (N, 3) corners of their boxes.
+    The primitives are sorted along the Morton curve of their centers and grouped into leaves of
+    `leaf_size`, then the node boxes are reduced level by level. Building takes one sort and
+    a few vectorized passes, there are no Python loops over nodes.
+    """
+    prim_min = np.asarray(prim_min, dtype='float64').reshape(-1, 3)
+    prim_max = np.asarray(prim_max, dtype='float64').reshape(-1, 3)
+    if len(prim_min) == 0:
+        return BVHTree(np.zeros(0, dtype=np.intp), leaf_size, [np.full((1, 3), np.inf)], [np.full((1, 3), -np.inf)])
+    order = np.argsort(morton_codes((prim_min + prim_max) / 2), kind='stable')
+    starts = np.arange(0, len(order), leaf_size)
+    num_nodes = 1 << int(len(starts) - 1).bit_length()
+    box_min = np.full((num_nodes, 3), np.inf)
+    box_max = np.full((num_nodes, 3), -np.inf)
+    box_min[:len(starts)] = np.minimum.reduceat(prim_min[order], starts)
+    box_max[:len(starts)] = np.maximum.reduceat(prim_max[order], starts)
+    levels_min = [box_min]
+    levels_max = [box_max]
+    while len(levels_min[0]) > 1:
+        levels_min.insert(0, np.minimum(levels_min[0][0::2], levels_min[0][1::2]))
+        levels_max.insert(0, np.maximum(levels_max[0][0::2], levels_max[0][1::2]))
+    return BVHTree(order, leaf_size, levels_min, levels_max)
+
+def bvh_candidates(tree: BVHTree, query_ids: np.ndarray, node_test) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Traverses the tree for a batch of queries at once and returns the pairs of query id and
+    primitive index of the leaves that passed `node_test`. A frontier of (query, node) pairs moves
+    down one level per step, `node_test(query_ids, box_min, box_max)` returns the mask of the pairs
+    to keep. Every query takes one step per level, O(log N), and only expands the nodes it keeps.
+    """
+    query_ids = np.asarray(query_ids, dtype=np.intp)
+    nodes = np.zeros(len(query_ids), dtype=np.intp)
+    for level, (box_min, box_max) in enumerate(zip(tree.box_min, tree.box_max)):
+        if level:
+            query_ids = np.repeat(query_ids, 2)
+            nodes = (2 * nodes[:, None] + np.arange(2)).ravel()
+        lower = box_min[nodes]
+        upper = box_max[nodes]
+        keep = lower[:, 0] <= upper[:, 0]
+        keep[keep] = node_test(query_ids[keep], lower[keep], upper[keep])
+        query_ids = query_ids[keep]
+        nodes = nodes[keep]
+    primitives = nodes[:, None] * tree.leaf_size + np.arange(tree.leaf_size)
+    valid = primitives < len(tree.order)
+    return np.broadcast_to(query_ids[:, None], primitives.shape)[valid], tree.order[primitives[valid]]
+
+def min_per_query(query_ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Returns the positions of the smallest value of each query id in the pair arrays."""
+    order = np.lexsort((values, query_ids))
+    sorted_ids = query_ids[order]
+    return order[np.concatenate([[True], sorted_ids[1:] != sorted_ids[:-1]])] if len(order) else order
+
+def ray_box_hits(origins: np.ndarray, directions: np.ndarray, max_distances: np.ndarray,
+                 box_min: np.ndarray, box_max: np.ndarray) -> np.ndarray:
+    """
+    Returns which rays hit their box within `max_distances`, using the slab test.
+    """
+    parallel = directions == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        near = (box_min - origins) / directions
+        far = (box_max - origins) / directions
+    inside = (box_min <= origins) & (origins <= box_max)
+    lower = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(near, far))
+    upper = np.where(parallel, np.inf, np.maximum(near, far))
+    return np.maximum(lower.max(axis=1), 0) <= np.minimum(upper.min(axis=1), max_distances)
+
+def ray_triangle_distances(origins: np.ndarray, directions: np.ndarray,
+                           a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    Returns the distances along the rays to their triangles (a, b, c), `inf` where a ray misses,
+    using the Möller-Trumbore test. Directions must be unit vectors.
+    """
+    edge1 = b - a
+    edge2 = c - a
+    p = np.cross(directions, edge2)
+    det = np.einsum('ij,ij->i', edge1, p)
+    s = origins - a
+    q = np.cross(s, edge1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u = np.einsum('ij,ij->i', s, p) / det
+        v = np.einsum('ij,ij->i', directions, q) / det
+        t = np.einsum('ij,ij->i', edge2, q) / det
+    scale = np.linalg.norm(edge1, axis=1) * np.linalg.norm(edge2, axis=1)
+    hit = (np.abs(det) > 1e-12 * scale) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+    return np.where(hit, t, np.inf)
+
+def closest_points_on_triangles(points: np.ndarray, a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    Returns the point of each triangle (a, b, c) closest to its point, by the Voronoi
+    regions of its vertices and edges (Ericson, Real-Time Collision Detection, 5.1.5).
+    """
+    def dot(u, v):
+        return np.einsum('ij,ij->i', u, v)
+    ab = b - a
+    ac = c - a
+    bc = c - b
+    ap = points - a
+    bp = points - b
+    cp = points - c
+    d1, d2 = dot(ab, ap), dot(ac, ap)
+    d3, d4 = dot(ab, bp), dot(ac, bp)
+    d5, d6 = dot(ab, cp), dot(ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = va + vb + vc
+        closest = a + ab * (vb / total)[:, None] + ac * (vc / total)[:, None]
+        regions = [ # lowest priority first
+            ((va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0), b + bc * ((d4 - d3) / ((d4 - d3) + (d5 - d6)))[:, None]),
+            ((vb <= 0) & (d2 >= 0) & (d6 <= 0), a + ac * (d2 / (d2 - d6))[:, None]),
+            ((d6 >= 0) & (d5 <= d6), c),
+            ((vc <= 0) & (d1 >= 0) & (d3 <= 0), a + ab * (d1 / (d1 - d3))[:, None]),
+            ((d3 >= 0) & (d4 <= d3), b),
+            ((d1 <= 0) & (d2 <= 0), a),
+        ]
+    for mask, region_points in regions:
+        closest = np.where(mask[:, None], region_points, closest)
+    return closest
+
+def index_object(buffers: List[GeometryBuffers], leaf_size: int=BVH_LEAF_SIZE) -> IndexedObject:
+    """
+    Returns the `IndexedObject` of the face sets among the geometry buffers of one object.
+    Shape faces of further face sets continue the numbering of the previous ones.
+    """
+    vertices = []
+    triangles = []
+    faces = []
+    num_vertices = 0
+    num_faces = 0
+    for obj_buffers in buffers:
+        if obj_buffers.is_line or len(obj_buffers.faces) == 0:
+            continue
+        obj_faces = np.asarray(obj_buffers.faces, dtype=np.intp).reshape(-1, 3)
+        vertices.append(world_vertices(obj_buffers))
+        triangles.append(obj_faces + num_vertices)
+        if len(obj_buffers.part_index):
+            triangle_ends = np.cumsum(obj_buffers.part_index)
+            faces.append(np.searchsorted(triangle_ends, np.arange(len(obj_faces)), side='right') + 1 + num_faces)
+            num_faces += len(obj_buffers.part_index)
+        else:
+            faces.append(np.zeros(len(obj_faces), dtype=np.intp))
+        num_vertices += len(vertices[-1])
+    if not triangles:
+        vertices = np.zeros((0, 3))
+        triangles = np.zeros((0, 3), dtype=np.intp)
+        faces = np.zeros(0, dtype=np.intp)
+    else:
+        vertices = np.concatenate(vertices)
+        triangles = np.concatenate(triangles)
+        faces = np.concatenate(faces)
+    corners = vertices[triangles]
+    return IndexedObject(vertices, triangles, faces, build_bvh(corners.min(axis=1), corners.max(axis=1), leaf_size))
+
+class GeometryIndex():
+    """
+    Spatial index over the triangles of FreeCAD objects for analysis in notebooks: ray hits
+    (`ray`), faces in boxes (`boxes`, `box`) and closest faces (`nearest`). All queries take
+    batches and name the object and its 1-based shape face, found through `partIndex`.
+
+    Every object has its own `BVHTree` in world coordinates and a small tree over the object
+    bounds is put on top, so `update_document` and `set_object` only rebuild the trees of the
+    objects that changed and the top tree:
+
+    >>>index = GeometryIndex(doc)
+    >>>hits = index.ray([(0, 0, 100)], [(0, 0, -1)])
+    >>>hits.objects[0], hits.faces[0]
+    ('Box', 6)
+    >>>box.Length = 20
+    >>>doc.recompute()
+    >>>index.update_document()
+    ([], [], ['Box'])
+    """
+    # TODO : Add typing after finding out how to reference the document class
+    def __init__(self, doc=None, cache: Union[GeometryCache, None]=GEOMETRY_CACHE, leaf_size: int=BVH_LEAF_SIZE):
+        self.doc = doc
+        self.cache = cache
+        self.leaf_size = leaf_size
+        self._objects = OrderedDict() # object name -> (stamp, IndexedObject)
+        self._top = None # (BVHTree over the object bounds, object names), built when queried
+        if doc is not None:
+            self.update_document()
+    @property
+    def names(self) -> List[str]:
+        """The names of the indexed objects."""
+        return list(self._objects)
+    def set_object(self, name: str, buffers: List[GeometryBuffers], stamp: Any=None) -> None:
+        """Indexes or re-indexes the object from its geometry buffers."""
+        self._objects[name] = (stamp, index_object(buffers, self.leaf_size))
+        self._top = None
+    def remove_object(self, name: str) -> None:
+        """Removes the object from the index."""
+        del self._objects[name]
+        self._top = None
+    def update_document(self) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Re-indexes the objects of the document that changed since they were indexed, see
+        `object_stamp`. Returns the names of the added, removed and replaced objects.
+        """
+        names = set(obj.Name for obj in self.doc.Objects)
+        removed = [name for name in self._objects if name not in names]
+        for name in removed:
+            self.remove_object(name)
+        changed = []
+        for obj in self.doc.Objects:
+            stamp = object_stamp(obj)
+            indexed = self._objects.get(obj.Name)
+            if indexed is None or stamp is None or indexed[0] != stamp:
+                changed.append((obj, stamp))
+        added = []
+        replaced = []
+        for (obj, stamp), obj_buffers in zip(changed, objects_to_buffers([obj for obj, _ in changed], self.cache)):
+            (replaced if obj.Name in self._objects else added).append(obj.Name)
+            self.set_object(obj.Name, obj_buffers, stamp)
+        return added, removed, replaced
+    def ray(self, origins: np.ndarray, directions: np.ndarray, max_distance: float=np.inf) -> QueryHits:
+        """Returns the first hits of the rays given by (N, 3) origins and directions."""
+        origins = np.asarray(origins, dtype='float64').reshape(-1, 3)
+        directions = np.asarray(directions, dtype='float64').reshape(-1, 3)
+        directions = directions / np.linalg.norm(directions, axis=1)[:, None]
+        best = np.full(len(origins), float(max_distance))
+        def node_test(query_ids, box_min, box_max):
+            return ray_box_hits(origins[query_ids], directions[query_ids], best[query_ids], box_min, box_max)
+        def exact(query_ids, a, b, c):
+            return ray_triangle_distances(origins[query_ids], directions[query_ids], a, b, c)
+        objects, faces, _ = self._closest(len(origins), node_test, exact, best)
+        distance = np.where(faces >= 0, best, np.inf)
+        with np.errstate(invalid='ignore'):
+            points = np.where((faces >= 0)[:, None], origins + directions * best[:, None], np.nan)
+        return QueryHits(distance, points, objects, np.maximum(faces, 0))
+    def nearest(self, points: np.ndarray, max_distance: float=np.inf) -> QueryHits:
+        """Returns the closest points on the indexed objects to the (N, 3) points."""
+        points = np.asarray(points, dtype='float64').reshape(-1, 3)
+        best = np.full(len(points), float(max_distance)**2) # squared distances
+        def node_test(query_ids, box_min, box_max):
+            query_points = points[query_ids]
+            lower = np.square(np.maximum(np.maximum(box_min - query_points, query_points - box_max), 0)).sum(axis=1)
+            # every point in the box is closer than its farthest corner
+            upper = np.square(np.maximum(np.abs(query_points - box_min), np.abs(query_points - box_max))).sum(axis=1)
+            np.minimum.at(best, query_ids, upper)
+            return lower <= best[query_ids]
+        def exact(query_ids, a, b, c):
+            return np.square(closest_points_on_triangles(points[query_ids], a, b, c) - points[query_ids]).sum(axis=1)
+        objects, faces, triangles = self._closest(len(points), node_test, exact, best, strict=False)
+        distance = np.where(faces >= 0, np.sqrt(best), np.inf)
+        closest = np.full(points.shape, np.nan)
+        object_names = np.array(objects, dtype=object)
+        for name in set(objects) - {None}:
+            # recomputed for the winning triangles only
+            query_ids = np.flatnonzero(object_names == name)
+            indexed = self._objects[name][1]
+            a, b, c = indexed.vertices[indexed.triangles[triangles[query_ids]]].transpose(1, 0, 2)
+            closest[query_ids] = closest_points_on_triangles(points[query_ids], a, b, c)
+        return QueryHits(distance, closest, objects, np.maximum(faces, 0))
+    def boxes(self, box_min: np.ndarray, box_max: np.ndarray, inside: bool=False) -> List[List[Tuple[str, int]]]:
+        """
+        Returns the sorted (object name, shape face) of the faces in each of the boxes given by
+        their (N, 3) corners. By default faces with a triangle whose bounds overlap the box
+        count, with `inside` only faces whose triangles all lie inside the box.
+        """
+        if not isinstance(inside, bool):
+            raise TypeError("Must be bool.")
+        box_min = np.asarray(box_min, dtype='float64').reshape(-1, 3)
+        box_max = np.asarray(box_max, dtype='float64').reshape(-1, 3)
+        def node_test(query_ids, lower, upper):
+            return np.all((lower <= box_max[query_ids]) & (upper >= box_min[query_ids]), axis=1)
+        results = [set() for _ in range(len(box_min))]
+        for name, indexed, query_ids, triangles in self._candidates(len(box_min), node_test):
+            corners = indexed.vertices[indexed.triangles[triangles]]
+            lower = box_min[query_ids][:, None]
+            upper = box_max[query_ids][:, None]
+            faces = indexed.faces[triangles]
+            if inside:
+                contained = np.all((corners >= lower) & (corners <= upper), axis=(1, 2))
+                # a face lies inside if all of its triangles do
+                pairs, counts = np.unique(np.stack([query_ids[contained], faces[contained]]), axis=1,
+                                          return_counts=True)
+                pairs = pairs[:, counts == np.bincount(indexed.faces)[pairs[1]]]
+            else:
+                overlap = np.all((corners.min(axis=1) <= upper[:, 0]) & (corners.max(axis=1) >= lower[:, 0]), axis=1)
+                pairs = np.unique(np.stack([query_ids[overlap], faces[overlap]]), axis=1)
+            for query_id, face in pairs.T.tolist():
+                results[query_id].add((name, face))
+        return [sorted(result) for result in results]
+    def box(self, box_min: SoVectorType, box_max: SoVectorType, inside: bool=False) -> List[Tuple[str, int]]:
+        """Returns the faces in a single box, see `boxes`."""
+        return self.boxes(box_min, box_max, inside)[0]
+    def _top_tree(self) -> Tuple[BVHTree, List[str]]:
+        if self._top is None:
+            names = [name for name, (_, indexed) in self._objects.items() if len(indexed.triangles)]
+            roots = [self._objects[name][1].tree for name in names]
+            self._top = (build_bvh(np.array([tree.box_min[0][0] for tree in roots]).reshape(-1, 3),
+                                   np.array([tree.box_max[0][0] for tree in roots]).reshape(-1, 3)), names)
+        return self._top
+    def _candidates(self, num_queries: int, node_test) -> Iterator[Tuple[str, IndexedObject, np.ndarray, np.ndarray]]:
+        """
+        Yields the name, `IndexedObject`, query ids and triangles of the candidate pairs of each
+        object the top tree finds for the queries. Objects are traversed one after the other, so
+        `node_test` sees what the caller learned from the previous objects.
+        """
+        tree, names = self._top_tree()
+        query_ids, objects = bvh_candidates(tree, np.arange(num_queries), node_test)
+        for obj in np.unique(objects):
+            indexed = self._objects[names[obj]][1]
+            obj_query_ids, triangles = bvh_candidates(indexed.tree, query_ids[objects == obj], node_test)
+            yield names[obj], indexed, obj_query_ids, triangles
+    def _closest(self, num_queries: int, node_test, exact, best: np.ndarray,
+                 strict: bool=True) -> Tuple[List[Union[str, None]], np.ndarray, np.ndarray]:
+        """
+        Keeps the smallest `exact(query_ids, a, b, c)` value of the candidate triangles of each
+        query in `best` and returns the object names, shape faces (-1 for none) and triangle
+        indices of the winners.
+        """
+        objects = [None] * num_queries
+        faces = np.full(num_queries, -1, dtype=np.intp)
+        nearest_triangles = np.zeros(num_queries, dtype=np.intp)
+        for name, indexed, query_ids, triangles in self._candidates(num_queries, node_test):
+            a, b, c = indexed.vertices[indexed.triangles[triangles]].transpose(1, 0, 2)
+            values = exact(query_ids, a, b, c)
+            winners = min_per_query(query_ids, values)
+            current = best[query_ids[winners]]
+            # the node bounds of `nearest` may already equal the exact distance
+            winners = winners[values[winners] < current if strict else values[winners] <= current]
+            best[query_ids[winners]] = values[winners]
+            faces[query_ids[winners]] = indexed.faces[triangles[winners]]
+            nearest_triangles[query_ids[winners]] = triangles[winners]
+            for query_id in query_ids[winners].tolist():
+                objects[query_id] = name
+        return objects, faces, nearest_triangles
+    def __len__(self):
+        return len(self._objects)
+    def __contains__(self, name):
+        return name in self._objects
+
+def buffers_to_index(buffers: List[GeometryBuffers], names: List[str], leaf_size: int=BVH_LEAF_SIZE) -> GeometryIndex:
+    """
+    Returns a `GeometryIndex` of geometry buffers, e.g. from `document_to_buffers` or
+    `file_to_buffers`, with the objects named by `names`.
+    """
+    index = GeometryIndex(cache=None, leaf_size=leaf_size)
+    by_object = OrderedDict()
+    for obj_buffers in buffers:
+        by_object.setdefault(obj_buffers.object_index, []).append(obj_buffers)
+    for object_index, obj_buffers in by_object.items():
+        name = names[object_index] if names and 0 <= object_index < len(names) else str(object_index)
+        index.set_object(name, obj_buffers)
+    return index
 
 # TODO : Add typing after finding out how to reference the document class
 def document_to_scene_graph(doc) -> Tuple[coin.SoSeparator, List[str]]:
@@ -635,13 +2209,366 @@ def document_to_scene_graph(doc) -> Tuple[coin.SoSeparator, List[str]]:
         names.append(obj.Name)
     return root, names
 
+class DocumentViewer():
+    """
+    Persistent viewer of a FreeCAD document inside Jupyter notebook.
+    
+    The renderer, camera and picker are created once. `update` compares the document with
+    what is shown and only converts, adds, removes or replaces the objects that changed,
+    so iterating on a model keeps the view and doesn't need a new output cell:
+    
+    >>>viewer = DocumentViewer(doc)
+    >>>viewer.show()
+    >>>box.Length = 20
+    >>>doc.recompute()
+    >>>viewer.update()
+    (['Box'], [], [])
+    
+    With `stream_order` the viewer starts empty and the objects are added in batches in that
+    order by an asyncio task, see `stream`.
+    """
+    # TODO : Add typing after finding out how to reference the document class
+    def __init__(self, doc, renderer_config: RendererConfig=RendererConfig(),
+                 cache: Union[GeometryCache, None]=GEOMETRY_CACHE, stream_order: Union[str, None]=None):
+        self.doc = doc
+        self.renderer_config = renderer_config
+        self.cache = cache
+        self.geometries = Group()
+        self.renderer, self.html = create_renderer(self.geometries, [], renderer_config)
+        self.progress = IntProgress(min=0, max=0, description="Loading")
+        self.progress.layout.display = "none"
+        self.task = None
+        self._shown = {} # object name -> (stamp, pythreejs objects)
+        self._triangles = {} # object name -> number of triangles
+        self._next_index = 0
+        self._instances = {} # buffers digest -> objects whose geometry is shared, see `create_objects`
+        if stream_order is not None:
+            self.stream(stream_order)
+        else:
+            self.update()
+    @property
+    def picker(self) -> Union[Picker, None]:
+        """The picker of the renderer or `None` if selection is disabled."""
+        return renderer_picker(self.renderer)
+    def update(self) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Updates the shown objects to the current state of the document.
+        Returns the names of the added, removed and replaced objects.
+        An unfinished `stream` task is cancelled.
+        """
+        self.cancel()
+        names, removed, changed = self._changes()
+        converted = objects_to_buffers([obj for _, obj, _ in changed], self.cache, self.renderer_config.workers)
+        added, replaced = self._show_converted(names, changed, converted)
+        return added, removed, replaced
+    async def update_async(self, order: str="largest",
+                           batch_seconds: float=STREAM_BATCH_SECONDS) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Like `update`, but converts and adds the changed objects in batches in the given order
+        (see `stream_order_key`) and returns control to the event loop after each batch, so the
+        kernel stays responsive and the browser shows every batch as it lands. A batch ends
+        after the first object that exceeds `batch_seconds`. `progress` shows the converted objects.
+
+        With a triangle budget the objects of a batch share it by the triangles converted so far.
+        """
+        names, removed, changed = self._changes()
+        camera_position = tuple(self.renderer.camera.position)
+        changed.sort(key=lambda change: stream_order_key(change[1], order, camera_position))
+        self.progress.max = len(changed)
+        self.progress.value = 0
+        self.progress.layout.display = None if changed else "none"
+        added = []
+        replaced = []
+        try:
+            while changed:
+                start = time.perf_counter()
+                batch = []
+                converted = []
+                while changed and (not batch or time.perf_counter() - start < batch_seconds):
+                    batch.append(changed.pop(0))
+                    converted.extend(objects_to_buffers([batch[-1][1]], self.cache, self.renderer_config.workers))
+                batch_added, batch_replaced = self._show_converted(names, batch, converted)
+                added.extend(batch_added)
+                replaced.extend(batch_replaced)
+                self.progress.value += len(batch)
+                await asyncio.sleep(0)
+        finally:
+            self.progress.layout.display = "none"
+        return added, removed, replaced
+    def stream(self, order: str="largest", batch_seconds: float=STREAM_BATCH_SECONDS) -> asyncio.Task:
+        """
+        Starts `update_async` as task on the event loop of the kernel and returns it,
+        an unfinished task of an earlier call is cancelled. The task is kept as `task`.
+        """
+        if order not in STREAM_ORDERS:
+            raise Exception("Given `order` parameter has to be one of {}, but was `{}`".format(STREAM_ORDERS, order))
+        self.cancel()
+        self.task = asyncio.get_event_loop().create_task(self.update_async(order, batch_seconds))
+        return self.task
+    def cancel(self) -> None:
+        """Cancels an unfinished `stream` task, the objects added so far stay."""
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            self.progress.layout.display = "none"
+        self.task = None
+    def show(self) -> DisplayHandle:
+        """Return a DisplayHandle rendering the viewer inside Jupyter notebook."""
+        return display(self.renderer, self.html, self.progress)
+    def _ipython_display_(self):
+        self.show()
+    def _changes(self) -> Tuple[List[str], List[str], List[Tuple[int, Any, Any]]]:
+        """
+        Removes the objects that are gone from the document. Returns the names of the document
+        objects, the removed names and the (object index, object, stamp) of objects to convert.
+        Objects are compared by `object_stamp`, shapes or not. Only while no `CHANGE_TRACKER`
+        is registered all of them are converted again.
+        """
+        names = [obj.Name for obj in self.doc.Objects]
+        current = set(names)
+        removed = [name for name in self._shown if name not in current]
+        for name in removed:
+            self._remove(name)
+            self._triangles.pop(name, None)
+
+        changed = []
+        for object_index, obj in enumerate(self.doc.Objects):
+            stamp = object_stamp(obj)
+            shown = self._shown.get(obj.Name)
+            if shown is None or stamp is None or shown[0] != stamp:
+                changed.append((object_index, obj, stamp))
+        return names, removed, changed
+    def _show_converted(self, names: List[str], changed: List[Tuple[int, Any, Any]],
+                        converted: List[List[GeometryBuffers]]) -> Tuple[List[str], List[str]]:
+        """Adds or replaces the converted objects and returns the added and replaced names."""
+        added = []
+        replaced = []
+        for (_, obj, _), obj_buffers in zip(changed, converted):
+            self._triangles[obj.Name] = sum(len(geometry.faces) for geometry in obj_buffers)
+        total_triangles = sum(self._triangles.get(name, 0) for name in names)
+        for (object_index, obj, stamp), obj_buffers in zip(changed, converted):
+            buffers = [geometry._replace(object_index=object_index) for geometry in obj_buffers]
+            objects, self._next_index = create_objects(buffers, self.renderer_config, names, self._next_index,
+                                                       total_triangles, self._instances)
+            if obj.Name in self._shown:
+                self._remove(obj.Name)
+                replaced.append(obj.Name)
+            else:
+                added.append(obj.Name)
+            self.geometries.add(objects)
+            self._shown[obj.Name] = (stamp, objects)
+        return added, replaced
+    def _remove(self, name: str):
+        _, objects = self._shown.pop(name)
+        release_objects(objects, self.picker, self.html, self._instances)
+        self.geometries.remove(objects)
+
+class BudgetedViewer():
+    """
+    Viewer of assemblies whose geometry doesn't fit into the memory of the browser at once.
+
+    Every object starts as wireframe bounding box (see `create_proxy`). The objects in view get
+    their geometry, the largest on screen first, as long as the bytes of their buffers
+    (`GeometryBuffers.nbytes`) fit into `renderer_config.memory_budget` together. The view is
+    checked whenever the camera moves, picking a box loads its object and `load` loads objects
+    by name. Beyond the budget the least recently viewed objects turn back into boxes and their
+    widgets are closed, which frees them in the browser.
+
+    The budget only covers the browser. The kernel keeps the buffers of all objects, so they
+    can be loaded again, and closed widgets are freed there once nothing refers to them.
+
+    >>>buffers, names = document_to_buffers(doc)
+    >>>config = RendererConfig()
+    >>>config.memory_budget = 256 * 2**20
+    >>>viewer = BudgetedViewer(buffers, names, config)
+    >>>viewer.show()
+    >>>viewer.load(["Bolt042"])
+    ['Bolt042']
+    """
+    def __init__(self, buffers: List[GeometryBuffers], names: List[str],
+                 renderer_config: RendererConfig=RendererConfig()):
+        if renderer_config.memory_budget is None:
+            raise Exception("`renderer_config.memory_budget` has to be set for a `BudgetedViewer`.")
+        self.renderer_config = renderer_config
+        self.names = names
+        self._buffers = OrderedDict() # object name -> geometry buffers
+        for obj_buffers in buffers:
+            name = str(obj_buffers.object_index)
+            if names and obj_buffers.object_index < len(names):
+                name = names[obj_buffers.object_index]
+            self._buffers.setdefault(name, []).append(obj_buffers)
+        self._costs = dict((name, sum(geometry.nbytes for geometry in obj_buffers))
+                           for name, obj_buffers in self._buffers.items())
+        self._total_triangles = sum(len(obj_buffers.faces) for obj_buffers in buffers)
+        bounds = [object_bounds(obj_buffers) for obj_buffers in self._buffers.values()]
+        lower = np.array([box[0] for box in bounds]).reshape(-1, 3)
+        upper = np.array([box[1] for box in bounds]).reshape(-1, 3)
+        self._centers = (lower + upper) / 2
+        self._radii = np.linalg.norm(upper - lower, axis=1) / 2
+        template = create_proxy_template()
+        self._proxies = OrderedDict() # object name -> bounding box
+        for name, box_min, box_max in zip(self._buffers, lower, upper):
+            proxy = create_proxy(template, box_min, box_max)
+            proxy.proxy_name = name
+            proxy.freecad_name = name
+            self._proxies[name] = proxy
+        self._loaded = OrderedDict() # object name -> pythreejs objects, least recently viewed first
+        self._released = [] # objects of unloaded objects, closed after they left the scene
+        self._next_index = 0
+        self._instances = {} # buffers digest -> objects whose geometry is shared, see `create_objects`
+        self.loaded_bytes = 0
+        self.geometries = Group(children=list(self._proxies.values()))
+        self.renderer, self.html = create_renderer(self.geometries, [], renderer_config)
+        self.renderer.camera.observe(self._camera_moved, names=["position"])
+        if self.picker is not None:
+            self.picker.observe(self._picked, names=["point"])
+        self.update_view()
+    @property
+    def picker(self) -> Union[Picker, None]:
+        """The picker of the renderer or `None` if selection is disabled."""
+        return renderer_picker(self.renderer)
+    @property
+    def loaded(self) -> List[str]:
+        """The names of the objects shown with their geometry, least recently viewed first."""
+        return list(self._loaded)
+    def load(self, names: List[str]) -> List[str]:
+        """
+        Shows the geometry of the named objects and marks them as viewed most recently, the later
+        names more recently. The least recently viewed other objects are unloaded while the budget
+        is exceeded, the named objects are loaded even if they alone exceed it.
+        Returns the names of the objects that weren't loaded before.
+        """
+        added = []
+        shown = []
+        hidden = []
+        for name in names:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                continue
+            objects, self._next_index = create_objects(self._buffers[name], self.renderer_config, self.names,
+                                                       self._next_index, self._total_triangles, self._instances)
+            self._loaded[name] = objects
+            self.loaded_bytes += self._costs[name]
+            hidden.append(self._proxies[name])
+            shown.extend(objects)
+            added.append(name)
+        keep = set(names)
+        evicted = [name for name in self._loaded if name not in keep]
+        while evicted and self.loaded_bytes > self.renderer_config.memory_budget:
+            name = evicted.pop(0)
+            hidden.extend(self._loaded[name])
+            shown.append(self._proxies[name])
+            self._release(name)
+        self._swap(hidden, shown)
+        return added
+    def unload(self, names: List[str]) -> None:
+        """Shows the named objects as bounding boxes again."""
+        hidden = []
+        shown = []
+        for name in names:
+            if name in self._loaded:
+                hidden.extend(self._loaded[name])
+                shown.append(self._proxies[name])
+                self._release(name)
+        self._swap(hidden, shown)
+    def update_view(self) -> List[str]:
+        """
+        Loads the objects in view of the camera (see `objects_in_view`), the largest on screen
+        first, as long as they fit into the budget together. Returns the newly loaded names.
+        """
+        camera = self.renderer.camera
+        controls = self.renderer.controls[0]
+        names = list(self._buffers)
+        wanted = []
+        total = 0
+        for i in objects_in_view(self._centers, self._radii, camera.position, controls.target,
+                                 camera.fov, camera.aspect):
+            cost = self._costs[names[i]]
+            if total + cost <= self.renderer_config.memory_budget:
+                wanted.append(names[i])
+                total += cost
+        # the largest on screen are viewed most recently
+        return self.load(wanted[::-1])
+    def show(self) -> DisplayHandle:
+        """Return a DisplayHandle rendering the viewer inside Jupyter notebook."""
+        return display(self.renderer, self.html)
+    def _ipython_display_(self):
+        self.show()
+    def _camera_moved(self, change):
+        self.update_view()
+    def _picked(self, change):
+        value = self.picker.object
+        if hasattr(value, "proxy_name"):
+            self.load([value.proxy_name])
+            self.html.value = "{}: <b>loaded</b>".format(value.proxy_name)
+    def _release(self, name: str):
+        """Forgets the loaded objects of `name`, their widgets are closed by the next `_swap`."""
+        objects = self._loaded.pop(name)
+        self.loaded_bytes -= self._costs[name]
+        release_objects(objects, self.picker, self.html, self._instances)
+        self._released.extend(objects)
+    def _swap(self, hidden: ThreeJSSceneGraphObjectListType, shown: ThreeJSSceneGraphObjectListType):
+        """
+        Replaces the `hidden` children of `geometries` by the `shown` ones in a single update, then
+        closes the widgets of released objects that no loaded object shares (see `share_geometry`).
+        """
+        if hidden or shown:
+            hidden_ids = set(id(obj) for obj in hidden)
+            self.geometries.children = tuple(obj for obj in self.geometries.children
+                                             if id(obj) not in hidden_ids) + tuple(shown)
+        if not self._released:
+            return
+        # levels of detail are built while loaded, so the widgets in use are collected now
+        in_use = set()
+        for objects in self._loaded.values():
+            for obj in objects:
+                for obj3d in lod_meshes(obj):
+                    in_use.update(id(widget) for widget in object_widgets(obj3d))
+        closing = OrderedDict()
+        for obj in self._released:
+            if hasattr(obj, "lod_levels"):
+                closing[id(obj)] = obj
+            for obj3d in lod_meshes(obj):
+                closing.update((id(widget), widget) for widget in object_widgets(obj3d) if id(widget) not in in_use)
+                closing[id(obj3d)] = obj3d
+        self._released = []
+        # close the widgets only after the browser dropped them from the scene
+        for widget in closing.values():
+            widget.close()
+
 # TODO : Add typing after finding out how to reference the document class
-def render_document(doc, renderer_config: RendererConfig=RendererConfig()) -> DisplayHandle:
-    """Return a DisplayHandle rendering any FreeCAD document inside Jupyter notebook."""
-    root, names = document_to_scene_graph(doc)
-    return render_objects(root, names, renderer_config)
-
-def get_document_renderer(doc, renderer_config: RendererConfig=RendererConfig()) -> DisplayHandle:
-    """Return a `Renderer` and `HTML` for rendering any FreeCAD document inside Jupyter Notebook"""
-    root, names = document_to_scene_graph(doc)
-    return get_objects_renderer(root, names, renderer_config)
+def render_document(doc, renderer_config: RendererConfig=RendererConfig(),
+                    cache: Union[GeometryCache, None]=GEOMETRY_CACHE) -> DisplayHandle:
+    """
+    Return a DisplayHandle rendering any FreeCAD document inside Jupyter notebook.
+    Unchanged objects are taken from `cache`, see `document_to_buffers`.
+    """
+    renderer, html = get_document_renderer(doc, renderer_config, cache)
+    return display(renderer, html)
+
+def render_document_streaming(doc, renderer_config: RendererConfig=RendererConfig(),
+                              cache: Union[GeometryCache, None]=GEOMETRY_CACHE,
+                              order: str="largest") -> DocumentViewer:
+    """
+    Displays an empty renderer for the FreeCAD document right away and adds the objects in
+    batches, `order` first (see `stream_order_key`), while the kernel stays responsive.
+    Returns the `DocumentViewer`, its `task` finishes when all objects are shown.
+    """
+    viewer = DocumentViewer(doc, renderer_config, cache, stream_order=order)
+    viewer.show()
+    return viewer
+
+def get_document_renderer(doc, renderer_config: RendererConfig=RendererConfig(),
+                          cache: Union[GeometryCache, None]=GEOMETRY_CACHE,
+                          return_stats: bool=False) -> Union[Tuple[Renderer, HTML],
+                                                             Tuple[Renderer, HTML, RenderStats]]:
+    """
+    Return a `Renderer` and `HTML` for rendering any FreeCAD document inside Jupyter Notebook.
+    Unchanged objects are taken from `cache`, see `document_to_buffers`. With `return_stats`
+    a `RenderStats` is returned as well, objects from `cache` take no time in its stages.
+    """
+    stats = RenderStats() if return_stats else None
+    buffers, names = document_to_buffers(doc, cache, renderer_config.workers, stats)
+    renderer, html = get_buffers_renderer(buffers, names, renderer_config, stats)
+    if return_stats:
+        return renderer, html, stats
+    return renderer, html
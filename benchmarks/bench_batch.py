@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures the throughput of `batch.process_files` for 1 up to all cores and the speed-up over
+a single process, exporting .glb files of synthetic documents. The documents are stand-in .FCStd files with an up to date geometry
+cache, so the workers skip FreeCAD and the pool, cache mapping and export are timed.
+One file without a cache checks that failures are collected (it only converts with FreeCAD).
+More processes than cores can't be faster, the number of cores is printed with the results.
+Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_batch.py 32 20 2000
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from synthetic_scenes import synthetic_scene
+from freecadgeometry import scene_buffers, write_geometry_cache, disk_cache_path, file_stamp\
+    # pylint: disable=wrong-import-order
+from batch import process_files # pylint: disable=wrong-import-order
+
+
+def write_documents(folder, num_files, num_objects, triangles_per_object):
+    """Writes stand-in .FCStd files with their geometry caches into `folder`."""
+    root, names = synthetic_scene(num_objects, triangles_per_object)
+    buffers = scene_buffers(root)
+    for i in range(num_files):
+        path = os.path.join(folder, "part{:03d}.FCStd".format(i))
+        with open(path, "wb") as document:
+            document.write(b"stand-in")
+        write_geometry_cache(disk_cache_path(path), buffers, names, file_stamp(path))
+    with open(os.path.join(folder, "uncached.FCStd"), "wb") as document:
+        document.write(b"stand-in")
+
+def main(num_files=32, num_objects=20, triangles_per_object=2000):
+    with tempfile.TemporaryDirectory() as folder:
+        write_documents(folder, num_files, num_objects, triangles_per_object)
+        print("{} files, {} cores".format(num_files + 1, os.cpu_count()))
+        single = None
+        for processes in sorted(set([1, 2, 4, os.cpu_count() or 1])):
+            start = time.perf_counter()
+            results = process_files([folder], processes, export_glb=True)
+            elapsed = time.perf_counter() - start
+            failed = [result for result in results if result.error is not None]
+            assert [os.path.basename(result.path) for result in failed] == ["uncached.FCStd"], failed
+            single = single or elapsed
+            print("{:3d} processes: {} files in {:6.2f} s, {:6.1f} files/s, {:5.2f}x".format(
+                processes, len(results), elapsed, len(results) / elapsed, single / elapsed))
+        print("uncached.FCStd: " + failed[0].error)
+        buffers, names = results[0].buffers()
+        print("{}: {} buffers of {} objects mapped from {}".format(os.path.basename(results[0].path), len(buffers),
+                                                                  len(names), os.path.basename(results[0].cache_path)))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compares the renderer of a long row of synthetic objects with and without
+`RendererConfig.memory_budget`: widgets, buffer bytes and comm bytes when it is created, then
+the loads, evictions and comm bytes while the camera flies along the row, picking a bounding
+box and loading objects by name. The flight is repeated with an eighth of the budget, where
+the objects seen first have to be evicted again. Checks that the loaded objects stay within
+the budget and that the widgets of evicted objects are closed.
+Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_budget.py 2000 500 4
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from synthetic_scenes import synthetic_scene
+from bench_highlight_traffic import CommTraffic
+from freecadviewer import scene_buffers, get_buffers_renderer, RendererConfig, RenderStats\
+    # pylint: disable=wrong-import-order
+
+
+def create(buffers, names, memory_budget):
+    """Returns the renderer, its `RenderStats` and the comm bytes of creating it."""
+    config = RendererConfig()
+    config.memory_budget = memory_budget
+    stats = RenderStats()
+    with CommTraffic() as traffic:
+        renderer, _ = get_buffers_renderer(buffers, names, config, stats)
+    return renderer, stats, traffic.bytes_sent
+
+def fly(renderer, budget):
+    """
+    Moves the camera along the row in 50 steps and prints the loads, evictions, comm bytes and
+    update times. Returns the number of evictions.
+    """
+    viewer = renderer.viewer
+    camera = renderer.camera
+    controls = renderer.controls[0]
+    centers = viewer._centers # pylint: disable=protected-access
+    loaded = dict((name, list(objects)) for name, objects in viewer._loaded.items()) # pylint: disable=protected-access
+    loads = 0
+    evicted = []
+    update_times = []
+    with CommTraffic() as traffic:
+        for center in centers[np.linspace(0, len(centers) - 1, 50).astype(int)]:
+            controls.target = tuple(float(x) for x in center)
+            start = time.perf_counter()
+            camera.position = tuple(float(x) for x in center + (0, -40, 20))
+            update_times.append(time.perf_counter() - start)
+            loads += len(set(viewer.loaded) - set(loaded))
+            evicted.extend(objects for name, objects in loaded.items() if name not in viewer.loaded)
+            loaded = dict((name, list(objects)) for name, objects in viewer._loaded.items()) # pylint: disable=protected-access
+            assert viewer.loaded_bytes <= budget
+    assert all(obj3d.comm is None for objects in evicted for obj3d in objects), "evicted widgets are closed"
+    print("  flight along the row with {:.1f} MB: {} loads, {} evictions, {:.1f} kB sent, {:.4f} s per camera move "
+          "(max {:.4f} s)".format(budget / 2**20, loads, len(evicted), traffic.bytes_sent / 1024,
+                                  np.mean(update_times), max(update_times)))
+    print("  {} loaded at the end of the row, least recently viewed {}".format(len(viewer.loaded), viewer.loaded[0]))
+    return len(evicted)
+
+def main(num_objects=2000, triangles_per_object=500, budget_mb=4):
+    root, names = synthetic_scene(num_objects, triangles_per_object)
+    buffers = scene_buffers(root)
+    budget = budget_mb * 2**20
+    print("{} objects, {:.1f} MB of buffers, budget {} MB".format(num_objects,
+                                                                   sum(b.nbytes for b in buffers) / 2**20, budget_mb))
+    for memory_budget in [None, budget]:
+        start = time.perf_counter()
+        renderer, stats, sent = create(buffers, names, memory_budget)
+        print("  memory_budget={:10s} {:6d} widgets {:10.1f} kB buffers {:10.1f} kB sent {:6.2f} s"
+              .format(str(memory_budget), stats.widgets, stats.buffer_bytes / 1024, sent / 1024,
+                      time.perf_counter() - start))
+
+    viewer = renderer.viewer
+    print("  {} loaded at start, {:.1f} kB".format(len(viewer.loaded), viewer.loaded_bytes / 1024))
+    assert viewer.loaded_bytes <= budget
+    fly(renderer, budget)
+
+    picker = viewer.picker
+    proxy = viewer._proxies[names[0]] # pylint: disable=protected-access
+    picker.object = proxy
+    picker.faceIndex = 0
+    picker.point = [1.0, 0.0, 0.0]
+    assert names[0] in viewer.loaded, "picking a box loads its object"
+    print("  picked {}: {}".format(names[0], viewer.html.value))
+    viewer.load(names[:3])
+    assert viewer.loaded[-3:] == names[:3] and viewer.loaded_bytes <= budget
+    stats = RenderStats()
+    stats.count_widgets(renderer)
+    print("  after loading {} by name: {} loaded, {} widgets, {:.1f} kB buffers"
+          .format(names[:3], len(viewer.loaded), stats.widgets, stats.buffer_bytes / 1024))
+
+    tight_renderer, _, _ = create(buffers, names, budget // 8)
+    assert fly(tight_renderer, budget // 8) > 0, "a tight budget evicts objects"
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compares the ray, nearest point and box queries of `GeometryIndex` with brute force loops over
+all triangles of a synthetic scene, checks that both find the same distances and faces, and
+times building the index and rebuilding a single changed object.
+Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_bvh.py 100 10000 200
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from synthetic_scenes import synthetic_scene
+from freecadviewer import scene_buffers, buffers_to_index, index_object, ray_triangle_distances,\
+                          closest_points_on_triangles # pylint: disable=wrong-import-order
+
+
+def timed(function):
+    """Returns the result of `function` and its run time in seconds."""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+def all_triangles(index):
+    """Returns the corners, object names and shape faces of all triangles of the index."""
+    corners, names, faces = [], [], []
+    for name in index.names:
+        indexed = index._objects[name][1] # pylint: disable=protected-access
+        corners.append(indexed.vertices[indexed.triangles])
+        names.extend([name] * len(indexed.triangles))
+        faces.append(indexed.faces)
+    return np.concatenate(corners), np.array(names), np.concatenate(faces)
+
+def brute_force_rays(corners, origins, directions):
+    """Returns distance and triangle of the first hit of each ray, -1 without a hit."""
+    distances = np.full(len(origins), np.inf)
+    triangles = np.full(len(origins), -1)
+    a, b, c = corners.transpose(1, 0, 2)
+    for i, (origin, direction) in enumerate(zip(origins, directions)):
+        t = ray_triangle_distances(np.broadcast_to(origin, a.shape), np.broadcast_to(direction, a.shape), a, b, c)
+        if np.isfinite(t.min()):
+            distances[i], triangles[i] = t.min(), t.argmin()
+    return distances, triangles
+
+def brute_force_nearest(corners, points):
+    """Returns the distance to the closest triangle of each point."""
+    a, b, c = corners.transpose(1, 0, 2)
+    return np.array([np.linalg.norm(closest_points_on_triangles(np.broadcast_to(point, a.shape), a, b, c) - point,
+                                    axis=1).min() for point in points])
+
+def brute_force_box(corners, names, faces, box_min, box_max):
+    """Returns the faces with a triangle whose bounds overlap the box."""
+    overlap = np.all((corners.min(axis=1) <= box_max) & (corners.max(axis=1) >= box_min), axis=1)
+    return sorted(set(zip(names[overlap].tolist(), faces[overlap].tolist())))
+
+def main(num_objects=100, triangles_per_object=10000, num_queries=200):
+    root, names = synthetic_scene(num_objects, triangles_per_object)
+    buffers = scene_buffers(root)
+    index, build_time = timed(lambda: buffers_to_index(buffers, names))
+    corners, triangle_names, triangle_faces = all_triangles(index)
+    print("{} objects, {} triangles, index built in {:.3f} s".format(num_objects, len(corners), build_time))
+
+    changed = [obj_buffers for obj_buffers in buffers if obj_buffers.object_index == num_objects // 2]
+    _, object_time = timed(lambda: index.set_object(names[num_objects // 2], changed))
+    _, top_time = timed(index._top_tree) # pylint: disable=protected-access
+    _, single_time = timed(lambda: index_object(changed))
+    print("rebuild of one changed object {:.4f} s (tree {:.4f} s, top tree {:.4f} s)"
+          .format(object_time + top_time, single_time, top_time))
+
+    rng = np.random.default_rng(0)
+    lower = corners.reshape(-1, 3).min(axis=0)
+    upper = corners.reshape(-1, 3).max(axis=0)
+    origins = np.column_stack([rng.uniform(lower[0], upper[0], num_queries),
+                               rng.uniform(lower[1], upper[1], num_queries),
+                               np.full(num_queries, upper[2] + 10)])
+    directions = np.column_stack([rng.normal(0, 0.05, (num_queries, 2)), -np.ones(num_queries)])
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    hits, ray_time = timed(lambda: index.ray(origins, directions))
+    (distances, triangles), brute_ray_time = timed(lambda: brute_force_rays(corners, origins, directions))
+    assert np.allclose(hits.distance, distances), "ray distances differ"
+    found = triangles >= 0
+    assert [hits.objects[i] for i in np.flatnonzero(found)] == triangle_names[triangles[found]].tolist()
+    assert np.array_equal(hits.faces[found], triangle_faces[triangles[found]])
+    print("{} rays: {} hits, index {:.4f} s, brute force {:.4f} s".format(num_queries, found.sum(), ray_time,
+                                                                        brute_ray_time))
+
+    points = rng.uniform(lower - 5, upper + 5, (num_queries, 3))
+    nearest, nearest_time = timed(lambda: index.nearest(points))
+    brute_distances, brute_nearest_time = timed(lambda: brute_force_nearest(corners, points))
+    assert np.allclose(nearest.distance, brute_distances), "nearest distances differ"
+    assert np.allclose(np.linalg.norm(nearest.point - points, axis=1), brute_distances)
+    print("{} nearest points: index {:.4f} s, brute force {:.4f} s".format(num_queries, nearest_time,
+                                                                         brute_nearest_time))
+
+    centers = rng.uniform(lower, upper, (num_queries, 3))
+    box_min, box_max = centers - (upper - lower) / 40, centers + (upper - lower) / 40
+    faces, box_time = timed(lambda: index.boxes(box_min, box_max))
+    brute_faces, brute_box_time = timed(lambda: [brute_force_box(corners, triangle_names, triangle_faces, lo, hi)
+                                                 for lo, hi in zip(box_min, box_max)])
+    assert faces == brute_faces, "box faces differ"
+    print("{} boxes: {} faces, index {:.4f} s, brute force {:.4f} s".format(num_queries, sum(map(len, faces)),
+                                                                          box_time, brute_box_time))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
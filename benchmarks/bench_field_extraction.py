@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compares `so_field_to_array` with the former per element path `[tuple(x) for x in field]` for
+`SoCoordinate3.point` (read value by value, lossless) and `coordIndex` (parsed from the text of
+`SoField::get`): time, peak memory traced by `tracemalloc` and whether the values are exact.
+With `coin_stub` the text is formatted in Python while Coin formats it in C, so `parse` also
+times the text path on the text formatted beforehand.
+Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_field_extraction.py 10000 100000 1000000
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from synthetic_scenes import coin
+from freecadgeometry import so_field_to_array # pylint: disable=wrong-import-order
+
+
+def measure(function):
+    """Returns the result of `function`, its run time in seconds and its peak traced memory in bytes."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+class FormattedField():
+    """A field whose `get` returns the text given to it, without formatting it again."""
+    def __init__(self, field):
+        self.text = field.get()
+    def get(self):
+        return self.text
+
+def compare(name, field, dtype, width, expected):
+    """Prints time and peak memory of both paths for one field and checks the values."""
+    _, tuples_time, tuples_peak = measure(lambda: [tuple(x) if width > 1 else x for x in field])
+    values, array_time, array_peak = measure(lambda: so_field_to_array(field, dtype, width))
+    assert np.array_equal(values, expected), "{} differs".format(name)
+    parse = ""
+    if np.dtype(dtype).kind != 'f':
+        formatted = FormattedField(field)
+        _, parse_time, parse_peak = measure(lambda: so_field_to_array(formatted, dtype, width))
+        parse = "   parse {:7.3f} s {:8.1f} MB".format(parse_time, parse_peak / 2**20)
+    print("  {:12s} tuples {:7.3f} s {:8.1f} MB   array {:7.3f} s {:8.1f} MB{}   exact".format(
+        name, tuples_time, tuples_peak / 2**20, array_time, array_peak / 2**20, parse))
+
+def main(*sizes):
+    rng = np.random.default_rng(0)
+    for size in sizes or (10000, 100000, 1000000):
+        print("{} points, {} triangles".format(size, 2 * size))
+        points = rng.uniform(-1e6, 1e6, (size, 3)).astype('float32')
+        coordinates = coin.SoCoordinate3()
+        coordinates.point.setValues(points)
+        compare("point", coordinates.point, 'float32', 3, points)
+        coord_index = np.column_stack([rng.integers(0, size, (2 * size, 3)),
+                                       -np.ones(2 * size, dtype='int64')]).ravel().astype('int32')
+        face_set = coin.SoIndexedFaceSet()
+        face_set.coordIndex.setValues(coord_index)
+        compare("coordIndex", face_set.coordIndex, 'int32', 1, coord_index)
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures the bytes sent over the widget comm to create a mesh and per hover for both
+highlight modes of `freecadviewer.generate_picker`. Run it with the python interpreter that is used for
+FreeCAD, e.g.
+
+    python3 benchmarks/bench_highlight_traffic.py 300000
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+from ipywidgets import Widget
+from ipywidgets.widgets.widget import _remove_buffers
+from pythreejs import Group
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "IPythonFreeCADViewer"))
+from freecadviewer import create_face_geom, build_face_lookup, generate_picker # pylint: disable=wrong-import-position
+from bench_normals import grid_mesh # pylint: disable=wrong-import-position
+
+
+class CommTraffic():
+    """
+    Counts the bytes of all widget state sent over the comm while active, except the messages
+    of the `ignored` widgets, like the echoes of the state a browser sent.
+    """
+    def __init__(self, ignored=()):
+        self.bytes_sent = 0
+        self._ignored = set(id(widget) for widget in ignored)
+        self._open = Widget.open
+        self._send = Widget._send
+    def __enter__(self):
+        traffic = self
+        def counting_open(widget):
+            state, _, buffers = _remove_buffers(widget.get_state())
+            traffic.count(state, buffers)
+            traffic._open(widget)
+        def counting_send(widget, msg, buffers=None):
+            if id(widget) not in traffic._ignored:
+                traffic.count(msg, buffers or [])
+            traffic._send(widget, msg, buffers)
+        Widget.open = counting_open
+        Widget._send = counting_send
+        return self
+    def __exit__(self, *args):
+        Widget.open = self._open
+        Widget._send = self._send
+    def count(self, msg, buffers):
+        self.bytes_sent += len(json.dumps(msg, default=str))
+        self.bytes_sent += sum(memoryview(buffer).nbytes for buffer in buffers)
+
+def hover_traffic(mesh, highlight_mode, shape_faces):
+    """Returns the mean number of bytes sent per hover over the given shape faces."""
+    picker_html, picker = generate_picker(Group(children=[mesh]), [], "mousemove", highlight_mode)
+    triangle_ends = mesh.face_lookup[0]
+    with CommTraffic() as traffic:
+        for shape_face_index in shape_faces:
+            picker.object = mesh
+            picker.faceIndex = int(triangle_ends[shape_face_index-1]) - 1
+            picker.point = [float(shape_face_index), 0, 0]
+    assert "Face{}".format(shape_faces[-1]) in picker_html.value
+    return traffic.bytes_sent / len(shape_faces)
+
+def main(num_triangles=300000, num_shape_faces=100):
+    faces, vertices = grid_mesh(num_triangles)
+    part_index = np.diff(np.linspace(0, len(faces), num_shape_faces + 1).astype(int))
+    with CommTraffic() as traffic:
+        mesh, = create_face_geom(vertices, faces, (0.8, 0.8, 0.8), 0)
+    mesh.name = "0 0"
+    mesh.face_lookup = build_face_lookup(part_index, mesh.geometry.attributes["index"].array)
+    print("{} triangles, {} vertices, {} shape faces of {} triangles"
+          .format(len(faces), len(vertices), num_shape_faces, part_index[0]))
+    print("{:14s} {:12d} bytes".format("mesh", traffic.bytes_sent))
+    shape_faces = list(range(1, num_shape_faces + 1, 7))
+    for highlight_mode in ["vertex_colors", "overlay"]:
+        print("{:14s} {:12.0f} bytes per hover".format(highlight_mode, hover_traffic(mesh, highlight_mode, shape_faces)))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
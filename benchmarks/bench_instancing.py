@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures widgets and buffer bytes sent for a fastener-heavy scene, with and without
+`RendererConfig.share_geometry`, and checks that picking a shared mesh reports the
+FreeCAD object it belongs to. Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_instancing.py 500
+"""
+
+import sys
+import time
+
+from pythreejs import Mesh, Picker
+
+from synthetic_scenes import synthetic_object
+from pivy import coin # pylint: disable=wrong-import-order
+from freecadviewer import get_objects_renderer, RendererConfig # pylint: disable=wrong-import-order
+
+
+def fastener_scene(num_fasteners, num_unique=5, triangles=2000):
+    """Returns a scene of `num_unique` different parts and `num_fasteners` copies of one part."""
+    root = coin.SoSeparator()
+    names = []
+    for i in range(num_unique):
+        root.addChild(synthetic_object(triangles * 10, offset=100.0 * i))
+        names.append("Part{:03d}".format(i))
+    for i in range(num_fasteners):
+        fastener = synthetic_object(triangles)
+        # copies only differ in their placement
+        fastener.getChild(0).translation.setValue((float(i % 50) * 40, float(i // 50) * 40, 200.0))
+        root.addChild(fastener)
+        names.append("Screw{:04d}".format(i))
+    return root, names
+
+def check_picking(renderer, html, names, num_picks=50):
+    """Raises an `AssertionError` if picking a mesh doesn't show its FreeCAD object."""
+    picker = next(control for control in renderer.controls if isinstance(control, Picker))
+    meshes = [child for child in picker.controlling.children if isinstance(child, Mesh)]
+    step = max(len(meshes) // num_picks, 1)
+    for i, mesh in enumerate(meshes[::step]):
+        picker.object = mesh
+        picker.faceIndex = i
+        picker.point = [float(i + 1), 0, 0]
+        assert names[int(mesh.name.split()[0])] in html.value, (mesh.name, html.value)
+        assert tuple(picker.face_overlay.position) == tuple(mesh.position)
+
+def main(num_fasteners=500):
+    root, names = fastener_scene(num_fasteners)
+    for share_geometry in [False, True]:
+        config = RendererConfig()
+        config.share_geometry = share_geometry
+        start = time.perf_counter()
+        renderer, html, stats = get_objects_renderer(root, names, config, return_stats=True)
+        elapsed = time.perf_counter() - start
+        check_picking(renderer, html, names)
+        print("share_geometry={!s:5s} {:6d} widgets {:10.1f} kB of buffers {:7.3f} s"
+              .format(share_geometry, stats.widgets, stats.buffer_bytes / 1024, elapsed))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
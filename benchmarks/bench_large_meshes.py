@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""
+Builds meshes of 10^5 to 10^6 vertices with `freecadviewer.create_face_geom`, both with
+32-bit indices and split into 16-bit chunks, checks that the chunks reproduce the
+original triangles and that face picking maps back to the right shape face, and
+reports the timings. Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_large_meshes.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "IPythonFreeCADViewer"))
+from freecadviewer import create_face_geom, index_by_face_index, MAX_UINT16_VERTICES # pylint: disable=wrong-import-position
+from bench_normals import grid_mesh # pylint: disable=wrong-import-position
+
+
+def check_chunks(meshes, faces, vertices, part_index, num_picks=1000):
+    """Raises an `AssertionError` if the chunked meshes don't match the original mesh."""
+    rng = np.random.default_rng(0)
+    expected_face = np.repeat(np.arange(1, len(part_index) + 1), part_index)
+    covered = 0
+    for mesh in meshes:
+        chunk_vertices = mesh.geometry.attributes["position"].array
+        chunk_faces = mesh.geometry.attributes["index"].array.reshape(-1, 3)
+        assert len(chunk_vertices) <= MAX_UINT16_VERTICES
+        assert chunk_faces.dtype == np.uint16
+        assert mesh.triangle_offset == covered
+        covered += len(chunk_faces)
+        original = faces[mesh.triangle_offset:covered]
+        assert np.array_equal(chunk_vertices[chunk_faces], vertices[original])
+        for face_index in rng.integers(0, len(chunk_faces), num_picks // len(meshes) + 1):
+            shape_face_index = index_by_face_index(part_index, int(face_index) + mesh.triangle_offset)
+            assert shape_face_index == expected_face[face_index + mesh.triangle_offset]
+    assert covered == len(faces)
+
+def main():
+    color = (0.8, 0.8, 0.8)
+    for num_vertices in [10**5, 3*10**5, 10**6]:
+        faces, vertices = grid_mesh(2 * num_vertices)
+        # shape faces of varying size, the last one is larger than a chunk
+        part_index = [1000, 20000, 50000, 3]
+        part_index.append(len(faces) - sum(part_index))
+
+        start = time.perf_counter()
+        meshes = create_face_geom(vertices, faces, color, 0, part_index=part_index)
+        t_uint32 = time.perf_counter() - start
+        assert len(meshes) == 1
+        assert meshes[0].geometry.attributes["index"].array.dtype == np.uint32
+
+        start = time.perf_counter()
+        meshes = create_face_geom(vertices, faces, color, 0, part_index=part_index, uint32_indices=False)
+        t_chunked = time.perf_counter() - start
+        check_chunks(meshes, faces, vertices, part_index)
+
+        print("{:8d} vertices {:8d} triangles: uint32 {:7.3f} s, {:3d} uint16 chunks {:7.3f} s"
+              .format(len(vertices), len(faces), t_uint32, len(meshes), t_chunked))
+
+if __name__ == "__main__":
+    main()
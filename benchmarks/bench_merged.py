@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compares draw calls (pickable objects), widgets and render time of a scene with thousands
+of small objects with and without `RendererConfig.merge_materials`, and checks that picking
+a merged object reports the same FreeCAD object and face as picking the separate one.
+Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_merged.py 2000
+"""
+
+import sys
+import time
+
+import numpy as np
+from pythreejs import Mesh, Picker
+
+from synthetic_scenes import synthetic_scene
+from freecadviewer import get_objects_renderer, RendererConfig # pylint: disable=wrong-import-order
+
+
+def render(root, names, merge_materials):
+    """Returns renderer, html, stats, picker and render time."""
+    config = RendererConfig()
+    config.merge_materials = merge_materials
+    start = time.perf_counter()
+    renderer, html, stats = get_objects_renderer(root, names, config, return_stats=True)
+    elapsed = time.perf_counter() - start
+    picker = next(control for control in renderer.controls if isinstance(control, Picker))
+    return html, stats, picker, elapsed
+
+def pick(picker, html, mesh, face_index, event):
+    picker.object = mesh
+    picker.faceIndex = int(face_index)
+    picker.point = [float(event), 0, 0]
+    return html.value
+
+def main(num_objects=2000, num_picks=200):
+    root, names = synthetic_scene(num_objects, 200)
+    html, stats, picker, elapsed = render(root, names, False)
+    merged_html, merged_stats, merged_picker, merged_elapsed = render(root, names, True)
+    meshes = [child for child in picker.controlling.children if isinstance(child, Mesh)]
+    merged_mesh = next(child for child in merged_picker.controlling.children if isinstance(child, Mesh))
+
+    triangle_ends = np.cumsum([len(mesh.geometry.attributes["index"].array) // 3 for mesh in meshes])
+    rng = np.random.default_rng(0)
+    for event, triangle in enumerate(rng.integers(0, triangle_ends[-1], num_picks), 1):
+        mesh_index = int(np.searchsorted(triangle_ends, triangle, side='right'))
+        local = triangle - (triangle_ends[mesh_index - 1] if mesh_index else 0)
+        expected = pick(picker, html, meshes[mesh_index], local, event)
+        assert pick(merged_picker, merged_html, merged_mesh, triangle, event) == expected, expected
+
+    for label, run_stats, group, seconds in [("separate", stats, picker.controlling, elapsed),
+                                             ("merged", merged_stats, merged_picker.controlling, merged_elapsed)]:
+        print("{:8s} {:6d} objects {:6d} widgets {:10.1f} kB {:7.3f} s"
+              .format(label, len(group.children), run_stats.widgets, run_stats.buffer_bytes / 1024, seconds))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
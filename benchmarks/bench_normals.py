@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark comparing the vectorized `freecadviewer.compute_normals` with the
+per-triangle loop it replaced. Run it with the python interpreter that is used
+for FreeCAD, e.g.
+
+    python3 benchmarks/bench_normals.py 300000
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "IPythonFreeCADViewer"))
+from freecadviewer import compute_normals # pylint: disable=wrong-import-position
+
+
+def compute_normals_loop(faces, vertices):
+    """The original per-triangle implementation, kept as reference."""
+    normals = np.zeros((len(vertices), 3), dtype='float32')
+    for face in faces:
+        v_index_a = face[0]
+        v_index_b = face[1]
+        v_index_c = face[2]
+        vec_a = vertices[v_index_a]
+        vec_b = vertices[v_index_b]
+        vec_c = vertices[v_index_c]
+        vec_a_b = np.subtract(vec_b, vec_a)
+        vec_a_c = np.subtract(vec_c, vec_a)
+        dot_p = np.cross(vec_a_b, vec_a_c)
+        for i in [v_index_a, v_index_b, v_index_c]:
+            np.add(normals[i], dot_p, normals[i])
+    return normals
+
+def grid_mesh(num_triangles):
+    """Returns vertices and faces of a wavy triangulated grid with about `num_triangles` triangles."""
+    side = max(int(np.sqrt(num_triangles / 2)), 1)
+    x, y = np.meshgrid(np.arange(side + 1, dtype='float32'), np.arange(side + 1, dtype='float32'))
+    z = np.sin(x / 7) * np.cos(y / 5)
+    vertices = np.stack([x.ravel(), y.ravel(), z.ravel()], axis=1).astype('float32')
+    corner = (np.arange(side)[:, np.newaxis] * (side + 1) + np.arange(side)).ravel()
+    lower = np.stack([corner, corner + 1, corner + side + 1], axis=1)
+    upper = np.stack([corner + 1, corner + side + 2, corner + side + 1], axis=1)
+    faces = np.concatenate([lower, upper]).astype('uint32')
+    return faces, vertices
+
+def main(num_triangles=300000, repeat=3):
+    faces, vertices = grid_mesh(num_triangles)
+    print("{} triangles, {} vertices".format(len(faces), len(vertices)))
+
+    vectorized = compute_normals(faces, vertices)
+    reference = compute_normals_loop(faces, vertices)
+    scale = np.abs(reference).max()
+    print("max deviation from loop implementation: {:.3g}".format(np.abs(vectorized - reference).max() / scale))
+
+    t_loop = min(timeit.repeat(lambda: compute_normals_loop(faces, vertices), number=1, repeat=1))
+    t_area = min(timeit.repeat(lambda: compute_normals(faces, vertices), number=1, repeat=repeat))
+    t_angle = min(timeit.repeat(lambda: compute_normals(faces, vertices, normalize=True, weighting="angle"),
+                                number=1, repeat=repeat))
+    print("loop:                {:9.4f} s".format(t_loop))
+    print("vectorized (area):   {:9.4f} s  ({:.0f}x)".format(t_area, t_loop / t_area))
+    print("vectorized (angle):  {:9.4f} s  ({:.0f}x)".format(t_angle, t_loop / t_angle))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
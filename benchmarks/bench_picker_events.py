@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+Replays a pointer sweeping over a mesh at a fixed event rate through `generate_picker` with
+the settings of `RendererConfig.skip_unchanged_hovers`, `picker_throttle` and `picker_debounce`.
+Several events land on the same triangle and many triangles on the same shape face, like
+mouse moves do. Every option is measured alone. Prints handled callbacks, skipped and
+coalesced events, the bytes sent back to the browser and the delays until the selection shows
+an event, and checks that the last hovered face is selected in the end. The events arrive
+like browser updates, the bytes are the highlighting and the echoes of the picker state
+(which every setting sends alike) aren't counted.
+Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_picker_events.py 300000 500 2
+"""
+
+import asyncio
+import sys
+
+import numpy as np
+from pythreejs import Group
+
+from bench_highlight_traffic import CommTraffic
+from bench_normals import grid_mesh
+from freecadviewer import create_face_geom, build_face_lookup, shape_face_by_triangle, generate_picker, RenderStats\
+    # pylint: disable=wrong-import-order
+
+EVENTS_PER_TRIANGLE = 4
+
+SETTINGS = [
+    # name, skip_unchanged, throttle, debounce
+    ("every event", False, 0.0, 0.0),
+    ("skip unchanged", True, 0.0, 0.0),
+    ("throttle 50 ms", False, 0.05, 0.0),
+    ("debounce 50 ms", False, 0.0, 0.05),
+]
+
+
+async def sweep(mesh, picker, triangles, rate):
+    """Sets the picked state for every triangle `EVENTS_PER_TRIANGLE` times, `rate` events per second."""
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    for i, triangle in enumerate(np.repeat(triangles, EVENTS_PER_TRIANGLE)):
+        await asyncio.sleep(max(start + i / rate - loop.time(), 0))
+        picker.set_state(dict(object="IPY_MODEL_" + mesh.model_id, faceIndex=int(triangle),
+                              point=[float(i + 1), 0.0, 0.0]))
+    # let pending events be handled
+    await asyncio.sleep(0.2)
+
+def main(num_triangles=300000, rate=500, seconds=2):
+    faces, vertices = grid_mesh(num_triangles)
+    part_index = np.diff(np.linspace(0, len(faces), 100 + 1).astype(int))
+    mesh, = create_face_geom(vertices, faces, (0.8, 0.8, 0.8), 0)
+    mesh.name = "0 0"
+    mesh.face_lookup = build_face_lookup(part_index, mesh.geometry.attributes["index"].array)
+    num_events = rate * seconds
+    # a pointer crosses many triangles of a shape face, 25 of each of the first 10 faces
+    triangles = np.linspace(0, len(faces) // 10 - 1, num_events // EVENTS_PER_TRIANGLE).astype(int)
+    last_face = shape_face_by_triangle(mesh.face_lookup[0], int(triangles[-1]))
+    print("{} triangles, {} events at {}/s over {} triangles and {} shape faces".format(
+        len(faces), num_events, rate, len(triangles), last_face))
+    print("{:16s} {:>8s} {:>8s} {:>9s} {:>10s} {:>10s} {:>10s}".format("", "handled", "skipped", "coalesced",
+                                                                      "kB sent", "mean delay", "max delay"))
+    for name, skip_unchanged, throttle, debounce in SETTINGS:
+        stats = RenderStats()
+        html, picker = generate_picker(Group(children=[mesh]), [], "mousemove", "overlay", stats,
+                                       throttle, debounce, skip_unchanged)
+        with CommTraffic(ignored=[picker]) as traffic:
+            asyncio.run(sweep(mesh, picker, triangles, rate))
+        assert "Face{}<".format(last_face) in html.value, html.value
+        print("{:16s} {:8d} {:8d} {:9d} {:10.1f} {:8.1f} ms {:8.1f} ms".format(
+            name, len(stats.picker_latencies), stats.picker_skipped, stats.picker_coalesced,
+            traffic.bytes_sent / 1024, np.mean(stats.picker_delays) * 1000, np.max(stats.picker_delays) * 1000))
+    print("event rate of the last run: {:.0f}/s".format(stats.picker_event_rate))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
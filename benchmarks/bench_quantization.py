@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures the buffer bytes of the widgets of a synthetic scene for several values of
+`RendererConfig.quantize_bits`, together with the largest position error in world coordinates
+and the largest normal angle error after dequantizing them like the front end does.
+Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_quantization.py 100 2000
+"""
+
+import sys
+
+import numpy as np
+from pythreejs import Mesh, LineSegments
+
+from synthetic_scenes import synthetic_scene
+from freecadviewer import scene_buffers, create_geometries, rotate_vector, RendererConfig, RenderStats, QUANTIZE_BITS\
+    # pylint: disable=wrong-import-order
+
+
+def world_positions(obj3d):
+    """Returns the positions of the pythreejs object after its scale, rotation and position."""
+    positions = np.asarray(obj3d.geometry.attributes["position"].array, dtype='float64') * obj3d.scale
+    return rotate_vector(obj3d.quaternion, positions) + obj3d.position
+
+def world_normals(obj3d):
+    """Returns the unit normals of the mesh after the normal matrix of its scale and rotation."""
+    normals = np.asarray(obj3d.geometry.attributes["normal"].array, dtype='float64') / obj3d.scale
+    normals = rotate_vector(obj3d.quaternion, normals)
+    return normals / np.linalg.norm(normals, axis=1)[:, None]
+
+def scene_objects(buffers, names, quantize_bits):
+    """Returns the meshes and line segments of the buffers and their buffer bytes."""
+    config = RendererConfig()
+    config.quantize_bits = quantize_bits
+    group, _ = create_geometries(buffers, config, names)
+    stats = RenderStats()
+    stats.count_widgets(group)
+    return [obj3d for obj3d in group.children if isinstance(obj3d, (Mesh, LineSegments))], stats.buffer_bytes
+
+def main(num_objects=100, triangles_per_object=2000):
+    root, names = synthetic_scene(num_objects, triangles_per_object)
+    buffers = scene_buffers(root)
+    reference, reference_bytes = scene_objects(buffers, names, None)
+    print("{} objects with {} triangles".format(num_objects, triangles_per_object))
+    print("{:>5s} {:>12s} {:>7s} {:>14s} {:>14s}".format("bits", "bytes", "ratio", "position error",
+                                                         "normal error"))
+    print("{:>5s} {:12d} {:7.2f}".format("off", reference_bytes, 1.0))
+    for bits in QUANTIZE_BITS[::-1]:
+        objects, num_bytes = scene_objects(buffers, names, bits)
+        position_error = max(np.abs(world_positions(obj3d) - world_positions(original)).max()
+                             for obj3d, original in zip(objects, reference))
+        normal_error = max(np.degrees(np.arccos(np.clip((world_normals(obj3d) * world_normals(original)).sum(axis=1),
+                                                        -1, 1))).max()
+                           for obj3d, original in zip(objects, reference) if isinstance(obj3d, Mesh))
+        print("{:5d} {:12d} {:7.2f} {:14.5f} {:12.2f} deg".format(bits, num_bytes, reference_bytes / num_bytes,
+                                                                  position_error, normal_error))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
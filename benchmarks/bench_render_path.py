@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""
+Times the stages of the render path of `freecadviewer` on the synthetic scenes of
+`synthetic_scenes` and compares them with the baselines stored in `baselines.json`.
+Stages slower than `--tolerance` times and `--min-difference` seconds above their baseline
+are reported as regressions and make the script exit with status 1. Run it with the python interpreter that is used for
+FreeCAD, e.g.
+
+    python3 benchmarks/bench_render_path.py tiny small medium
+    python3 benchmarks/bench_render_path.py --save
+
+`--save` replaces the baselines of the timed scenes, do this on the machine the
+baselines are tracked on.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from ipywidgets import Widget
+from pythreejs import Mesh, Picker
+
+from synthetic_scenes import SCENE_SIZES, synthetic_scene
+from pivy import coin # pylint: disable=wrong-import-order
+from freecadgeometry import bfs_traversal, extract_values, compute_normals, scene_buffers # pylint: disable=wrong-import-order
+from freecadviewer import create_face_geom, create_line_geom, get_objects_renderer, RendererConfig # pylint: disable=wrong-import-order
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+
+def best_time(function, repeat):
+    """Returns the fastest of `repeat` runs of `function` in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+        # ipywidgets keeps every widget alive until it is closed
+        Widget.close_all()
+    return min(times)
+
+def hover_time(renderer, num_hovers=200):
+    """Returns the mean time of a picker callback when hovering over random triangles."""
+    picker = next(control for control in renderer.controls if isinstance(control, Picker))
+    meshes = [child for child in picker.controlling.children if isinstance(child, Mesh)]
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for i in range(num_hovers):
+        mesh = meshes[rng.integers(len(meshes))]
+        picker.object = mesh
+        picker.faceIndex = int(rng.integers(len(mesh.geometry.attributes["index"].array) // 3))
+        picker.point = [float(i), 0, 0]
+    return (time.perf_counter() - start) / num_hovers
+
+def time_scene(num_objects, triangles_per_object, repeat=3):
+    """Returns the timings in seconds of all stages for one synthetic scene."""
+    root, names = synthetic_scene(num_objects, triangles_per_object)
+    timings = {}
+    timings["bfs_traversal"] = best_time(lambda: list(bfs_traversal(root)), repeat)
+    res_tuples = list(bfs_traversal(root))
+    timings["extract_values"] = best_time(lambda: [extract_values(res) for res in res_tuples], repeat)
+    buffers = scene_buffers(root)
+    faces = [obj_buffers for obj_buffers in buffers if not obj_buffers.is_line]
+    lines = [extract_values(res) for res in res_tuples if isinstance(res[0], coin.SoIndexedLineSet)]
+    timings["compute_normals"] = best_time(
+        lambda: [compute_normals(face.faces, face.vertices) for face in faces], repeat)
+    timings["create_face_geom"] = best_time(
+        lambda: [create_face_geom(face.vertices, face.faces, face.color, face.transparency, face.translation,
+                                  face.quaternion, part_index=face.part_index, normals=face.normals)
+                 for face in faces], repeat)
+    timings["create_line_geom"] = best_time(
+        lambda: [create_line_geom(line[0], line[1], line[4], line[3], line[2]) for line in lines], repeat)
+    config = RendererConfig()
+    config.selection_mode = "mousemove"
+    timings["get_objects_renderer"] = best_time(lambda: get_objects_renderer(root, names, config), repeat)
+    renderer, _ = get_objects_renderer(root, names, config)
+    timings["picker_callback"] = hover_time(renderer)
+    Widget.close_all()
+    return timings
+
+def compare(timings, baselines, tolerance, min_difference=0.005):
+    """
+    Prints the timings next to their baselines and returns the stages slower than `tolerance`
+    times them. Differences below `min_difference` seconds are timer noise and ignored.
+    """
+    regressions = []
+    for stage, seconds in timings.items():
+        baseline = baselines.get(stage)
+        if baseline is None:
+            print("  {:22s} {:10.4f} s".format(stage, seconds))
+            continue
+        ratio = seconds / baseline
+        flag = ""
+        if ratio > tolerance and seconds - baseline > min_difference:
+            flag = "  REGRESSION"
+            regressions.append(stage)
+        print("  {:22s} {:10.4f} s  baseline {:10.4f} s  {:5.2f}x{}".format(stage, seconds, baseline, ratio, flag))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the render path on synthetic scenes.")
+    parser.add_argument("scenes", nargs="*", help="any of {}, all by default".format(", ".join(SCENE_SIZES)))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--min-difference", type=float, default=0.005)
+    parser.add_argument("--save", action="store_true", help="store the timings as new baselines")
+    args = parser.parse_args()
+    unknown = set(args.scenes) - set(SCENE_SIZES)
+    if unknown:
+        parser.error("unknown scenes: {}".format(", ".join(sorted(unknown))))
+
+    baselines = {}
+    if os.path.isfile(BASELINES):
+        with open(BASELINES) as baselines_file:
+            baselines = json.load(baselines_file)
+    regressions = []
+    for scene in args.scenes or list(SCENE_SIZES):
+        num_objects, triangles_per_object = SCENE_SIZES[scene]
+        print("{}: {} objects with {} triangles".format(scene, num_objects, triangles_per_object))
+        timings = time_scene(num_objects, triangles_per_object, args.repeat)
+        regressions += ["{} {}".format(scene, stage)
+                        for stage in compare(timings, baselines.get(scene, {}), args.tolerance,
+                                                args.min_difference)]
+        if args.save:
+            baselines[scene] = timings
+    if args.save:
+        with open(BASELINES, "w") as baselines_file:
+            json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+    if regressions:
+        print("regressions: " + ", ".join(regressions))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
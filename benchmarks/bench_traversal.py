@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compares the iterative `freecadgeometry.bfs_traversal` with the recursive implementation it
+replaced, checks that both find the same tuples and times them on flat scenes with many
+objects and on deep assemblies. Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_traversal.py
+"""
+
+import sys
+import timeit
+
+from synthetic_scenes import synthetic_scene, nested_scene
+from pivy import coin # pylint: disable=wrong-import-order
+from freecadgeometry import bfs_traversal # pylint: disable=wrong-import-order
+
+
+def bfs_traversal_recursive(node, coordinates=None, material=None, transform=None, index=0,
+                            print_tree=False, depth_counter=0, object_index=0):
+    """The original recursive implementation, kept as reference."""
+    if print_tree:
+        print(str("   " * index) + str(type(node)))
+    if not isinstance(node, (coin.SoSwitch, coin.SoSeparator)):
+        return []
+    coords = coordinates
+    mat = material
+    trans = transform
+    edge_face_set = None
+    for child in node:
+        if isinstance(child, coin.SoCoordinate3):
+            coords = child
+        if isinstance(child, coin.SoTransform):
+            trans = child
+        if isinstance(child, coin.SoMaterial):
+            mat = child
+        if isinstance(child, (coin.SoIndexedLineSet, coin.SoIndexedFaceSet)):
+            edge_face_set = child
+    res_children = []
+    this_object_index = -1
+    for child in node:
+        if depth_counter != 0:
+            this_object_index = object_index
+        else:
+            this_object_index += 1
+        res_recursive = bfs_traversal_recursive(child, coords, transform=trans, index=index+1,
+                                                print_tree=print_tree, depth_counter=depth_counter+1,
+                                                object_index=this_object_index)
+        res_children.extend(res_recursive)
+    if edge_face_set:
+        res = [(edge_face_set, coords, mat, this_object_index, trans)]
+    else:
+        res = []
+    res.extend(res_children)
+    return res
+
+def same_tuples(expected, actual):
+    """Returns whether both lists hold the same nodes and object indices in the same order."""
+    return len(expected) == len(actual) and all(
+        all(a is b for a, b in zip(res_a[:3] + res_a[4:], res_b[:3] + res_b[4:])) and res_a[3] == res_b[3]
+        for res_a, res_b in zip(expected, actual))
+
+def main(repeat=5):
+    scenes = [("2000 flat objects", synthetic_scene(2000, 8)[0]),
+              ("assemblies 50 deep", nested_scene(50, 200, 8)[0]),
+              ("assemblies 5000 deep", nested_scene(5000, 2, 8)[0])]
+    for name, root in scenes:
+        actual = list(bfs_traversal(root))
+        t_iterative = min(timeit.repeat(lambda: list(bfs_traversal(root)), number=1, repeat=repeat))
+        try:
+            expected = bfs_traversal_recursive(root)
+        except RecursionError:
+            print("{:22s} iterative {:8.4f} s, recursive: RecursionError (limit {})"
+                  .format(name, t_iterative, sys.getrecursionlimit()))
+            continue
+        assert same_tuples(expected, actual), name
+        t_recursive = min(timeit.repeat(lambda: bfs_traversal_recursive(root), number=1, repeat=repeat))
+        print("{:22s} iterative {:8.4f} s, recursive {:8.4f} s ({:.1f}x), {} tuples"
+              .format(name, t_iterative, t_recursive, t_recursive / t_iterative, len(actual)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures `RendererConfig.weld_tolerance` on tessellations shaped like FreeCAD's: cylinders whose
+side has a duplicated seam and whose caps repeat the rim vertices, once as they come and
+once as triangle soup (every triangle with its own vertices, like imported meshes), plus
+their edges drawn twice. Prints vertices, removed vertices, buffer bytes and the largest
+angle between the normals of coincident vertices of the same shape face.
+Run it with the python interpreter that is used for FreeCAD, e.g.
+
+    python3 benchmarks/bench_welding.py 200 64
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import synthetic_scenes # pylint: disable=unused-import
+from freecadviewer import GeometryBuffers, compute_normals, generate_line_segments, create_geometries,\
+                          RendererConfig, RenderStats # pylint: disable=wrong-import-order
+
+
+def cylinder(num_segments, num_rows, offset):
+    """Returns vertices, triangles and part index of a cylinder of 3 shape faces: side, bottom and top."""
+    angles = np.linspace(0, 2 * np.pi, num_segments + 1) # the seam column is repeated
+    heights = np.linspace(0, 10, num_rows + 1)
+    side = np.stack(np.broadcast_arrays(np.cos(angles)[None, :] * 5 + offset, np.sin(angles)[None, :] * 5,
+                                        heights[:, None]), axis=-1).reshape(-1, 3)
+    grid = np.arange(len(side)).reshape(num_rows + 1, num_segments + 1)
+    quads = np.stack([grid[:-1, :-1], grid[:-1, 1:], grid[1:, 1:], grid[1:, :-1]], axis=-1).reshape(-1, 4)
+    triangles = [np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]])]
+    vertices = [side]
+    part_index = [len(triangles[0])]
+    for height in [0, 10]:
+        # the caps repeat the rim of the side, like the separate triangulations of FreeCAD faces
+        rim = np.column_stack([np.cos(angles[:-1]) * 5 + offset, np.sin(angles[:-1]) * 5,
+                               np.full(num_segments, height)])
+        start = sum(len(v) for v in vertices)
+        center = start + num_segments
+        ring = start + np.arange(num_segments)
+        vertices.append(np.vstack([rim, [[offset, 0, height]]]))
+        triangles.append(np.column_stack([ring, np.roll(ring, -1), np.full(num_segments, center)]))
+        part_index.append(num_segments)
+    return np.vstack(vertices).astype('float32'), np.vstack(triangles), np.array(part_index, dtype='int32')
+
+def scene(num_objects, num_segments, soup):
+    """Returns face set and line set buffers of `num_objects` cylinders."""
+    buffers = []
+    no_values = np.zeros(0, dtype='int32')
+    for i in range(num_objects):
+        vertices, faces, part_index = cylinder(num_segments, 8, 12.0 * i)
+        if soup:
+            vertices = vertices[faces].reshape(-1, 3)
+            faces = np.arange(len(vertices)).reshape(-1, 3)
+        buffers.append(GeometryBuffers(vertices, faces.astype('int32'), compute_normals(faces, vertices), part_index,
+                                       no_values, no_values, (0.8, 0.8, 0.8), 0.0, None, None, False, i))
+        # both rims, each drawn twice
+        rims = [np.arange(num_segments + 1) + row * (num_segments + 1) for row in [0, 8]]
+        line_vertices, edge_ids, edge_offsets = generate_line_segments([np.concatenate([rim, rim]) for rim in rims],
+                                                                       vertices if not soup else
+                                                                       cylinder(num_segments, 8, 12.0 * i)[0])
+        buffers.append(GeometryBuffers(line_vertices, np.zeros((0, 3), dtype='int32'), np.zeros((0, 3), dtype='float32'),
+                                       no_values, edge_ids, edge_offsets, (0, 0, 0), 0.0, None, None, True, i))
+    return buffers
+
+def seam_angle(obj3d):
+    """Returns the largest angle in degrees between normals of vertices at the same place."""
+    positions = np.asarray(obj3d.geometry.attributes["position"].array)
+    normals = np.asarray(obj3d.geometry.attributes["normal"].array, dtype='float64')
+    normals /= np.linalg.norm(normals, axis=1)[:, None]
+    _, inverse = np.unique(positions.round(4), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    # only vertices of the side face, the caps meet it at a right angle on purpose
+    side = np.abs(normals[:, 2]) < 0.5
+    angles = [0.0]
+    order = np.argsort(inverse[side], kind='stable')
+    groups = np.split(normals[side][order], np.flatnonzero(np.diff(inverse[side][order])) + 1)
+    for group in groups:
+        if len(group) > 1:
+            angles.append(np.degrees(np.arccos(np.clip(group @ group[0], -1, 1))).max())
+    return max(angles)
+
+def main(num_objects=200, num_segments=64):
+    for soup in [False, True]:
+        buffers = scene(num_objects, num_segments, soup)
+        print("{} cylinders{}: {} vertices".format(num_objects, " as triangle soup" if soup else "",
+                                                   sum(len(b.vertices) for b in buffers)))
+        for tolerance in [None, 0, 1e-4]:
+            config = RendererConfig()
+            config.weld_tolerance = tolerance
+            stats = RenderStats()
+            start = time.perf_counter()
+            group, _ = create_geometries(buffers, config, stats=stats)
+            elapsed = time.perf_counter() - start
+            stats.count_widgets(group)
+            print("  weld_tolerance={:7s} {:8d} removed {:10.1f} kB {:6.3f} s  seam {:5.1f} deg"
+                  .format(str(tolerance), stats.removed_vertices, stats.buffer_bytes / 1024, elapsed,
+                          seam_angle(group.children[0])))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
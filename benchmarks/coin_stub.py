@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lightweight stand-in for the parts of `pivy.coin` used by `freecadviewer`, so the benchmarks
+can build and traverse scene graphs where pivy is not installed. Call `install` before
+importing `freecadviewer`, it keeps the real pivy if there is one.
+
+Multiple value fields hold numpy arrays and print them like Coin does on every `get`, in
+chunks so the peak memory is the text and its joined copy like with pivy. Formatting runs in
+Python instead of C, so absolute timings of reading fields differ from pivy.
+"""
+
+import sys
+import types
+
+import numpy as np
+
+FORMAT_CHUNK_ROWS = 65536
+
+
+class SoMField():
+    """A multiple value field, e.g. `SoMFVec3f` or `SoMFInt32`."""
+    width = 1
+    dtype = 'int32'
+    def __init__(self, values=()):
+        self.setValues(values)
+    def setValues(self, values):
+        self._values = np.asarray(values, dtype=self.dtype).reshape(-1, self.width) if self.width > 1 \
+            else np.asarray(values, dtype=self.dtype).ravel()
+    def getValues(self, start=0):
+        return [tuple(value) if self.width > 1 else value for value in self._values[start:].tolist()]
+    def getNum(self):
+        return len(self._values)
+    def __len__(self):
+        return len(self._values)
+    def __getitem__(self, index):
+        value = self._values[index].tolist()
+        return tuple(value) if self.width > 1 else value
+    def __iter__(self):
+        # one value at a time like pivy, without a list of all of them
+        for index in range(len(self._values)):
+            yield self[index]
+    def get(self):
+        """
+        Returns the values formatted like `SoField::get` with `%g`, i.e. `[ 0 0 0, 1 0 0 ]`.
+        """
+        row_format = " ".join(["%g"] * self.width)
+        chunks = []
+        for start in range(0, len(self._values), FORMAT_CHUNK_ROWS):
+            rows = self._values[start:start + FORMAT_CHUNK_ROWS].reshape(-1, self.width).tolist()
+            chunks.append(", ".join([row_format % tuple(row) for row in rows]))
+        if len(self._values) == 1:
+            return chunks[0]
+        return "[ " + ", ".join(chunks) + " ]"
+
+class SoMFInt32(SoMField):
+    pass
+
+class SoMFFloat(SoMField):
+    dtype = 'float32'
+
+class SoMFVec3f(SoMField):
+    width = 3
+    dtype = 'float32'
+
+class SoMFColor(SoMFVec3f):
+    pass
+
+class SoSField():
+    """A single value field."""
+    def __init__(self, value):
+        self._value = value
+    def getValue(self):
+        return self._value
+    def setValue(self, value):
+        self._value = value
+
+class SbRotation():
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=1.0):
+        self._quaternion = (x, y, z, w)
+    def getValue(self):
+        return self._quaternion
+
+class SoNode():
+    pass
+
+class SoGroup(SoNode):
+    def __init__(self):
+        self._children = []
+    def addChild(self, child):
+        self._children.append(child)
+    def getNumChildren(self):
+        return len(self._children)
+    def getChild(self, index):
+        return self._children[index]
+    def __iter__(self):
+        return iter(self._children)
+    def __len__(self):
+        return len(self._children)
+
+class SoSeparator(SoGroup):
+    pass
+
+class SoSwitch(SoGroup):
+    def __init__(self):
+        super().__init__()
+        self.whichChild = SoSField(0)
+
+class SoCoordinate3(SoNode):
+    def __init__(self):
+        self.point = SoMFVec3f()
+
+class SoMaterial(SoNode):
+    def __init__(self):
+        self.diffuseColor = SoMFColor([(0.8, 0.8, 0.8)])
+        self.emissiveColor = SoMFColor([(0.0, 0.0, 0.0)])
+        self.transparency = SoMFFloat([0.0])
+
+class SoTransform(SoNode):
+    def __init__(self):
+        self.translation = SoSField((0.0, 0.0, 0.0))
+        self.rotation = SoSField(SbRotation())
+
+class SoIndexedFaceSet(SoNode):
+    def __init__(self):
+        self.coordIndex = SoMFInt32()
+        self.partIndex = SoMFInt32()
+
+class SoIndexedLineSet(SoNode):
+    def __init__(self):
+        self.coordIndex = SoMFInt32()
+
+def install() -> bool:
+    """
+    Registers this module as `pivy.coin` unless pivy can be imported.
+    Returns whether the stand-in is used.
+    """
+    try:
+        from pivy import coin # pylint: disable=import-outside-toplevel,unused-import
+        return False
+    except ImportError:
+        pass
+    pivy = types.ModuleType("pivy")
+    pivy.coin = sys.modules[__name__]
+    sys.modules["pivy"] = pivy
+    sys.modules["pivy.coin"] = pivy.coin
+    return True
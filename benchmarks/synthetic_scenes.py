@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+"""
+Builds synthetic Coin scene graphs shaped like the ones of FreeCAD part view providers,
+from a single tiny object up to millions of triangles and thousands of objects.
+Uses `coin_stub` where pivy is not installed.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "IPythonFreeCADViewer"))
+import coin_stub # pylint: disable=wrong-import-position
+coin_stub.install()
+from pivy import coin # pylint: disable=wrong-import-position,wrong-import-order
+from bench_normals import grid_mesh # pylint: disable=wrong-import-position
+
+# name: (number of objects, triangles per object)
+SCENE_SIZES = {
+    "tiny": (1, 100),
+    "small": (10, 2000),
+    "medium": (100, 10000),
+    "many_objects": (2000, 500),
+    "large": (4, 500000),
+}
+
+
+def synthetic_object(num_triangles, num_faces=6, num_edges=12, offset=0.0):
+    """
+    Returns the separator of an object with a triangulated wavy grid of about
+    `num_triangles` triangles split into `num_faces` shape faces, and `num_edges` polylines.
+
+    Like FreeCAD it holds a transform and a switch with the face set twice (flat and shaded)
+    and one line set, every set with its own material and coordinates.
+    """
+    faces, vertices = grid_mesh(num_triangles)
+    vertices = vertices + np.array([offset, 0, 0], dtype='float32')
+    coord_index = np.concatenate([faces.astype('int32'), -np.ones((len(faces), 1), dtype='int32')], axis=1)
+    part_index = np.diff(np.linspace(0, len(faces), num_faces + 1).astype(int))
+
+    separator = coin.SoSeparator()
+    transform = coin.SoTransform()
+    transform.translation.setValue((0.0, 0.0, float(offset) / 10))
+    separator.addChild(transform)
+    switch = coin.SoSwitch()
+    separator.addChild(switch)
+    for _ in range(2):
+        face_separator = coin.SoSeparator()
+        material = coin.SoMaterial()
+        material.diffuseColor.setValues([(0.8, 0.6, 0.2)])
+        coordinates = coin.SoCoordinate3()
+        coordinates.point.setValues(vertices)
+        face_set = coin.SoIndexedFaceSet()
+        face_set.coordIndex.setValues(coord_index.ravel())
+        face_set.partIndex.setValues(part_index)
+        for node in (material, coordinates, face_set):
+            face_separator.addChild(node)
+        switch.addChild(face_separator)
+
+    # the edges follow rows of the grid
+    side = int(np.sqrt(len(vertices)))
+    rows = np.linspace(0, side - 1, min(num_edges, side)).astype(int)
+    line_index = np.concatenate([np.append(np.arange(row * side, (row + 1) * side), -1) for row in rows])
+    line_separator = coin.SoSeparator()
+    material = coin.SoMaterial()
+    material.diffuseColor.setValues([(0.1, 0.1, 0.1)])
+    coordinates = coin.SoCoordinate3()
+    coordinates.point.setValues(vertices)
+    line_set = coin.SoIndexedLineSet()
+    line_set.coordIndex.setValues(line_index)
+    for node in (material, coordinates, line_set):
+        line_separator.addChild(node)
+    switch.addChild(line_separator)
+    return separator
+
+def synthetic_scene(num_objects, triangles_per_object, **kwargs):
+    """Returns the root node of a scene with `num_objects` objects and their names."""
+    root = coin.SoSeparator()
+    for i in range(num_objects):
+        root.addChild(synthetic_object(triangles_per_object, offset=1.1 * np.sqrt(triangles_per_object / 2) * i,
+                                       **kwargs))
+    return root, ["Object{:04d}".format(i) for i in range(num_objects)]
+
+def nested_scene(depth, num_objects=2, triangles_per_object=100):
+    """
+    Returns the root node of a scene whose objects are nested `depth` separators deep,
+    like deep assemblies, and their names.
+    """
+    root = coin.SoSeparator()
+    for i in range(num_objects):
+        parent = coin.SoSeparator()
+        root.addChild(parent)
+        for _ in range(depth):
+            child = coin.SoSeparator()
+            parent.addChild(child)
+            parent = child
+        parent.addChild(synthetic_object(triangles_per_object, offset=20.0 * i))
+    return root, ["Assembly{:04d}".format(i) for i in range(num_objects)]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+"""
+Makes `freecadviewer` and `freecadgeometry` importable without FreeCAD: the benchmark scenes put the module on the
+path and install `coin_stub` where pivy is missing.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+import synthetic_scenes # pylint: disable=wrong-import-position,unused-import
+import freecadgeometry # pylint: disable=wrong-import-position,wrong-import-order
+import freecadviewer # pylint: disable=wrong-import-position,wrong-import-order
+from tests import fake_freecad # pylint: disable=wrong-import-position
+
+
+@pytest.fixture
+def freecad(monkeypatch):
+    """Returns a fake FreeCAD module, observed by `CHANGE_TRACKER`, with a fake GUI converting its objects."""
+    app = fake_freecad.App()
+    app.gui = fake_freecad.Gui()
+    monkeypatch.setattr(freecadgeometry, "FreeCAD", app)
+    monkeypatch.setattr(freecadgeometry, "FreeCADGui", app.gui)
+    monkeypatch.setattr(freecadviewer, "FreeCADGui", app.gui)
+    monkeypatch.setattr(freecadgeometry.CHANGE_TRACKER, "registered", False)
+    freecadgeometry.CHANGE_TRACKER.register(app)
+    return app
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Stand-ins for the FreeCAD and FreeCADGui modules, just enough for the document functions:
+documents of objects whose scene graphs are synthetic Coin objects, and the document observer
+signals FreeCAD sends when documents and objects are created, changed or deleted.
+"""
+
+import os
+
+from synthetic_scenes import synthetic_object
+
+
+class App():
+    """
+    The FreeCAD module: creates documents and signals their changes to the observers. Files
+    are opened with the objects given in `files`, path -> list of (name, triangles).
+    """
+    def __init__(self):
+        self.observers = []
+        self.files = {}
+        self.documents = {}
+    def addDocumentObserver(self, observer): # pylint: disable=invalid-name
+        self.observers.append(observer)
+    def signal(self, slot, *args):
+        for observer in self.observers:
+            getattr(observer, slot)(*args)
+    def newDocument(self, name): # pylint: disable=invalid-name
+        doc = Document(self, name)
+        self.documents[name] = doc
+        self.signal("slotCreatedDocument", doc)
+        return doc
+    def openDocument(self, path): # pylint: disable=invalid-name
+        doc = self.newDocument(os.path.splitext(os.path.basename(path))[0])
+        doc.FileName = path
+        for name, num_triangles in self.files[path]:
+            doc.addObject(name, num_triangles)
+        doc.touched = False
+        return doc
+    def listDocuments(self): # pylint: disable=invalid-name
+        return dict(self.documents)
+    def closeDocument(self, name): # pylint: disable=invalid-name
+        self.signal("slotDeletedDocument", self.documents.pop(name))
+
+class Gui():
+    """The FreeCADGui module, counting the scene graphs it hands out."""
+    def __init__(self):
+        self.subgraphs = 0
+    def subgraphFromObject(self, obj): # pylint: disable=invalid-name
+        self.subgraphs += 1
+        return obj.subgraph()
+
+class Document():
+    """A document whose objects are kept in the order they were added."""
+    def __init__(self, app, name):
+        self.app = app
+        self.Name = name
+        self.FileName = ""
+        self.touched = False
+        self.Objects = []
+    def addObject(self, name, num_triangles=200, offset=0.0, shape=True, link=None): # pylint: disable=invalid-name
+        obj = DocumentObject(self, name, num_triangles, offset, shape, link)
+        self.Objects.append(obj)
+        self.touched = True
+        self.app.signal("slotCreatedObject", obj)
+        return obj
+    def removeObject(self, name): # pylint: disable=invalid-name
+        obj = self.getObject(name)
+        self.Objects.remove(obj)
+        self.app.signal("slotDeletedObject", obj)
+    def getObject(self, name): # pylint: disable=invalid-name
+        return next(obj for obj in self.Objects if obj.Name == name)
+    def isTouched(self): # pylint: disable=invalid-name
+        return self.touched
+
+class DocumentObject():
+    """
+    An object with a synthetic scene graph of `Size` triangles placed at `Offset`. Setting any
+    property signals the change, like FreeCAD does. `LinkedObject` makes it a link showing
+    the scene graph of its target, objects without `shape` have no `Shape` attribute.
+    """
+    def __init__(self, doc, name, num_triangles, offset, shape, link):
+        object.__setattr__(self, "Document", doc)
+        object.__setattr__(self, "Name", name)
+        object.__setattr__(self, "Size", num_triangles)
+        object.__setattr__(self, "Offset", offset)
+        object.__setattr__(self, "LinkedObject", link)
+        if shape:
+            object.__setattr__(self, "Shape", object())
+        object.__setattr__(self, "ViewObject", None)
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        self.Document.touched = True
+        self.Document.app.signal("slotChangedObject", self, name)
+    @property
+    def OutListRecursive(self): # pylint: disable=invalid-name
+        if self.LinkedObject is None:
+            return []
+        return [self.LinkedObject] + self.LinkedObject.OutListRecursive
+    def subgraph(self):
+        if self.LinkedObject is not None:
+            return self.LinkedObject.subgraph()
+        return synthetic_object(self.Size, offset=self.Offset)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+"""
+Geometry buffers for the tests, built without Coin.
+"""
+
+import numpy as np
+
+from bench_normals import grid_mesh
+from freecadviewer import GeometryBuffers, compute_normals
+
+
+def face_buffers(num_triangles, num_faces=6, offset=(0.0, 0.0, 0.0), object_index=0, translation=None,
+                 quaternion=None, color=(0.8, 0.6, 0.2)):
+    """Returns the buffers of a wavy grid of about `num_triangles` triangles split into `num_faces` shape faces."""
+    faces, vertices = grid_mesh(num_triangles)
+    vertices = vertices + np.asarray(offset, dtype='float32')
+    part_index = np.diff(np.linspace(0, len(faces), num_faces + 1).astype(int)).astype('int32')
+    return GeometryBuffers(vertices=vertices, faces=faces.astype('int32'), normals=compute_normals(faces, vertices),
+                           part_index=part_index, edge_ids=np.zeros(0, dtype='float32'),
+                           edge_offsets=np.zeros(0, dtype=np.intp), color=color, transparency=0.0,
+                           translation=translation, quaternion=quaternion, is_line=False, object_index=object_index)
+
+def line_buffers(num_edges, segments_per_edge, object_index=0):
+    """Returns the buffers of `num_edges` parallel polylines of `segments_per_edge` segments each."""
+    x = np.arange(segments_per_edge + 1, dtype='float32')
+    vertices = []
+    for edge in range(num_edges):
+        points = np.stack([x, np.full_like(x, edge), np.zeros_like(x)], axis=1)
+        vertices.append(np.stack([points[:-1], points[1:]], axis=1).reshape(-1, 3))
+    vertices = np.concatenate(vertices)
+    edge_ids = np.repeat(np.arange(1, num_edges + 1), 2 * segments_per_edge).astype('float32')
+    edge_offsets = np.arange(num_edges + 1) * 2 * segments_per_edge
+    return GeometryBuffers(vertices=vertices, faces=np.zeros((0, 3), dtype='int32'),
+                           normals=np.zeros((0, 3), dtype='float32'), part_index=np.zeros(0, dtype='int32'),
+                           edge_ids=edge_ids, edge_offsets=edge_offsets, color=(0.1, 0.1, 0.1), transparency=0.0,
+                           translation=None, quaternion=None, is_line=True, object_index=object_index)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import subprocess
+import sys
+
+from batch import process_files, batch_paths
+from freecadgeometry import write_geometry_cache, disk_cache_path, file_stamp
+from tests.geometry import face_buffers, line_buffers
+
+MODULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "IPythonFreeCADViewer")
+
+
+def test_batch_imports_no_widgets():
+    imported = subprocess.run([sys.executable, "-c", "import json, sys, batch; print(json.dumps(list(sys.modules)))"],
+                              cwd=MODULES, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    assert not {"pythreejs", "ipywidgets", "IPython", "freecadviewer"} & set(json.loads(imported))
+
+def test_process_files_collects_results_and_failures(tmp_path):
+    buffers = [face_buffers(500), line_buffers(4, 3)]
+    (tmp_path / "parts").mkdir()
+    for name in ["b.FCStd", "a.FCStd", os.path.join("parts", "c.fcstd")]:
+        path = str(tmp_path / name)
+        with open(path, "wb") as document:
+            document.write(b"stand-in")
+        write_geometry_cache(disk_cache_path(path), buffers, ["Box"], file_stamp(path))
+    (tmp_path / "uncached.FCStd").write_bytes(b"stand-in")
+    paths = batch_paths([str(tmp_path)])
+    assert [os.path.relpath(path, str(tmp_path)) for path in paths] == \
+        ["a.FCStd", "b.FCStd", "uncached.FCStd", os.path.join("parts", "c.fcstd")]
+    results = process_files([str(tmp_path), str(tmp_path / "missing.FCStd")], processes=2, export_glb=True)
+    assert [result.path for result in results] == paths + [str(tmp_path / "missing.FCStd")]
+    for result in results[:2] + results[3:4]:
+        assert result.error is None and result.objects == 1 and result.triangles == len(buffers[0].faces)
+        assert os.path.isfile(result.glb_path) and result.buffers()[1] == ["Box"]
+    assert "FreeCAD is needed" in results[2].error and "No such file" in results[4].error
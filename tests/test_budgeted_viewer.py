@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from freecadviewer import BudgetedViewer, RendererConfig, lod_meshes, object_widgets
+from tests.geometry import face_buffers
+
+NAMES = ["Part{}".format(i) for i in range(6)]
+
+
+def viewer_with_budget(num_objects, share_geometry=False):
+    """Returns a viewer of a row of objects that has room for the geometry of `num_objects` of them."""
+    buffers = [face_buffers(500, offset=(0.0, 0.0, 0.0) if share_geometry else (30.0 * i, 0.0, 0.0),
+                            object_index=i) for i in range(len(NAMES))]
+    config = RendererConfig()
+    config.memory_budget = num_objects * buffers[0].nbytes
+    config.share_geometry = share_geometry
+    config.highlight_mode = "overlay"
+    viewer = BudgetedViewer(buffers, NAMES, config)
+    viewer.unload(viewer.loaded)
+    return viewer
+
+def widgets(viewer, name):
+    return [widget for obj in viewer._loaded[name] for obj3d in lod_meshes(obj) # pylint: disable=protected-access
+            for widget in [obj3d] + object_widgets(obj3d)]
+
+def test_least_recently_viewed_objects_are_evicted_and_closed():
+    viewer = viewer_with_budget(2)
+    viewer.load(NAMES[:2])
+    first = widgets(viewer, NAMES[0])
+    assert viewer.load(NAMES[2:3]) == NAMES[2:3]
+    assert viewer.loaded == NAMES[1:3] and viewer.loaded_bytes <= viewer.renderer_config.memory_budget
+    assert all(widget.comm is None for widget in first)
+    assert viewer._proxies[NAMES[0]] in viewer.geometries.children # pylint: disable=protected-access
+    # viewing an object again keeps it, the other one is evicted
+    viewer.load(NAMES[1:2])
+    viewer.load(NAMES[3:4])
+    assert viewer.loaded == [NAMES[1], NAMES[3]]
+    assert all(widget.comm is not None for widget in widgets(viewer, NAMES[1]))
+
+def test_shared_geometry_stays_open_while_used():
+    viewer = viewer_with_budget(2, share_geometry=True)
+    viewer.load(NAMES[:2])
+    first = widgets(viewer, NAMES[0])
+    viewer.load(NAMES[2:3])
+    assert first[0].comm is None
+    shared = [widget for widget in first[1:] if any(widget is other for other in widgets(viewer, NAMES[1]))]
+    assert shared and all(widget.comm is not None for widget in shared)
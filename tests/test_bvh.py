@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from freecadviewer import buffers_to_index, build_bvh, bvh_candidates, world_vertices, ray_triangle_distances,\
+    closest_points_on_triangles
+from tests.geometry import face_buffers
+
+
+@pytest.fixture(scope="module")
+def scene():
+    buffers = [face_buffers(3000, num_faces=7, object_index=0),
+               face_buffers(2000, num_faces=4, object_index=1, translation=(10.0, 5.0, 2.0),
+                            quaternion=(0.0, 0.0, 0.6, 0.8)),
+               face_buffers(500, num_faces=3, object_index=2, offset=(-20.0, 0.0, -3.0))]
+    names = ["Box", "Cylinder", "Sphere"]
+    triangles = []
+    for obj_buffers in buffers:
+        corners = world_vertices(obj_buffers)[obj_buffers.faces]
+        shape_faces = np.searchsorted(np.cumsum(obj_buffers.part_index), np.arange(len(corners)), side='right') + 1
+        triangles.extend((names[obj_buffers.object_index], int(face), corner) for face, corner in zip(shape_faces,
+                                                                                                     corners))
+    return buffers_to_index(buffers, names, leaf_size=4), triangles
+
+def brute_force_ray(triangles, origin, direction):
+    corners = np.array([corner for _, _, corner in triangles])
+    count = len(corners)
+    distances = ray_triangle_distances(np.tile(origin, (count, 1)), np.tile(direction, (count, 1)),
+                                       corners[:, 0], corners[:, 1], corners[:, 2])
+    return distances
+
+def test_candidates_contain_every_overlap():
+    rng = np.random.default_rng(1)
+    prim_min = rng.uniform(0, 100, (1000, 3))
+    prim_max = prim_min + rng.uniform(0, 5, (1000, 3))
+    tree = build_bvh(prim_min, prim_max, leaf_size=3)
+    point = np.array([50.0, 50.0, 50.0])
+    def node_test(query_ids, lower, upper):
+        return np.all((lower <= point + 10) & (upper >= point - 10), axis=1)
+    _, candidates = bvh_candidates(tree, [0], node_test)
+    expected = np.flatnonzero(np.all((prim_min <= point + 10) & (prim_max >= point - 10), axis=1))
+    assert set(expected) <= set(candidates.tolist())
+
+def test_rays_match_brute_force(scene):
+    index, triangles = scene
+    rng = np.random.default_rng(2)
+    origins = np.column_stack([rng.uniform(-25, 45, 200), rng.uniform(-5, 45, 200), np.full(200, 30.0)])
+    directions = np.column_stack([rng.uniform(-0.3, 0.3, 200), rng.uniform(-0.3, 0.3, 200), -np.ones(200)])
+    hits = index.ray(origins, directions)
+    directions = directions / np.linalg.norm(directions, axis=1)[:, None]
+    assert np.isfinite(hits.distance).sum() > 50
+    for i, (origin, direction) in enumerate(zip(origins, directions)):
+        distances = brute_force_ray(triangles, origin, direction)
+        best = int(np.argmin(distances))
+        if np.isinf(distances[best]):
+            assert np.isinf(hits.distance[i]) and hits.objects[i] is None
+            continue
+        assert hits.distance[i] == pytest.approx(distances[best])
+        # rays through a shared edge may report either face
+        same_face = [j for j, triangle in enumerate(triangles) if triangle[:2] == (hits.objects[i], hits.faces[i])]
+        assert distances[same_face].min() == pytest.approx(distances[best])
+        np.testing.assert_allclose(hits.point[i], origin + direction * distances[best])
+
+def test_nearest_matches_brute_force(scene):
+    index, triangles = scene
+    rng = np.random.default_rng(3)
+    points = rng.uniform((-30, -10, -10), (50, 50, 10), (100, 3))
+    hits = index.nearest(points)
+    corners = np.array([corner for _, _, corner in triangles])
+    for i, point in enumerate(points):
+        closest = closest_points_on_triangles(np.tile(point, (len(corners), 1)), corners[:, 0], corners[:, 1],
+                                              corners[:, 2])
+        distances = np.linalg.norm(closest - point, axis=1)
+        assert hits.distance[i] == pytest.approx(distances.min())
+        assert np.linalg.norm(hits.point[i] - point) == pytest.approx(distances.min())
+    assert index.nearest(points, max_distance=1e-6).objects.count(None) == len(points)
+
+@pytest.mark.parametrize("inside", [False, True])
+def test_boxes_match_brute_force(scene, inside):
+    index, triangles = scene
+    box_min = np.array([[0.0, 0.0, -5.0], [-25.0, -5.0, -5.0], [100.0, 100.0, 100.0]])
+    box_max = np.array([[20.0, 10.0, 5.0], [-10.0, 10.0, 5.0], [101.0, 101.0, 101.0]])
+    results = index.boxes(box_min, box_max, inside=inside)
+    for lower, upper, result in zip(box_min, box_max, results):
+        faces = {}
+        for name, face, corner in triangles:
+            if inside:
+                within = bool(np.all((corner >= lower) & (corner <= upper)))
+                faces[(name, face)] = faces.get((name, face), True) and within
+            elif np.all((corner.min(axis=0) <= upper) & (corner.max(axis=0) >= lower)):
+                faces[(name, face)] = True
+        assert result == sorted(key for key, value in faces.items() if value)
+    assert results[2] == []
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from freecadviewer import mesh_chunk_ranges, create_face_geom, build_face_lookup, shape_face_by_triangle,\
+    MAX_UINT16_VERTICES
+from tests.geometry import face_buffers
+
+
+def chunk_meshes(buffers):
+    return create_face_geom(buffers.vertices, buffers.faces, buffers.color, 0, part_index=buffers.part_index,
+                            uint32_indices=False, normals=buffers.normals)
+
+def test_small_mesh_is_one_chunk():
+    buffers = face_buffers(1000)
+    assert mesh_chunk_ranges(buffers.faces, buffers.part_index) == [(0, len(buffers.faces))]
+
+def test_empty_mesh_has_no_chunks():
+    assert mesh_chunk_ranges(np.zeros((0, 3), dtype='int32')) == []
+
+@pytest.mark.parametrize("max_vertices", [3, 4, 5, 100])
+def test_ranges_cover_all_triangles_within_the_vertex_limit(max_vertices):
+    buffers = face_buffers(2000, num_faces=7)
+    ranges = mesh_chunk_ranges(buffers.faces, buffers.part_index, max_vertices)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(buffers.faces)
+    assert all(end == start for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]))
+    assert all(len(np.unique(buffers.faces[start:end])) <= max_vertices for start, end in ranges)
+
+def test_chunks_are_cut_at_shape_faces():
+    buffers = face_buffers(200000, num_faces=40)
+    ranges = mesh_chunk_ranges(buffers.faces, buffers.part_index)
+    assert len(ranges) > 1
+    face_ends = set(np.cumsum(buffers.part_index).tolist())
+    assert all(end in face_ends for _, end in ranges)
+
+def test_part_index_beyond_the_faces_is_clamped():
+    buffers = face_buffers(2000)
+    part_index = np.append(buffers.part_index, 1000)
+    ranges = mesh_chunk_ranges(buffers.faces, part_index, 100)
+    assert ranges[-1][1] == len(buffers.faces)
+    short = mesh_chunk_ranges(buffers.faces, buffers.part_index[:2], 100)
+    assert short[-1][1] == len(buffers.faces)
+
+@pytest.mark.parametrize("num_triangles", [10**5, 10**6])
+def test_chunked_meshes_keep_every_triangle(num_triangles):
+    buffers = face_buffers(num_triangles, num_faces=50)
+    meshes = chunk_meshes(buffers)
+    assert len(meshes) >= -(-len(buffers.vertices) // MAX_UINT16_VERTICES)
+    offset = 0
+    for mesh in meshes:
+        positions = mesh.geometry.attributes["position"].array
+        index = mesh.geometry.attributes["index"].array
+        assert len(positions) <= MAX_UINT16_VERTICES and index.dtype == np.uint16
+        assert mesh.triangle_offset == offset
+        triangles = index.reshape(-1, 3)
+        expected = buffers.vertices[buffers.faces[offset:offset + len(triangles)]]
+        np.testing.assert_array_equal(positions[triangles], expected)
+        offset += len(triangles)
+    assert offset == len(buffers.faces)
+
+def test_uint32_indices_keep_one_mesh():
+    buffers = face_buffers(200000)
+    mesh, = create_face_geom(buffers.vertices, buffers.faces, buffers.color, 0, part_index=buffers.part_index)
+    assert mesh.geometry.attributes["index"].array.dtype == np.uint32
+
+def test_face_lookup_across_chunks():
+    buffers = face_buffers(200000, num_faces=13)
+    triangle_ends = np.cumsum(buffers.part_index)
+    for mesh in chunk_meshes(buffers):
+        index = mesh.geometry.attributes["index"].array
+        lookup = build_face_lookup(buffers.part_index, index, mesh.triangle_offset)
+        triangles = index.reshape(-1, 3)
+        for face_index in np.linspace(0, len(triangles) - 1, 50).astype(int):
+            shape_face = shape_face_by_triangle(lookup[0], mesh.triangle_offset + face_index)
+            assert shape_face == np.searchsorted(triangle_ends, mesh.triangle_offset + face_index, side='right') + 1
+            _, vertex_offsets, face_vertices = lookup
+            assert set(triangles[face_index]) <= set(face_vertices[vertex_offsets[shape_face - 1]:
+                                                                   vertex_offsets[shape_face]])
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import os
+import zipfile
+
+import numpy as np
+import pytest
+
+from freecadgeometry import write_geometry_cache, read_geometry_cache, load_document_cache, disk_cache_path,\
+    file_stamp, file_to_buffers, save_document_cache, saved_view_properties, GEOMETRY_ARRAY_FIELDS,\
+    DISK_CACHE_ALIGNMENT
+from tests.geometry import face_buffers, line_buffers
+
+EXAMPLE_DOCUMENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_freecad_0.18_macos.FCStd")
+GUI_DOCUMENT = """<?xml version='1.0' encoding='utf-8'?>
+<Document SchemaVersion="1">
+    <ViewProviderData Count="1">
+        <ViewProvider name="Box" expanded="0">
+            <Properties Count="3">
+                <Property name="LineColor" type="App::PropertyColor">
+                    <PropertyColor value="65280"/>
+                </Property>
+                <Property name="ShapeColor" type="App::PropertyColor">
+                    <PropertyColor value="4278190080"/>
+                </Property>
+                <Property name="Transparency" type="App::PropertyPercent">
+                    <Integer value="40"/>
+                </Property>
+            </Properties>
+        </ViewProvider>
+    </ViewProviderData>
+</Document>
+"""
+
+
+@pytest.fixture
+def buffers():
+    return [face_buffers(1000, translation=(1.0, 2.0, 3.0), quaternion=(0.0, 0.0, 0.6, 0.8)),
+            line_buffers(4, 7), face_buffers(300, object_index=1, color=(0.1, 0.2, 0.3))]
+
+def assert_same_buffers(actual, expected):
+    assert len(actual) == len(expected)
+    for actual_buffers, expected_buffers in zip(actual, expected):
+        for field in GEOMETRY_ARRAY_FIELDS:
+            actual_array = getattr(actual_buffers, field)
+            expected_array = np.asarray(getattr(expected_buffers, field))
+            assert actual_array.dtype == expected_array.dtype and actual_array.shape == expected_array.shape
+            np.testing.assert_array_equal(actual_array, expected_array)
+        for field in ["color", "transparency", "translation", "quaternion", "is_line", "object_index"]:
+            assert getattr(actual_buffers, field) == getattr(expected_buffers, field)
+
+def test_round_trip(tmp_path, buffers):
+    path = str(tmp_path / "model.FCStd.geom")
+    stamp = dict(size=1, mtime_ns=2)
+    write_geometry_cache(path, buffers, ["Box", "Cylinder"], stamp)
+    read_buffers, names, header = read_geometry_cache(path)
+    assert names == ["Box", "Cylinder"] and header["document"] == stamp
+    assert_same_buffers(read_buffers, buffers)
+
+def test_arrays_are_aligned_read_only_views(tmp_path, buffers):
+    path = str(tmp_path / "model.FCStd.geom")
+    write_geometry_cache(path, buffers, ["Box", "Cylinder"], {})
+    read_buffers, _, _ = read_geometry_cache(path)
+    for obj_buffers in read_buffers:
+        for field in GEOMETRY_ARRAY_FIELDS:
+            array = getattr(obj_buffers, field)
+            assert not array.flags.writeable and not array.flags.owndata
+    vertices = read_buffers[0].vertices
+    assert (vertices.__array_interface__["data"][0] - vertices.base.__array_interface__["data"][0]) \
+        % DISK_CACHE_ALIGNMENT == 0
+
+def test_empty_document(tmp_path):
+    path = str(tmp_path / "empty.geom")
+    write_geometry_cache(path, [], [], {})
+    assert read_geometry_cache(path)[:2] == ([], [])
+
+def test_no_partial_file_is_left(tmp_path, buffers):
+    path = str(tmp_path / "model.FCStd.geom")
+    write_geometry_cache(path, buffers, ["Box", "Cylinder"], {})
+    assert os.listdir(str(tmp_path)) == ["model.FCStd.geom"]
+
+def test_document_cache_follows_the_file(tmp_path, buffers):
+    fcstd = tmp_path / "model.FCStd"
+    fcstd.write_bytes(b"document")
+    write_geometry_cache(disk_cache_path(str(fcstd)), buffers, ["Box", "Cylinder"], file_stamp(str(fcstd)))
+    read_buffers, names = load_document_cache(str(fcstd))
+    assert names == ["Box", "Cylinder"]
+    assert_same_buffers(read_buffers, buffers)
+    assert_same_buffers(file_to_buffers(str(fcstd))[0], buffers)
+    # saving the document outdates the cache
+    fcstd.write_bytes(b"changed document")
+    assert load_document_cache(str(fcstd)) is None
+
+def test_invalid_cache_is_ignored(tmp_path):
+    fcstd = tmp_path / "model.FCStd"
+    fcstd.write_bytes(b"document")
+    assert load_document_cache(str(fcstd)) is None
+    (tmp_path / "model.FCStd.geom").write_bytes(b"something else entirely")
+    assert load_document_cache(str(fcstd)) is None
+
+def test_documents_with_unsaved_changes_are_refused(tmp_path, freecad):
+    doc = freecad.newDocument("Doc")
+    doc.addObject("Box")
+    doc.FileName = str(tmp_path / "model.FCStd")
+    (tmp_path / "model.FCStd").write_bytes(b"document")
+    assert doc.isTouched()
+    with pytest.raises(Exception, match="unsaved changes"):
+        save_document_cache(doc, None)
+    assert not os.path.exists(disk_cache_path(doc.FileName))
+    doc.touched = False
+    assert save_document_cache(doc, None) == disk_cache_path(doc.FileName)
+    _, names = load_document_cache(doc.FileName)
+    assert names == ["Box"]
+
+def test_view_properties_are_read_from_the_file():
+    properties = saved_view_properties(EXAMPLE_DOCUMENT)
+    assert sorted(properties) == ["Box", "Sphere", "Torus"]
+    assert properties["Sphere"] == dict(ShapeColor=(0.8, 0.8, 0.8), LineColor=(25 / 255,) * 3, Transparency=0.0)
+
+def test_converted_files_keep_their_saved_colors(tmp_path, freecad):
+    path = str(tmp_path / "model.FCStd")
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("Document.xml", "<Document/>")
+        archive.writestr("GuiDocument.xml", GUI_DOCUMENT)
+    freecad.files[path] = [("Box", 200), ("Cylinder", 200)]
+    buffers, names = file_to_buffers(path)
+    assert names == ["Box", "Cylinder"] and not freecad.listDocuments()
+    colors = {(names[obj_buffers.object_index], obj_buffers.is_line): (obj_buffers.color, obj_buffers.transparency)
+              for obj_buffers in buffers}
+    assert colors[("Box", False)] == ((1.0, 0.0, 0.0), 0.4)
+    assert colors[("Box", True)][0] == (0.0, 0.0, 1.0)
+    # objects without saved values keep the colors of their scene graph
+    np.testing.assert_allclose(colors[("Cylinder", False)][0], (0.8, 0.6, 0.2), rtol=1e-6)
+    assert_same_buffers(load_document_cache(path)[0], buffers)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from bench_highlight_traffic import CommTraffic
+from freecadviewer import DocumentViewer, GeometryCache, RendererConfig
+
+
+@pytest.fixture
+def document(freecad):
+    doc = freecad.newDocument("Doc")
+    box = doc.addObject("Box")
+    doc.addObject("Mesh", offset=30.0, shape=False)
+    doc.addObject("Link", shape=False, link=box)
+    return doc
+
+def shown_objects(viewer):
+    return [obj.freecad_name for obj in viewer.geometries.children]
+
+def test_update_without_changes_sends_nothing(freecad, document):
+    viewer = DocumentViewer(document, RendererConfig(), GeometryCache())
+    subgraphs = freecad.gui.subgraphs
+    with CommTraffic() as traffic:
+        assert viewer.update() == ([], [], [])
+    assert traffic.bytes_sent == 0 and freecad.gui.subgraphs == subgraphs
+    document.getObject("Mesh").Size = 400
+    with CommTraffic() as traffic:
+        assert viewer.update() == ([], [], ["Mesh"])
+    assert traffic.bytes_sent > 0 and freecad.gui.subgraphs == subgraphs + 1
+
+def test_update_replaces_only_changed_objects(freecad, document):
+    viewer = DocumentViewer(document, RendererConfig(), GeometryCache())
+    assert viewer.update() == ([], [], [])
+    document.getObject("Mesh").Size = 400
+    assert viewer.update() == ([], [], ["Mesh"])
+    # the link shows its target, so it changes with it
+    document.getObject("Box").Size = 400
+    assert viewer.update() == ([], [], ["Box", "Link"])
+    document.removeObject("Mesh")
+    document.addObject("Sphere", offset=60.0)
+    assert viewer.update() == (["Sphere"], ["Mesh"], [])
+    assert sorted(set(shown_objects(viewer))) == ["Box", "Link", "Sphere"]
+    assert viewer.update() == ([], [], [])
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from freecadviewer import build_face_lookup, shape_face_by_triangle, index_by_face_index,\
+    vertices_col_highlight_face, vertices_col_highlight_lookup, face_highlight_geometry, create_face_geom
+from tests.geometry import face_buffers
+
+
+def test_shape_face_by_triangle():
+    triangle_ends = np.cumsum([2, 3, 1])
+    assert [shape_face_by_triangle(triangle_ends, i) for i in range(7)] == [1, 1, 2, 2, 2, 3, None]
+    assert index_by_face_index([2, 3, 1], 4) == 2
+
+def test_empty_shape_faces_are_skipped():
+    triangle_ends = np.cumsum([2, 0, 0, 1])
+    assert [shape_face_by_triangle(triangle_ends, i) for i in range(3)] == [1, 1, 4]
+
+@pytest.mark.parametrize("triangle_offset", [0, 100])
+def test_lookup_matches_brute_force(triangle_offset):
+    buffers = face_buffers(2000, num_faces=9)
+    part_index = np.concatenate([[triangle_offset], buffers.part_index])
+    triangle_ends, vertex_offsets, face_vertices = build_face_lookup(part_index, buffers.faces, triangle_offset)
+    triangle_starts = np.concatenate([[0], triangle_ends])
+    for shape_face in range(1, len(part_index) + 1):
+        start = max(triangle_starts[shape_face - 1] - triangle_offset, 0)
+        end = max(triangle_starts[shape_face] - triangle_offset, 0)
+        expected = np.unique(buffers.faces[start:end])
+        np.testing.assert_array_equal(face_vertices[vertex_offsets[shape_face - 1]:vertex_offsets[shape_face]],
+                                      expected)
+
+def test_highlight_colors_agree():
+    buffers = face_buffers(2000, num_faces=9)
+    lookup = build_face_lookup(buffers.part_index, buffers.faces)
+    default = np.tile(np.float32([0.8, 0.6, 0.2]), (len(buffers.vertices), 1))
+    for shape_face in range(1, len(buffers.part_index) + 1):
+        np.testing.assert_array_equal(
+            vertices_col_highlight_lookup(shape_face, default, lookup),
+            vertices_col_highlight_face(shape_face, default, buffers.part_index, buffers.faces.ravel()))
+
+def test_face_highlight_geometry_holds_the_shape_face():
+    buffers = face_buffers(2000, num_faces=5)
+    mesh, = create_face_geom(buffers.vertices, buffers.faces, buffers.color, 0, part_index=buffers.part_index)
+    triangle_ends = np.cumsum(buffers.part_index)
+    geometry = face_highlight_geometry(mesh, 3, triangle_ends)
+    positions = geometry.attributes["position"].array
+    triangles = positions[geometry.attributes["index"].array.reshape(-1, 3)]
+    expected = buffers.vertices[buffers.faces[triangle_ends[1]:triangle_ends[2]]]
+    np.testing.assert_array_equal(triangles, expected)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""
+Checks the binary glTF written by `buffers_to_gltf` against the rules of the glTF 2.0
+specification that the Khronos glTF validator reports as errors for such assets: GLB layout,
+buffer view and accessor bounds and alignment, position bounds, unit normals, index ranges
+and primitive sizes, and the node hierarchy.
+"""
+
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from freecadgeometry import buffers_to_gltf, write_glb, GLB_MAGIC, GLB_JSON_CHUNK, GLB_BIN_CHUNK
+from tests.geometry import face_buffers, line_buffers
+
+COMPONENT_DTYPES = {5120: 'int8', 5121: 'uint8', 5122: 'int16', 5123: 'uint16', 5125: 'uint32', 5126: 'float32'}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4}
+
+
+def parse_glb(glb):
+    """Returns the JSON and binary chunk of the GLB after checking its layout."""
+    magic, version, length = struct.unpack_from("<III", glb)
+    assert magic == GLB_MAGIC and version == 2 and length == len(glb)
+    json_length, json_type = struct.unpack_from("<II", glb, 12)
+    assert json_type == GLB_JSON_CHUNK and json_length % 4 == 0
+    gltf = json.loads(glb[20:20 + json_length].decode("utf-8"))
+    binary = b""
+    if 20 + json_length < len(glb):
+        bin_length, bin_type = struct.unpack_from("<II", glb, 20 + json_length)
+        assert bin_type == GLB_BIN_CHUNK and bin_length % 4 == 0
+        binary = glb[28 + json_length:28 + json_length + bin_length]
+        assert len(binary) == bin_length and 28 + json_length + bin_length == len(glb)
+    return gltf, binary
+
+def read_accessor(gltf, binary, index):
+    """Returns the values of the accessor after checking it fits into its aligned buffer view."""
+    accessor = gltf["accessors"][index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    dtype = np.dtype(COMPONENT_DTYPES[accessor["componentType"]])
+    components = TYPE_SIZES[accessor["type"]]
+    element_size = dtype.itemsize * components
+    stride = view.get("byteStride", element_size)
+    offset = accessor.get("byteOffset", 0)
+    assert accessor["count"] >= 1
+    assert offset % dtype.itemsize == 0 and (view.get("byteOffset", 0) + offset) % dtype.itemsize == 0
+    assert offset + stride * (accessor["count"] - 1) + element_size <= view["byteLength"]
+    start = view.get("byteOffset", 0) + offset
+    rows = np.ndarray((accessor["count"], components), dtype, binary, start, (stride, dtype.itemsize))
+    return rows if components > 1 else rows[:, 0]
+
+def validate_glb(glb):
+    """Asserts the rules of the specification for the asset and returns its JSON."""
+    gltf, binary = parse_glb(glb)
+    assert gltf["asset"]["version"] == "2.0"
+    assert all(value != [] for value in gltf.values()), "glTF doesn't allow empty arrays"
+    if "buffers" in gltf:
+        assert len(gltf["buffers"]) == 1 and "uri" not in gltf["buffers"][0]
+        assert len(binary) - 3 <= gltf["buffers"][0]["byteLength"] <= len(binary)
+    for view in gltf.get("bufferViews", []):
+        assert view.get("byteOffset", 0) + view["byteLength"] <= gltf["buffers"][view["buffer"]]["byteLength"]
+        if "byteStride" in view:
+            assert view["target"] == 34962 and 4 <= view["byteStride"] <= 252 and view["byteStride"] % 4 == 0
+    used_views = {}
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh["primitives"]:
+            attributes = {name: read_accessor(gltf, binary, index) for name, index in primitive["attributes"].items()}
+            counts = set(len(values) for values in attributes.values())
+            assert len(counts) == 1
+            num_vertices = counts.pop()
+            position = gltf["accessors"][primitive["attributes"]["POSITION"]]
+            assert position["min"] == attributes["POSITION"].min(axis=0).tolist()
+            assert position["max"] == attributes["POSITION"].max(axis=0).tolist()
+            if "NORMAL" in attributes:
+                np.testing.assert_allclose(np.linalg.norm(attributes["NORMAL"], axis=1), 1, atol=5e-4)
+            for index in primitive["attributes"].values():
+                used_views.setdefault(gltf["accessors"][index]["bufferView"], set()).add("attribute")
+            count = num_vertices
+            if "indices" in primitive:
+                accessor = gltf["accessors"][primitive["indices"]]
+                assert accessor["type"] == "SCALAR" and accessor["componentType"] in (5121, 5123, 5125)
+                assert "byteStride" not in gltf["bufferViews"][accessor["bufferView"]]
+                indices = read_accessor(gltf, binary, primitive["indices"])
+                assert indices.max() < num_vertices
+                used_views.setdefault(accessor["bufferView"], set()).add("index")
+                count = len(indices)
+            mode = primitive.get("mode", 4)
+            assert count % {1: 2, 4: 3}[mode] == 0
+            assert primitive["material"] < len(gltf["materials"])
+    assert all(len(usage) == 1 for usage in used_views.values()), "a buffer view is either vertex or index data"
+    # every node has at most one parent and the scene holds the roots
+    nodes = gltf.get("nodes", [])
+    parents = [child for node in nodes for child in node.get("children", [])]
+    assert len(parents) == len(set(parents)) and all(child < len(nodes) for child in parents)
+    roots = gltf["scenes"][gltf["scene"]].get("nodes", [])
+    assert sorted(roots + parents) == list(range(len(nodes)))
+    for node in nodes:
+        if "mesh" in node:
+            assert node["mesh"] < len(gltf["meshes"])
+        if "rotation" in node:
+            assert abs(np.linalg.norm(node["rotation"]) - 1) < 1e-5
+    return gltf
+
+def test_scene(tmp_path):
+    buffers = [face_buffers(2000, num_faces=5, translation=(1.0, 2.0, 3.0), quaternion=(0.0, 0.0, 0.6, 0.8)),
+               line_buffers(4, 7), face_buffers(300, object_index=1, color=(0.1, 0.2, 0.3))]
+    path = str(tmp_path / "scene.glb")
+    write_glb(path, buffers, ["Box", "Cylinder"])
+    with open(path, "rb") as glb_file:
+        gltf = validate_glb(glb_file.read())
+    assert [node["name"] for node in gltf["nodes"] if "children" in node] == ["Box", "Cylinder"]
+    primitives = [primitive["extras"]["name"] for mesh in gltf["meshes"] for primitive in mesh["primitives"]]
+    assert primitives == ["Face{}".format(i) for i in range(1, 6)] + ["Edge{}".format(i) for i in range(1, 5)]\
+        + ["Face{}".format(i) for i in range(1, 7)]
+
+def test_primitives_hold_the_shape_faces():
+    buffers = face_buffers(2000, num_faces=5)
+    gltf, binary = parse_glb(buffers_to_gltf([buffers], ["Box"]).to_glb())
+    primitives = gltf["meshes"][0]["primitives"]
+    indices = np.concatenate([read_accessor(gltf, binary, primitive["indices"]) for primitive in primitives])
+    np.testing.assert_array_equal(indices, buffers.faces.ravel())
+
+def test_zero_normals_are_replaced():
+    buffers = face_buffers(200)
+    buffers = buffers._replace(normals=np.zeros_like(buffers.normals))
+    validate_glb(buffers_to_gltf([buffers], ["Box"]).to_glb())
+
+def test_empty_scene():
+    validate_glb(buffers_to_gltf([], []).to_glb())
+
+def test_loads_in_other_readers(tmp_path):
+    pygltflib = pytest.importorskip("pygltflib")
+    path = str(tmp_path / "scene.glb")
+    write_glb(path, [face_buffers(500), line_buffers(2, 3)], ["Box"])
+    gltf = pygltflib.GLTF2().load(path)
+    assert len(gltf.meshes) == 2 and len(gltf.binary_blob()) == gltf.buffers[0].byteLength
+
+@pytest.mark.parametrize("part_index, names", [
+    ([100, 200], ["Face1", "Face2", None]),
+    ([100, 200, 5000], ["Face1", "Face2", "Face3"]),
+    ([0, 0], [None]),
+    ([], ["Face1"]),
+])
+def test_part_index_not_matching_the_triangles(part_index, names):
+    buffers = face_buffers(2000)
+    buffers = buffers._replace(part_index=np.array(part_index, dtype='int32'))
+    glb = buffers_to_gltf([buffers], ["Box"]).to_glb()
+    gltf = validate_glb(glb)
+    _, binary = parse_glb(glb)
+    primitives = gltf["meshes"][0]["primitives"]
+    indices = np.concatenate([read_accessor(gltf, binary, primitive["indices"]) for primitive in primitives])
+    np.testing.assert_array_equal(indices, buffers.faces.ravel())
+    assert [primitive.get("extras", {}).get("name") for primitive in primitives] == names
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from pythreejs import Mesh, LineSegments, VertexNormalsHelper
+
+from bench_highlight_traffic import CommTraffic
+from freecadviewer import decimate_buffers, lod_buffers, get_buffers_renderer, RendererConfig, LOD_MIN_TRIANGLES
+from tests.geometry import face_buffers
+
+
+def shape_face_bounds(buffers):
+    """Returns the bounding boxes of the shape faces of the buffers."""
+    triangle_ends = np.cumsum(buffers.part_index)
+    bounds = []
+    for start, end in zip(triangle_ends - buffers.part_index, triangle_ends):
+        corners = buffers.vertices[buffers.faces[start:end]].reshape(-1, 3)
+        bounds.append((corners.min(axis=0), corners.max(axis=0)))
+    return bounds
+
+def test_decimation_meets_the_target():
+    buffers = face_buffers(20000, num_faces=6)
+    decimated = decimate_buffers(buffers, 2000)
+    assert 1000 < len(decimated.faces) <= 2000
+    assert decimated.part_index.sum() == len(decimated.faces) and len(decimated.part_index) == 6
+    assert decimated.faces.max() < len(decimated.vertices) == len(decimated.normals)
+
+def test_triangles_stay_in_their_shape_face():
+    buffers = face_buffers(20000, num_faces=4)
+    decimated = decimate_buffers(buffers, 3000)
+    cell = np.sqrt(2 * 20000 / 3000) * 2
+    for (lower, upper), (decimated_lower, decimated_upper) in zip(shape_face_bounds(buffers),
+                                                                  shape_face_bounds(decimated)):
+        assert np.all(decimated_lower >= lower - cell) and np.all(decimated_upper <= upper + cell)
+
+def test_small_meshes_are_kept():
+    buffers = face_buffers(500)
+    assert decimate_buffers(buffers, 1000) is buffers
+
+def test_levels_shrink_by_a_quarter():
+    levels = lod_buffers(face_buffers(40000), 20000, 4)
+    counts = [len(level.faces) for level in levels]
+    assert counts[0] <= 20000 and len(counts) == 4
+    assert all(count <= previous // 4 for previous, count in zip(counts[:-1], counts[1:]))
+    # a sixteenth of the 968 triangles would be below LOD_MIN_TRIANGLES
+    assert 968 // 16 < LOD_MIN_TRIANGLES and len(lod_buffers(face_buffers(1000), 1000, 4)) == 2
+
+def lod_config(**options):
+    config = RendererConfig()
+    config.triangle_budget = 5000
+    for name, value in options.items():
+        setattr(config, name, value)
+    return config
+
+def lod_renderer(config, buffers):
+    with CommTraffic() as traffic:
+        renderer, _ = get_buffers_renderer(buffers, ["Part{}".format(i) for i in range(len(buffers))], config)
+    lods = [obj for obj in renderer.scene.children[3].children if hasattr(obj, "lod_levels")]
+    return renderer, lods, traffic.bytes_sent
+
+def test_levels_are_built_when_shown():
+    renderer, lods, sent = lod_renderer(lod_config(), [face_buffers(20000)])
+    lod, = lods
+    assert len(lod.lod_levels) == 3 and lod.lod_level == 0
+    assert [level is not None for level in lod.lod_levels] == [True, False, False]
+    assert sent < 2 * lod.lod_buffers[0].nbytes
+    # far away the coarsest level is built, coming back shows the first one again
+    renderer.camera.position = tuple(lod.lod_center + (0, -lod.lod_distances[-1] * 2, 0))
+    assert lod.lod_level == 2 and lod.lod_levels[1] is None
+    first_level = lod.lod_levels[0]
+    renderer.camera.position = (0, -40, 20)
+    assert lod.lod_level == 0 and lod.children == tuple(first_level)
+
+def test_levels_share_geometry():
+    buffers = [face_buffers(20000, object_index=i, translation=(100.0 * i, 0.0, 0.0)) for i in range(2)]
+    _, lods, _ = lod_renderer(lod_config(share_geometry=True), buffers)
+    first, second = (lod.lod_levels[0][0] for lod in lods)
+    assert first is not second and first.geometry is second.geometry
+    assert first.name != second.name
+
+def test_levels_show_normals_and_wireframes():
+    _, (lod,), _ = lod_renderer(lod_config(show_normals=True), [face_buffers(20000)])
+    assert [type(obj) for obj in lod.children] == [VertexNormalsHelper, Mesh]
+    _, (lod,), _ = lod_renderer(lod_config(show_mesh=True), [face_buffers(20000)])
+    assert [type(obj) for obj in lod.children] == [LineSegments]
+
+def test_merged_levels_are_tagged():
+    renderer, (lod,), _ = lod_renderer(lod_config(merge_materials=True),
+                                       [face_buffers(20000), face_buffers(20000, object_index=1, offset=(150, 0, 0))])
+    mesh = lod.children[0]
+    assert mesh.merged_lookup[1] == ["Part0", "Part1"] and "object_id" in mesh.geometry.attributes
+    renderer.camera.position = tuple(lod.lod_center + (0, -lod.lod_distances[-1] * 2, 0))
+    assert "object_id" in lod.children[0].geometry.attributes
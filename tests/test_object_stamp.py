@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+from freecadviewer import object_stamp, objects_to_buffers, ChangeTracker, GeometryCache
+
+
+def test_stamp_changes_with_the_object(freecad):
+    doc = freecad.newDocument("Doc")
+    box = doc.addObject("Box")
+    other = doc.addObject("Other")
+    stamp = object_stamp(box)
+    assert object_stamp(box) == stamp
+    box.Size = 400
+    assert object_stamp(box) != stamp
+    other_stamp = object_stamp(other)
+    box.Offset = 3.0
+    assert object_stamp(other) == other_stamp
+
+def test_recreated_objects_never_match(freecad):
+    doc = freecad.newDocument("Doc")
+    stamp = object_stamp(doc.addObject("Box"))
+    doc.removeObject("Box")
+    assert object_stamp(doc.addObject("Box")) != stamp
+    stamps = [object_stamp(obj) for obj in doc.Objects]
+    # a document opened again under the same name, without signals for its restored objects
+    freecad.closeDocument(doc.Name)
+    reopened = freecad.newDocument("Doc")
+    reopened.Objects = doc.Objects
+    assert [object_stamp(obj) for obj in reopened.Objects] != stamps
+
+def test_links_follow_their_target(freecad):
+    doc = freecad.newDocument("Doc")
+    box = doc.addObject("Box")
+    link = doc.addObject("Link", shape=False, link=box)
+    stamp = object_stamp(link)
+    box.Size = 400
+    assert object_stamp(link) != stamp
+
+def test_objects_without_shape_are_cached(freecad):
+    doc = freecad.newDocument("Doc")
+    objects = [doc.addObject("Mesh", shape=False), doc.addObject("Box")]
+    cache = GeometryCache()
+    first = objects_to_buffers(objects, cache)
+    assert freecad.gui.subgraphs == 2
+    assert objects_to_buffers(objects, cache) == first and freecad.gui.subgraphs == 2
+    objects[0].Size = 400
+    objects_to_buffers(objects, cache)
+    assert freecad.gui.subgraphs == 3 and cache.hits == 3
+
+def test_unregistered_tracker_stamps_nothing(freecad):
+    doc = freecad.newDocument("Doc")
+    assert object_stamp(doc.addObject("Box"), ChangeTracker()) is None
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import numpy as np
+import pytest
+from pythreejs import Group
+
+from freecadviewer import create_objects, generate_picker, release_objects, RendererConfig, RenderStats
+from tests.geometry import face_buffers, line_buffers
+
+
+@pytest.fixture
+def objects():
+    config = RendererConfig()
+    objects, _ = create_objects([face_buffers(2000, num_faces=4), line_buffers(3, 4)], config, ["Box"])
+    return objects
+
+def pick(picker, obj, face_index=0, point=(0.0, 0.0, 0.0), index=None):
+    picker.object = obj
+    picker.faceIndex = face_index
+    picker.index = index
+    # every event is a new point, the picker observes it
+    picker.point = [float(x) for x in point]
+
+@pytest.mark.parametrize("highlight_mode", ["overlay", "vertex_colors"])
+def test_picking_a_face(objects, highlight_mode):
+    mesh, _ = objects
+    html, picker = generate_picker(Group(children=objects), [], "click", highlight_mode)
+    pick(picker, mesh, 700, (1, 0, 0))
+    assert html.value == "Box:  <b>Face2</b>"
+    if highlight_mode == "overlay":
+        assert picker.face_overlay.visible
+        triangle_ends = mesh.face_lookup[0]
+        assert len(picker.face_overlay.geometry.attributes["index"].array) == 3 * (triangle_ends[1] - triangle_ends[0])
+    else:
+        assert "color" in mesh.geometry.attributes
+    pick(picker, mesh, 1, (2, 0, 0))
+    assert html.value == "Box:  <b>Face1</b>"
+
+@pytest.mark.parametrize("index", [None, 10])
+def test_picking_an_edge(objects, index):
+    _, lines = objects
+    html, picker = generate_picker(Group(children=objects), [], "click")
+    # the point lies on the second segment of the second edge
+    pick(picker, lines, point=(1.5, 1.0, 0.0), index=index)
+    assert html.value == "Box:  <b>Edge2</b>"
+    assert picker.edge_overlay.visible
+
+def test_unchanged_hovers_are_skipped(objects):
+    mesh, _ = objects
+    stats = RenderStats()
+    html, picker = generate_picker(Group(children=objects), [], "mousemove", stats=stats, skip_unchanged=True)
+    for i, face_index in enumerate([0, 1, 2, 700, 701, 0]):
+        pick(picker, mesh, face_index, (i + 1, 0, 0))
+    assert len(stats.picker_latencies) == 3 and stats.picker_skipped == 3
+    assert html.value == "Box:  <b>Face1</b>"
+
+def test_hovers_after_releasing_objects_are_not_skipped(objects):
+    mesh, _ = objects
+    stats = RenderStats()
+    html, picker = generate_picker(Group(children=objects), [], "mousemove", stats=stats, skip_unchanged=True)
+    pick(picker, mesh, 0, (1, 0, 0))
+    release_objects(objects, picker, html, {})
+    assert html.value == "<b>No selection.</b>"
+    # a new object can have the id of a released one, its first hover still has to be handled
+    pick(picker, mesh, 0, (2, 0, 0))
+    assert len(stats.picker_latencies) == 2 and stats.picker_skipped == 0
+    assert html.value == "Box:  <b>Face1</b>"
+
+def sweep(picker, obj, face_indices, interval):
+    async def events():
+        for i, face_index in enumerate(face_indices):
+            pick(picker, obj, face_index, (i + 1, 0, 0))
+            await asyncio.sleep(interval)
+        await asyncio.sleep(0.2)
+    asyncio.run(events())
+
+def test_throttle_handles_the_latest_state(objects):
+    mesh, _ = objects
+    stats = RenderStats()
+    html, picker = generate_picker(Group(children=objects), [], "mousemove", stats=stats, throttle=0.1)
+    sweep(picker, mesh, np.linspace(0, 1900, 20).astype(int), 0.01)
+    assert 2 <= len(stats.picker_latencies) <= 5 and stats.picker_skipped == 0
+    assert len(stats.picker_latencies) + stats.picker_coalesced == 20
+    assert html.value == "Box:  <b>Face4</b>"
+    assert max(stats.picker_delays) < 0.2
+
+def test_debounce_waits_for_a_pause(objects):
+    mesh, _ = objects
+    stats = RenderStats()
+    html, picker = generate_picker(Group(children=objects), [], "mousemove", stats=stats, debounce=0.05)
+    sweep(picker, mesh, [0, 500, 1000, 1500], 0.005)
+    assert len(stats.picker_latencies) == 1 and stats.picker_coalesced == 3
+    assert html.value == "Box:  <b>Face4</b>"
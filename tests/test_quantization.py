@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from freecadviewer import quantize_positions, quantize_normals, RendererConfig, QUANTIZE_BITS
+from tests.geometry import face_buffers
+
+
+@pytest.mark.parametrize("bits", QUANTIZE_BITS)
+def test_positions_fill_their_integer_type(bits):
+    vertices = face_buffers(2000).vertices
+    quantized, offset, scale = quantize_positions(vertices, bits)
+    assert quantized.dtype.itemsize * 8 == bits
+    assert np.abs(quantized).max() == 2**(bits - 1) - 1
+    assert np.abs(offset + quantized * scale - vertices).max() <= scale.max() / 2 + 1e-9
+
+def test_precisions_that_waste_bits_are_rejected():
+    config = RendererConfig()
+    for bits in [4, 12, 15, 32, "16"]:
+        with pytest.raises(TypeError):
+            config.quantize_bits = bits
+    config.quantize_bits = 16
+    assert config.quantize_bits == 16
+
+def test_normals_survive_the_normal_matrix():
+    normals = np.array([[0.0, 0.0, 1.0], [0.6, 0.8, 0.0], [0.0, 0.0, 0.0]])
+    scale = np.array([2.0, 0.5, 1.0])
+    quantized = quantize_normals(normals, scale)
+    assert quantized.dtype == np.int8 and not quantized[2].any()
+    restored = quantized[:2] / 127 / scale
+    restored /= np.linalg.norm(restored, axis=1)[:, None]
+    assert np.degrees(np.arccos(np.clip((restored * normals[:2]).sum(axis=1), -1, 1))).max() < 1
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from freecadviewer import weld_buffers, weld_labels
+from tests.geometry import face_buffers, line_buffers
+
+
+def unwelded(buffers):
+    """Returns the buffers with every triangle using its own three vertices."""
+    vertices = buffers.vertices[buffers.faces].reshape(-1, 3)
+    faces = np.arange(len(vertices), dtype='int32').reshape(-1, 3)
+    return buffers._replace(vertices=vertices, faces=faces, normals=np.zeros_like(vertices))
+
+def test_exact_duplicates_are_welded_per_shape_face():
+    buffers = face_buffers(2000, num_faces=4)
+    welded, removed = weld_buffers(unwelded(buffers), 0.0)
+    np.testing.assert_array_equal(welded.part_index, buffers.part_index)
+    np.testing.assert_array_equal(welded.vertices[welded.faces], buffers.vertices[buffers.faces])
+    # vertices on the borders between shape faces stay split
+    triangle_ends = np.cumsum(buffers.part_index)
+    shared = sum(len(np.unique(buffers.faces[start:end])) for start, end in zip(triangle_ends - buffers.part_index,
+                                                                                triangle_ends))
+    assert len(welded.vertices) == shared and removed == 3 * len(buffers.faces) - shared
+
+def test_tolerance_welds_close_vertices_across_cells():
+    vertices = np.array([[0.0, 0.0, 0.0], [0.0009, 0.0, 0.0], [0.99, 0, 0], [1.0001, 0, 0], [5, 5, 5]])
+    labels = weld_labels(vertices, np.zeros(len(vertices), dtype=np.intp), 0.02)
+    assert labels[0] == labels[1] and labels[2] == labels[3] and len(set(labels.tolist())) == 3
+    groups = np.array([0, 1, 0, 0, 0])
+    assert len(set(weld_labels(vertices, groups, 0.02).tolist())) == 4
+
+def test_collapsed_triangles_are_removed():
+    buffers = face_buffers(200, num_faces=1)
+    welded, _ = weld_buffers(buffers, 1e6)
+    assert len(welded.faces) == 0 and welded.part_index.tolist() == [0]
+
+def test_line_sets_drop_repeated_segments():
+    buffers = line_buffers(3, 4)
+    doubled = buffers._replace(vertices=np.concatenate([buffers.vertices.reshape(3, -1, 3)] * 2, axis=1).reshape(-1, 3),
+                               edge_ids=np.repeat(np.arange(1, 4), 16).astype('float32'),
+                               edge_offsets=np.arange(4) * 16)
+    welded, removed = weld_buffers(doubled, 0.0)
+    np.testing.assert_array_equal(welded.vertices, buffers.vertices)
+    np.testing.assert_array_equal(welded.edge_offsets, buffers.edge_offsets)
+    assert removed == len(buffers.vertices)